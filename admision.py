@@ -0,0 +1,88 @@
+import time
+import threading
+from contextlib import contextmanager
+
+# Control de admisión para la generación de PDF (fpdf usa CPU y memoria):
+# como mucho `concurrencia` renders a la vez por proceso y una cola corta de
+# espera. Pasado eso se rechaza enseguida y el cliente reintenta más tarde,
+# en lugar de que todos los renders se vuelvan lentos a la vez.
+
+class Saturado(Exception):
+    """No hay lugar para generar el documento ahora; reintentar en `reintentar` segundos"""
+
+    def __init__(self, reintentar):
+        super().__init__(f"Generación de documentos saturada, reintentar en {reintentar} s")
+        self.reintentar = reintentar
+
+class LimitadorRender:
+    """Semáforo de renders con cola acotada y métricas"""
+
+    def __init__(self, concurrencia=2, max_cola=8, espera_max=2.0, reintentar=5):
+        self.concurrencia = concurrencia
+        self.max_cola = max_cola
+        self.espera_max = espera_max
+        self.reintentar = reintentar
+        self._semaforo = threading.BoundedSemaphore(concurrencia)
+        self._lock = threading.Lock()
+        self.en_curso = 0
+        self.en_cola = 0
+        self.cola_max = 0
+        self.admitidos = 0
+        self.rechazados_cola = 0
+        self.rechazados_espera = 0
+        self.espera_total = 0.0
+
+    def _rechazar(self, motivo):
+        with self._lock:
+            setattr(self, motivo, getattr(self, motivo) + 1)
+        raise Saturado(self.reintentar)
+
+    def _esperar_lugar(self):
+        with self._lock:
+            if self.en_cola >= self.max_cola:
+                lleno = True
+            else:
+                lleno = False
+                self.en_cola += 1
+                self.cola_max = max(self.cola_max, self.en_cola)
+        if lleno:
+            self._rechazar('rechazados_cola')
+
+        inicio = time.perf_counter()
+        try:
+            obtenido = self._semaforo.acquire(timeout=self.espera_max)
+        finally:
+            with self._lock:
+                self.en_cola -= 1
+                self.espera_total += time.perf_counter() - inicio
+        if not obtenido:
+            self._rechazar('rechazados_espera')
+
+    @contextmanager
+    def turno(self):
+        """Bloque con un lugar de render; lanza Saturado si no lo consigue a tiempo"""
+        if not self._semaforo.acquire(blocking=False):
+            self._esperar_lugar()
+        with self._lock:
+            self.en_curso += 1
+            self.admitidos += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.en_curso -= 1
+            self._semaforo.release()
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                'concurrencia': self.concurrencia,
+                'en_curso': self.en_curso,
+                'en_cola': self.en_cola,
+                'cola_max': self.cola_max,
+                'max_cola': self.max_cola,
+                'admitidos': self.admitidos,
+                'rechazados_cola': self.rechazados_cola,
+                'rechazados_espera': self.rechazados_espera,
+                'espera_media_ms': round(self.espera_total / self.admitidos * 1000, 2) if self.admitidos else 0.0,
+            }
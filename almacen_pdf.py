@@ -0,0 +1,174 @@
+import os
+import glob
+import time
+import tempfile
+import threading
+
+# Carpeta donde se guardan los PDF ya generados
+ALMACEN_DIR = os.path.abspath(os.environ.get("PDF_ALMACEN_DIR", "pdf_almacen"))
+# Tamaño máximo del almacén: al pasarlo se borran los PDF usados hace más tiempo
+ALMACEN_MAX_BYTES = int(os.environ.get("PDF_ALMACEN_MAX_MB", 512)) * 1024 * 1024
+# Un PDF usado hace menos de estos segundos no se borra (puede estar enviándose)
+ALMACEN_GRACIA = int(os.environ.get("PDF_ALMACEN_GRACIA", 300))
+# Cada cuántos segundos como mucho se revisa el tamaño (después de guardar un PDF)
+ALMACEN_INTERVALO_PODA = 60
+
+# Aciertos (ya estaba en el almacén), fallos (hubo que generarlo), esperas (otro
+# request lo estaba generando) y podados (borrados por tamaño) de este proceso
+_contadores = {'aciertos': 0, 'fallos': 0, 'esperas': 0, 'podados': 0}
+_contadores_lock = threading.Lock()
+
+# Un lock por nombre mientras alguien lo genera: nombre -> [lock, requests que lo usan]
+_generando = {}
+_generando_lock = threading.Lock()
+_ultima_poda = 0
+
+def ruta_pdf(nombre):
+    """Ruta del archivo dentro del almacén"""
+    return os.path.join(ALMACEN_DIR, nombre)
+
+def guardar_pdf(nombre, pdf_file):
+    """
+    Escribe el PDF (BytesIO) en el almacén de forma atómica.
+    Se escribe a un temporal en la misma carpeta y luego se renombra,
+    así nunca se sirve un archivo a medio escribir.
+    """
+    os.makedirs(ALMACEN_DIR, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=ALMACEN_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(pdf_file.getbuffer())
+        os.replace(tmp, ruta_pdf(nombre))
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return ruta_pdf(nombre)
+
+def _usar(ruta):
+    """
+    True si el PDF está en el almacén, y lo marca como recién usado (atime).
+    El mtime no se toca: de él salen el ETag y Last-Modified de send_file.
+    """
+    try:
+        os.utime(ruta, (time.time(), os.stat(ruta).st_mtime))
+        return True
+    except FileNotFoundError:
+        return False
+
+def _lock_nombre(nombre, tomar):
+    """Lock del nombre (tomar=True) o libera el uso (tomar=False; se borra con el último)"""
+    with _generando_lock:
+        if tomar:
+            entrada = _generando.setdefault(nombre, [threading.Lock(), 0])
+            entrada[1] += 1
+            return entrada[0]
+        entrada = _generando[nombre]
+        entrada[1] -= 1
+        if entrada[1] == 0:
+            del _generando[nombre]
+
+def obtener_pdf(nombre, generar):
+    """
+    Devuelve la ruta del PDF almacenado.
+    Solo llama a generar() (que debe devolver un BytesIO) si aún no existe, y
+    una sola vez aunque lleguen varios requests a la vez: los demás esperan
+    el lock del nombre y sirven el archivo que dejó el primero.
+    """
+    ruta = pdf_almacenado(nombre)
+    if ruta is not None:
+        return ruta
+    ruta = ruta_pdf(nombre)
+    lock = _lock_nombre(nombre, True)
+    try:
+        with lock:
+            if _usar(ruta):
+                _contar('esperas')
+                return ruta
+            _contar('fallos')
+            ruta = guardar_pdf(nombre, generar())
+    finally:
+        _lock_nombre(nombre, False)
+    podar_si_toca()
+    return ruta
+
+def pdf_almacenado(nombre):
+    """Ruta del PDF si ya está en el almacén (sin generarlo), o None"""
+    ruta = ruta_pdf(nombre)
+    if _usar(ruta):
+        _contar('aciertos')
+        return ruta
+    return None
+
+def podar_si_toca():
+    """podar_almacen() como mucho cada ALMACEN_INTERVALO_PODA segundos por proceso"""
+    global _ultima_poda
+    with _contadores_lock:
+        if time.monotonic() - _ultima_poda < ALMACEN_INTERVALO_PODA:
+            return
+        _ultima_poda = time.monotonic()
+    podar_almacen()
+
+def podar_almacen(max_bytes=None, gracia=None):
+    """
+    Borra los PDF usados hace más tiempo hasta que el almacén ocupe a lo sumo
+    max_bytes. Los usados en los últimos `gracia` segundos se conservan aunque
+    se pase del tamaño, y los temporales viejos (escrituras que no terminaron)
+    se borran siempre. Devuelve la cantidad de archivos borrados.
+    """
+    max_bytes = ALMACEN_MAX_BYTES if max_bytes is None else max_bytes
+    gracia = ALMACEN_GRACIA if gracia is None else gracia
+    limite = time.time() - gracia
+    archivos, total, borrados = [], 0, 0
+    try:
+        entradas = list(os.scandir(ALMACEN_DIR))
+    except FileNotFoundError:
+        return 0
+    for entrada in entradas:
+        try:
+            st = entrada.stat()
+        except FileNotFoundError:
+            continue
+        if entrada.name.endswith(".tmp"):
+            if st.st_mtime < limite and _borrar(entrada.path):
+                borrados += 1
+        elif entrada.name.endswith(".pdf"):
+            archivos.append((st.st_atime, st.st_size, entrada.path))
+            total += st.st_size
+
+    for usado, tamanio, ruta in sorted(archivos):
+        if total <= max_bytes or usado >= limite:
+            break
+        if _borrar(ruta):
+            total -= tamanio
+            borrados += 1
+    with _contadores_lock:
+        _contadores['podados'] += borrados
+    return borrados
+
+def _borrar(ruta):
+    try:
+        os.remove(ruta)
+        return True
+    except FileNotFoundError:
+        return False
+
+def _contar(resultado):
+    with _contadores_lock:
+        _contadores[resultado] += 1
+
+def estadisticas_almacen():
+    with _contadores_lock:
+        total = _contadores['aciertos'] + _contadores['esperas'] + _contadores['fallos']
+        return {
+            **_contadores,
+            'tasa_aciertos': round((_contadores['aciertos'] + _contadores['esperas']) / total, 3) if total else None,
+        }
+
+def invalidar_pdfs(prefijo, excepto=None):
+    """Elimina los PDF cuyo nombre empieza con prefijo (salvo los que empiezan con excepto)"""
+    patron = ruta_pdf(glob.escape(prefijo) + "*.pdf")
+    for ruta in glob.glob(patron):
+        if excepto and os.path.basename(ruta).startswith(excepto):
+            continue
+        _borrar(ruta)
@@ -1,33 +1,290 @@
-from flask import Flask, render_template, request, redirect, url_for, flash
+from flask import Flask, render_template, request, redirect, url_for, flash, make_response, session, g
+from markupsafe import Markup
 from flask_login import LoginManager, login_user, login_required, logout_user, UserMixin, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import generate_password_hash, check_password_hash, safe_join
 import sqlite3
+import click
 from flask import send_file
 import os
-from io import BytesIO
-from itertools import zip_longest
-from templates.pdf_generator import genera_pdf_formulario
-from templates.pdf_generator_detalles import genera_pdf_detalles
+import sys
+import json
+import hashlib
+import hmac
+import time
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from datetime import datetime, timezone
+from io import TextIOWrapper
+from almacen_pdf import obtener_pdf, pdf_almacenado, invalidar_pdfs, estadisticas_almacen
+from candidatos import (COLUMNAS_DATOS, candidato_desde_formulario, insertar_candidato, leer_registros, importar_candidatos,
+                        leer_candidato, validar_edicion, aplicar_edicion)
+from duplicados import buscar_duplicados, informe_duplicados, completar_claves
+from archivo import TABLAS_ARCHIVO, archivar_convocatoria
+from reportes import ORDENES_RANKING, filas_ranking_shards, version_ranking
+from escritura import transaccion_escritura, MetricasEscritura, EscrituraOcupada, EscritorGrupal
+from admision import LimitadorRender, Saturado
+from paginas import PaginasPrecompiladas, huella_archivo, guardar_pagina, guardar_manifiesto
+from shards import shard_de_id, ruta_shard, agrupar_por_shard, reservar_rango
+from respaldo import respaldo_completo, conexion_snapshot, iniciar_respaldos_programados
+from cache_lru import CacheLRU
+from salud import estado_wal, latencia_db, lock_disponible
+from mantenimiento import Mantenimiento
+from cambios import (crear_tabla_cambios, crear_triggers_cambios, leer_cursor, escribir_cursor, cambios_desde,
+                     CursorVencido, cursor_actual, corte_poda, podar_cambios)
+from tablero import crear_tablas_tablero, crear_triggers_tablero, reconstruir_tablero, leer_tablero
+from filtros import crear_indices_filtros, reconstruir_filtros, leer_criterios, filtrar
+
+# Los módulos de PDF (fpdf, Pillow) se importan recién al generar el primer documento:
+# son la mayor parte del tiempo de arranque y muchos workers nunca los usan.
 
 app = Flask(__name__)
 app.secret_key = "clave_secreta"
+app.config["DATABASE"] = os.environ.get("DATABASE", "form_hv.db")
+# Postulantes de convocatorias cerradas (ver "flask archivar")
+app.config["ARCHIVO_DATABASE"] = os.environ.get("ARCHIVO_DATABASE", "form_hv_archivo.db")
+# Respaldos en caliente: carpeta, cada cuántos segundos (0 = solo con "flask respaldar") y cuántos conservar
+app.config["RESPALDO_DIR"] = os.environ.get("RESPALDO_DIR", "respaldos")
+app.config["RESPALDO_INTERVALO"] = int(os.environ.get("RESPALDO_INTERVALO", 0))
+app.config["RESPALDO_CONSERVAR"] = int(os.environ.get("RESPALDO_CONSERVAR", 7))
+# Antigüedad máxima (segundos) del snapshot para que los informes lo lean en lugar
+# de la base en uso; por defecto dos intervalos de respaldo (sin respaldos programados, nunca)
+app.config["SNAPSHOT_EDAD_MAXIMA"] = int(
+    os.environ.get("SNAPSHOT_EDAD_MAXIMA", 2 * app.config["RESPALDO_INTERVALO"])
+)
+# Convocatoria a la que se asignan los formularios nuevos (opcional)
+app.config["CONVOCATORIA"] = os.environ.get("CONVOCATORIA")
+# Cada convocatoria en su propia base (form_hv_shardN.db); ver shards.py
+app.config["SHARDS"] = os.environ.get("SHARDS", "0") == "1"
+
+# Con un proxy (nginx/Apache) delante, el envío de los PDF del almacén lo hace el proxy
+app.config["USE_X_SENDFILE"] = os.environ.get("USE_X_SENDFILE") == "1"
+
+# PDF livianos: logo reducido a su resolución impresa (los streams fpdf los comprime
+# siempre). Activado por defecto, así que cambia la salida de todos los documentos;
+# los PDF ya guardados en el almacén se siguen sirviendo hasta que se poden
+app.config["PDF_COMPACTO"] = os.environ.get("PDF_COMPACTO", "1") == "1"
+
+# Rechazar formularios cuyo CI+expedido ya está registrado (los nombres iguales solo se informan)
+app.config["BLOQUEAR_CI_DUPLICADO"] = os.environ.get("BLOQUEAR_CI_DUPLICADO", "1") == "1"
+
+# Escrituras de formularios: espera máxima por el lock (ms) y reintentos con pausa aleatoria
+app.config["ESPERA_LOCK_MS"] = int(os.environ.get("ESPERA_LOCK_MS", 5000))
+app.config["REINTENTOS_ESCRITURA"] = int(os.environ.get("REINTENTOS_ESCRITURA", 3))
+metricas_escritura = MetricasEscritura()
+
+# Escritor único por worker que confirma los formularios en grupos (un commit por grupo).
+# Útil en los picos de envíos de fin de convocatoria.
+app.config["ESCRITOR_GRUPAL"] = os.environ.get("ESCRITOR_GRUPAL", "0") == "1"
+app.config["ESCRITOR_MAX_GRUPO"] = int(os.environ.get("ESCRITOR_MAX_GRUPO", 32))
+app.config["ESCRITOR_ESPERA_MS"] = float(os.environ.get("ESCRITOR_ESPERA_MS", 5))
+escritores = {}  # shard -> EscritorGrupal de este worker
+
+# Generación de PDF por worker: renders simultáneos, cola de espera y segundos de espera en cola.
+# Pasado eso se responde 503 con Retry-After.
+limitador_render = LimitadorRender(
+    concurrencia=int(os.environ.get("RENDER_CONCURRENCIA", 2)),
+    max_cola=int(os.environ.get("RENDER_COLA", 8)),
+    espera_max=float(os.environ.get("RENDER_ESPERA", 2)),
+    reintentar=int(os.environ.get("RENDER_REINTENTAR", 5)),
+)
+
+# Páginas públicas precompiladas y comprimidas (ver "flask construir-paginas")
+app.config["PAGINAS_DIR"] = os.environ.get("PAGINAS_DIR", "paginas")
+PAGINAS_PUBLICAS = [("index.html", "/"), ("login.html", "/login")]
+paginas_precompiladas = PaginasPrecompiladas(app.config["PAGINAS_DIR"])
+
+# Secciones de solo lectura de detalles.html ya renderizadas, por persona y versión
+cache_detalles = CacheLRU(int(os.environ.get("CACHE_DETALLES_MAX", 512)))
+
+# Hilo de mantenimiento de las bases: cada cuántos segundos revisa el WAL (0 = desactivado),
+# tamaño del -wal que dispara un checkpoint TRUNCATE y cada cuántos segundos PRAGMA optimize
+app.config["MANTENIMIENTO_INTERVALO"] = float(os.environ.get("MANTENIMIENTO_INTERVALO", 1))
+app.config["MANTENIMIENTO_WAL_MB"] = int(os.environ.get("MANTENIMIENTO_WAL_MB", 64))
+app.config["MANTENIMIENTO_OPTIMIZE"] = int(os.environ.get("MANTENIMIENTO_OPTIMIZE", 3600))
+# Con el hilo activo, páginas de WAL a partir de las cuales un commit de request hace igual
+# el checkpoint automático: solo si el hilo no da abasto (unos 40 MB con páginas de 4 KB)
+app.config["WAL_AUTOCHECKPOINT"] = int(os.environ.get("WAL_AUTOCHECKPOINT", 10000))
+mantenimiento = None  # Mantenimiento de este worker (ver iniciar_tareas_fondo)
+
+# Días que se conserva el registro de cambios con "flask podar-cambios" (ver cambios.py)
+app.config["CAMBIOS_RETENCION_DIAS"] = int(os.environ.get("CAMBIOS_RETENCION_DIAS", 30))
+
+# /readyz falla si abrir la base y leer tarda más de estos ms o si el -wal de alguna
+# base pasa de estos MB (el mantenimiento no logra hacer checkpoint)
+app.config["LISTO_LATENCIA_MS"] = float(os.environ.get("LISTO_LATENCIA_MS", 250))
+app.config["LISTO_WAL_MB"] = int(os.environ.get("LISTO_WAL_MB", 256))
+# /healthz y /readyz devuelven el detalle interno (rutas, pid, métricas) solo con
+# sesión iniciada o con este token (cabecera "Authorization: Bearer <token>")
+app.config["SALUD_TOKEN"] = os.environ.get("SALUD_TOKEN")
+
+# Postulantes máximos del reporte de ranking generado dentro de un request (0 = sin
+# límite; unos 2,5 ms por postulante). Los más grandes se generan fuera del request
+# con "flask reporte-ranking" y el request sirve el PDF que quedó en el almacén.
+app.config["REPORTE_MAX_FILAS"] = int(os.environ.get("REPORTE_MAX_FILAS", 2000))
+
+# Personas por lote (una consulta IN por tabla) al armar el PDF de comisión
+LOTE_COMISION = int(os.environ.get("LOTE_COMISION", 50))
+
+# Cantidad de cálculos anteriores que se conservan por persona (0 = sin historial)
+RESUMEN_HISTORIAL_MAX = int(os.environ.get("RESUMEN_HISTORIAL_MAX", 10))
 
 #login manager
 login_manager = LoginManager()
 login_manager.login_view = 'login'
 login_manager.init_app(app)
 
-def get_db_connection():
-    conn = sqlite3.connect('form_hv.db')
+# Conexiones a SQLite de este proceso: abiertas en total y abiertas ahora
+_conexiones = {'abiertas': 0, 'activas': 0, 'activas_max': 0}
+_conexiones_lock = threading.Lock()
+
+class Conexion(sqlite3.Connection):
+    """sqlite3.Connection que lleva la cuenta de las conexiones abiertas"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._contada = True
+        with _conexiones_lock:
+            _conexiones['abiertas'] += 1
+            _conexiones['activas'] += 1
+            _conexiones['activas_max'] = max(_conexiones['activas_max'], _conexiones['activas'])
+
+    def _descontar(self):
+        if getattr(self, '_contada', False):
+            self._contada = False
+            with _conexiones_lock:
+                _conexiones['activas'] -= 1
+
+    def close(self):
+        self._descontar()
+        super().close()
+
+    def __del__(self):
+        # Las usadas con "with get_db_connection()" se cierran al liberarse
+        self._descontar()
+
+def estadisticas_conexiones():
+    with _conexiones_lock:
+        return dict(_conexiones)
+
+def get_db_connection(ruta=None):
+    conn = sqlite3.connect(ruta or app.config["DATABASE"], factory=Conexion)
     conn.row_factory = sqlite3.Row
+    if mantenimiento is not None:
+        # Los checkpoints los hace el hilo de mantenimiento, no el commit de un request;
+        # el umbral alto queda como red de seguridad si el hilo se detiene
+        conn.execute(f"PRAGMA wal_autocheckpoint = {int(app.config['WAL_AUTOCHECKPOINT'])}")
     return conn
 
-def init_database():
+def conexion_shard(numero, crear=False):
+    """
+    Conexión a la base de un shard (0 = base principal). None si el shard
+    todavía no existe, salvo con crear=True.
+    """
+    if numero == 0:
+        return get_db_connection()
+    ruta = ruta_shard(app.config["DATABASE"], numero)
+    if not crear and not os.path.exists(ruta):
+        return None
+    asegurar_shard(numero)
+    return get_db_connection(ruta)
+
+def shards_activos():
+    """Shards con postulantes: la base principal y los asignados a convocatorias"""
     conn = get_db_connection()
+    try:
+        numeros = [row[0] for row in conn.execute(
+            "SELECT shard FROM convocatorias WHERE shard IS NOT NULL ORDER BY shard"
+        )]
+    finally:
+        conn.close()
+    return [0] + numeros
+
+def rutas_shards():
+    """Archivos de los shards de convocatorias que ya existen (sin la base principal)"""
+    rutas = [ruta_shard(app.config["DATABASE"], numero) for numero in shards_activos()[1:]]
+    return [ruta for ruta in rutas if os.path.exists(ruta)]
+
+def fuentes_candidatos(ids=None, archivo=True, escritura=False):
+    """
+    Funciones que abren las bases donde buscar postulantes: todos los shards
+    (o solo los de esos ids) y al final el archivo (con escritura=True, también
+    el archivo se abre para escribir).
+    """
+    numeros = sorted(agrupar_por_shard(ids)) if ids is not None else shards_activos()
+    fuentes = [partial(conexion_shard, numero) for numero in numeros]
+    return fuentes + [partial(conexion_archivo, escritura)] if archivo else fuentes
+
+def conexion_archivo(escritura=False):
+    """Conexión a la base de archivo, de solo lectura salvo escritura=True (None si todavía no existe)"""
+    ruta = app.config["ARCHIVO_DATABASE"]
+    if not os.path.exists(ruta):
+        return None
+    if escritura:
+        return get_db_connection(ruta)
+    conn = sqlite3.connect(f"file:{ruta}?mode=ro", uri=True, factory=Conexion)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def conexion_lectura(edad_maxima=None):
+    """
+    Conexión para exportaciones e informes pesados: el snapshot de solo lectura
+    del último respaldo si existe y tiene a lo sumo `edad_maxima` segundos
+    (SNAPSHOT_EDAD_MAXIMA si no se indica), si no la base principal.
+    """
+    if edad_maxima is None:
+        edad_maxima = app.config["SNAPSHOT_EDAD_MAXIMA"]
+    conn = conexion_snapshot(os.path.join(app.config["RESPALDO_DIR"], "snapshot.db"), edad_maxima)
+    return conn if conn is not None else get_db_connection()
+
+def buscar_persona(columna, valor, campos="*", escritura=False):
+    """
+    Busca una persona en su shard (por id) o en todos (por otra columna) y,
+    si no está, en el archivo (escritura=True: conexión al archivo que permite
+    escribir, para borrar o corregir archivados).
+    Devuelve (conn, fila) con la conexión donde se encontró, o (None, None).
+    """
+    for abrir in fuentes_candidatos([valor] if columna == "id" else None, escritura=escritura):
+        conn = abrir()
+        if conn is None:
+            continue
+        persona = conn.execute(f"SELECT {campos} FROM datos WHERE {columna} = ?", (valor,)).fetchone()
+        if persona is not None:
+            return conn, persona
+        conn.close()
+    return None, None
+
+# Versión del esquema guardada en PRAGMA user_version.
+# Subirla cada vez que init_database agregue tablas, columnas, índices o triggers.
+ESQUEMA_VERSION = 9
+
+# Tablas que dependen de una persona (persona_id)
+TABLAS_PERSONA = [
+    'formacion_academica', 'experiencia', 'cursos', 'paquetes_informaticos', 'idiomas',
+    'docencia', 'referencias', 'registro_profesional', 'pretension_salarial',
+    'incompatibilidades', 'declaracion_jurada', 'resumen_experiencia'
+]
+
+def init_database(shard=0):
+    """Crea o actualiza el esquema de la base principal (shard=0) o de un shard"""
+    conn = get_db_connection(ruta_shard(app.config["DATABASE"], shard))
     cursor = conn.cursor()
 
     cursor.execute("PRAGMA journal_mode = WAL")
 
+    if cursor.execute("PRAGMA user_version").fetchone()[0] >= ESQUEMA_VERSION:
+        conn.close()
+        return
+
+    # BEGIN IMMEDIATE toma el lock de escritura: si varios workers arrancan a la vez,
+    # uno aplica el esquema y los demás esperan y luego ven que ya está al día.
+    cursor.execute("BEGIN IMMEDIATE")
+    if cursor.execute("PRAGMA user_version").fetchone()[0] >= ESQUEMA_VERSION:
+        conn.rollback()
+        conn.close()
+        return
+
     cursor.execute(
         """
         CREATE TABLE IF NOT EXISTS datos(
@@ -47,11 +304,52 @@ def init_database():
         tcel INTEGER NOT NULL,
         tfijo INTEGER,
         correo TEXT UNIQUE,
-        n_libser TEXT
+        n_libser TEXT,
+        version INTEGER NOT NULL DEFAULT 1,
+        actualizado_en TEXT,
+        clave_ci TEXT,
+        clave_nombre TEXT,
+        convocatoria_id INTEGER REFERENCES convocatorias(id)
         )
 """
     )
 
+    # Bases creadas antes de tener versión por persona
+    columnas = [c['name'] for c in cursor.execute("PRAGMA table_info(datos)").fetchall()]
+    if 'version' not in columnas:
+        cursor.execute("ALTER TABLE datos ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+    if 'actualizado_en' not in columnas:
+        cursor.execute("ALTER TABLE datos ADD COLUMN actualizado_en TEXT")
+    cursor.execute("UPDATE datos SET actualizado_en = datetime('now') WHERE actualizado_en IS NULL")
+
+    # Claves normalizadas para detectar postulantes repetidos
+    for columna in ('clave_ci', 'clave_nombre'):
+        if columna not in columnas:
+            cursor.execute(f"ALTER TABLE datos ADD COLUMN {columna} TEXT")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_datos_{columna} ON datos({columna})")
+    completar_claves(cursor)
+
+    # Convocatorias: al cerrarse, sus postulantes se pueden mover a la base de archivo.
+    # Solo en la base principal; shard es la base de sus postulantes (NULL = la principal).
+    if shard == 0:
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS convocatorias(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT UNIQUE NOT NULL,
+            estado TEXT NOT NULL DEFAULT 'abierta' CHECK(estado IN ('abierta', 'cerrada')),
+            creada_en TEXT DEFAULT (datetime('now')),
+            shard INTEGER
+            )
+            """
+        )
+        if 'shard' not in [c['name'] for c in cursor.execute("PRAGMA table_info(convocatorias)").fetchall()]:
+            cursor.execute("ALTER TABLE convocatorias ADD COLUMN shard INTEGER")
+        cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_convocatorias_shard ON convocatorias(shard)")
+    if 'convocatoria_id' not in columnas:
+        cursor.execute("ALTER TABLE datos ADD COLUMN convocatoria_id INTEGER REFERENCES convocatorias(id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_datos_convocatoria ON datos(convocatoria_id)")
+
     cursor.execute(
         """
         CREATE TABLE IF NOT EXISTS formacion_academica(
@@ -204,19 +502,33 @@ def init_database():
         """
     )
     
+    if shard == 0:
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE,
+            password TEXT
+            );
+            """
+        )
+
     cursor.execute(
-        """
-        CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT UNIQUE,
-        password TEXT
-        );
-        """
+    """
+    CREATE TABLE IF NOT EXISTS resumen_experiencia(
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    persona_id INTEGER NOT NULL,
+    total_anios INTEGER DEFAULT 0,
+    total_meses INTEGER DEFAULT 0,
+    fecha_calculo TEXT,
+    FOREIGN KEY (persona_id) REFERENCES datos(id) ON DELETE CASCADE
     )
+    """
+)
 
     cursor.execute(
     """
-    CREATE TABLE IF NOT EXISTS resumen_experiencia(
+    CREATE TABLE IF NOT EXISTS resumen_experiencia_historial(
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     persona_id INTEGER NOT NULL,
     total_anios INTEGER DEFAULT 0,
@@ -227,19 +539,183 @@ def init_database():
     """
 )
 
-    cursor.execute("SELECT * FROM users WHERE username = ?",('admin',))
-    if cursor.fetchone() is None:
-        hashed_password = generate_password_hash ('culturas')
-        cursor.execute(
-            "INSERT INTO users (username, password) VALUES (?, ?)", ('admin', hashed_password)
-        )
-        print("Usuario por defecto creado")
+    # Bases antiguas guardaban un resumen nuevo por cada clic: los anteriores
+    # pasan al historial y se deja una sola fila por persona.
+    cursor.execute(
+        """
+        INSERT INTO resumen_experiencia_historial (persona_id, total_anios, total_meses, fecha_calculo)
+        SELECT persona_id, total_anios, total_meses, fecha_calculo FROM resumen_experiencia
+        WHERE id NOT IN (SELECT MAX(id) FROM resumen_experiencia GROUP BY persona_id)
+        ORDER BY id
+        """
+    )
+    cursor.execute(
+        """
+        DELETE FROM resumen_experiencia
+        WHERE id NOT IN (SELECT MAX(id) FROM resumen_experiencia GROUP BY persona_id)
+        """
+    )
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_resumen_experiencia_persona ON resumen_experiencia(persona_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_resumen_historial_persona ON resumen_experiencia_historial(persona_id, id)")
+
+    # Versión por persona: cualquier escritura en datos o en sus tablas hijas
+    # incrementa datos.version y actualiza datos.actualizado_en
+    cursor.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS datos_ai_version AFTER INSERT ON datos
+        BEGIN
+            UPDATE datos SET actualizado_en = datetime('now') WHERE id = NEW.id;
+        END
+        """
+    )
+    cursor.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS datos_au_version
+        AFTER UPDATE OF {', '.join(COLUMNAS_DATOS)} ON datos
+        BEGIN
+            UPDATE datos SET version = version + 1, actualizado_en = datetime('now') WHERE id = NEW.id;
+        END
+        """
+    )
+    for tabla in TABLAS_PERSONA:
+        for evento, fila in (('INSERT', 'NEW'), ('UPDATE', 'NEW'), ('DELETE', 'OLD')):
+            cursor.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS {tabla}_{evento[0].lower()}_version
+                AFTER {evento} ON {tabla}
+                BEGIN
+                    UPDATE datos SET version = version + 1, actualizado_en = datetime('now')
+                    WHERE id = {fila}.persona_id;
+                END
+                """
+            )
 
+    # Registro de cambios para sincronización incremental (ver cambios.py)
+    crear_tabla_cambios(cursor)
+    crear_triggers_cambios(cursor, ['datos'] + TABLAS_PERSONA)
+
+    # Estadísticas del tablero mantenidas por triggers (ver tablero.py); se
+    # recalculan enteras una vez, al actualizar el esquema
+    crear_tablas_tablero(cursor)
+    crear_triggers_tablero(cursor)
+    reconstruir_tablero(cursor)
+
+    # Índices y experiencia por persona para el filtro de postulantes (ver filtros.py)
+    crear_indices_filtros(cursor)
+    reconstruir_filtros(cursor)
+
+    if shard == 0:
+        cursor.execute("SELECT * FROM users WHERE username = ?",('admin',))
+        if cursor.fetchone() is None:
+            hashed_password = generate_password_hash ('culturas')
+            cursor.execute(
+                "INSERT INTO users (username, password) VALUES (?, ?)", ('admin', hashed_password)
+            )
+            print("Usuario por defecto creado")
+    else:
+        reservar_rango(cursor, shard)
+
+    cursor.execute(f"PRAGMA user_version = {ESQUEMA_VERSION}")
 
     conn.commit()
     conn.close()
 
-init_database()
+_esquema_listo = False
+_esquema_lock = threading.Lock()
+
+def asegurar_esquema():
+    """Aplica init_database una sola vez por proceso (seguro entre hilos)"""
+    global _esquema_listo
+    if _esquema_listo:
+        return
+    with _esquema_lock:
+        if not _esquema_listo:
+            init_database()
+            _esquema_listo = True
+
+_shards_listos = set()
+
+def asegurar_shard(numero):
+    """Aplica init_database a un shard una sola vez por proceso"""
+    if numero in _shards_listos:
+        return
+    with _esquema_lock:
+        if numero not in _shards_listos:
+            init_database(numero)
+            _shards_listos.add(numero)
+
+def _reiniciar_lock_esquema():
+    """Tras un fork (gunicorn --preload) el lock heredado puede quedar tomado"""
+    global _esquema_lock, mantenimiento, _tareas_iniciadas
+    _esquema_lock = threading.Lock()
+    # Los hilos escritores y de mantenimiento no sobreviven al fork
+    escritores.clear()
+    mantenimiento = None
+    _tareas_iniciadas = False
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reiniciar_lock_esquema)
+
+_tareas_iniciadas = False
+
+def iniciar_tareas_fondo():
+    """Hilos en segundo plano; se inician en cada worker después del fork"""
+    global _tareas_iniciadas, mantenimiento
+    if _tareas_iniciadas:
+        return
+    with _esquema_lock:
+        if _tareas_iniciadas:
+            return
+        _tareas_iniciadas = True
+        if app.config["RESPALDO_INTERVALO"] > 0:
+            iniciar_respaldos_programados(
+                app.config["DATABASE"], app.config["RESPALDO_DIR"],
+                app.config["RESPALDO_INTERVALO"], app.config["RESPALDO_CONSERVAR"],
+                registrar=app.logger.info, otras=rutas_shards
+            )
+        if app.config["MANTENIMIENTO_INTERVALO"] > 0:
+            mantenimiento = Mantenimiento(
+                lambda: [app.config["DATABASE"]] + rutas_shards(),
+                app.config["DATABASE"] + ".mantenimiento.lock",
+                intervalo=app.config["MANTENIMIENTO_INTERVALO"],
+                wal_max_bytes=app.config["MANTENIMIENTO_WAL_MB"] * 1024 * 1024,
+                intervalo_optimize=app.config["MANTENIMIENTO_OPTIMIZE"],
+                registrar=app.logger.warning,
+            ).iniciar()
+
+def escritor_de(numero):
+    """EscritorGrupal del shard (se inicia con el primer formulario), o None si está desactivado"""
+    if not app.config["ESCRITOR_GRUPAL"]:
+        return None
+    if numero not in escritores:
+        with _esquema_lock:
+            if numero not in escritores:
+                escritores[numero] = EscritorGrupal(
+                    partial(conexion_shard, numero, crear=True),
+                    max_grupo=app.config["ESCRITOR_MAX_GRUPO"],
+                    espera_grupo=app.config["ESCRITOR_ESPERA_MS"] / 1000,
+                    busy_timeout_ms=app.config["ESPERA_LOCK_MS"],
+                    metricas=metricas_escritura,
+                )
+    return escritores[numero]
+
+@app.before_request
+def verificar_esquema():
+    asegurar_esquema()
+    iniciar_tareas_fondo()
+
+def crear_app(config=None):
+    """
+    Fábrica de la aplicación para servidores con varios workers
+    (gunicorn "app:crear_app()", con o sin --preload).
+    No abre la base de datos: el esquema se verifica en el primer request
+    de cada worker, o antes del despliegue con "flask init-db".
+    """
+    if config:
+        app.config.update(config)
+        paginas_precompiladas.carpeta = app.config["PAGINAS_DIR"]
+        paginas_precompiladas.recargar()
+    return app
 
 class User(UserMixin):
     def __init__(self, id, username, password):
@@ -269,8 +745,139 @@ class User(UserMixin):
 def load_user(user_id):
     return User.get_by_id(user_id)
 
+def etag_persona(persona, *extra):
+    """ETag de una vista de la persona: cambia con cada escritura (datos.version)"""
+    return "-".join([f"p{persona['id']}", f"v{persona['version']}", *extra])
+
+def fecha_modificacion(persona):
+    """
+    datos.actualizado_en (UTC) como datetime para Last-Modified.
+    Tiene resolución de segundos: mientras ese segundo no termina puede llegar
+    otra escritura con la misma fecha, así que hasta entonces devuelve None y el
+    cliente revalida solo con el ETag (que lleva datos.version).
+    """
+    if not persona['actualizado_en']:
+        return None
+    fecha = datetime.strptime(persona['actualizado_en'], '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+    if fecha >= datetime.now(timezone.utc).replace(microsecond=0):
+        return None
+    return fecha
+
+def no_modificado(etag, ultima_modificacion):
+    """
+    Indica si el cliente ya tiene esta versión. Si manda If-None-Match decide
+    solo el ETag (la versión); If-Modified-Since se usa únicamente sin él.
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and ultima_modificacion:
+        return ultima_modificacion <= request.if_modified_since
+    return False
+
+def poner_ultima_modificacion(resp, ultima_modificacion):
+    """Last-Modified solo si hay fecha (resp.last_modified = None pondría la hora actual)"""
+    if ultima_modificacion is not None:
+        resp.last_modified = ultima_modificacion
+
+def respuesta_no_modificada(etag, ultima_modificacion):
+    """Respuesta 304 sin cuerpo"""
+    resp = make_response("", 304)
+    resp.set_etag(etag)
+    poner_ultima_modificacion(resp, ultima_modificacion)
+    resp.headers["Cache-Control"] = "private, no-cache"
+    return resp
+
+def enviar_pdf(ruta, nombre_pdf, etag=True, ultima_modificacion=None):
+    """
+    Sirve un PDF del almacén directamente desde disco.
+    send_file con una ruta usa sendfile del servidor WSGI, y con conditional=True
+    responde Content-Length, ETag, If-None-Match y Range (descargas reanudadas).
+    Last-Modified va solo si quien llama lo da (ver fecha_modificacion): el mtime
+    del archivo tiene resolución de segundos y no distingue dos versiones
+    generadas en el mismo segundo.
+    """
+    resp = send_file(
+        ruta,
+        as_attachment=True,
+        download_name=nombre_pdf,
+        mimetype="application/pdf",
+        conditional=False,
+        etag=etag,
+        last_modified=ultima_modificacion,
+        max_age=0
+    )
+    if ultima_modificacion is None:
+        del resp.headers["Last-Modified"]
+    resp = resp.make_conditional(request.environ, accept_ranges=True, complete_length=resp.content_length)
+    resp.headers["Cache-Control"] = "private, no-cache"
+    return resp
+
+def con_turno_render(generar):
+    """generar() envuelto para que solo corra con un lugar del limitador de renders"""
+    def generar_con_turno():
+        with limitador_render.turno():
+            return generar()
+    return generar_con_turno
+
+@app.errorhandler(Saturado)
+def render_saturado(e):
+    """503 + Retry-After cuando no hay lugar para generar el PDF"""
+    app.logger.warning("Render rechazado en %s: %s", request.path, limitador_render.estadisticas())
+    resp = make_response(
+        "Estamos generando muchos documentos en este momento. "
+        f"Intenta nuevamente en {e.reintentar} segundos.", 503
+    )
+    resp.headers["Retry-After"] = str(e.reintentar)
+    resp.headers["Cache-Control"] = "no-store"
+    return resp
+
+@app.url_defaults
+def huella_estaticos(endpoint, values):
+    """url_for('static', ...) agrega ?v=<huella del contenido>: la URL cambia con el archivo"""
+    if endpoint != 'static' or 'v' in values or 'filename' not in values:
+        return
+    ruta = safe_join(app.static_folder, values['filename'])
+    huella = huella_archivo(ruta) if ruta else None
+    if huella:
+        values['v'] = huella
+        if 'estaticos_usados' in g:
+            g.estaticos_usados[ruta] = huella
+
+@app.after_request
+def cache_estaticos(resp):
+    """Un estático pedido con su huella vigente no cambia nunca: cache de un año"""
+    if request.endpoint == 'static' and resp.status_code in (200, 304) and request.args.get('v'):
+        ruta = safe_join(app.static_folder, request.view_args.get('filename', ''))
+        if ruta and request.args['v'] == huella_archivo(ruta):
+            resp.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    return resp
+
+def pagina_precompilada(nombre):
+    """
+    Versión precompilada de una página pública, comprimida según Accept-Encoding.
+    None si no está construida o si hay mensajes flash pendientes (se renderiza).
+    """
+    if session.get('_flashes'):
+        return None
+    pagina = paginas_precompiladas.obtener(nombre, request.accept_encodings)
+    if pagina is None:
+        return None
+
+    cuerpo, codificacion, etag = pagina
+    resp = make_response(cuerpo)
+    resp.content_type = "text/html; charset=utf-8"
+    if codificacion != 'identity':
+        resp.headers["Content-Encoding"] = codificacion
+    resp.vary.add("Accept-Encoding")
+    resp.set_etag(f"{etag}-{codificacion}")
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp.make_conditional(request)
+
 @app.route("/")
 def index():
+    resp = pagina_precompilada("index.html")
+    if resp is not None:
+        return resp
     return render_template("index.html")
 
 @app.route('/login', methods=['GET', 'POST'])
@@ -285,6 +892,11 @@ def login():
             return redirect(url_for('usuarios'))
         else:
             flash('Credenciales inválidas','danger')
+            return render_template('login.html')
+
+    resp = pagina_precompilada("login.html")
+    if resp is not None:
+        return resp
     return render_template('login.html')
 
 @app.route('/logout')
@@ -297,8 +909,14 @@ def logout():
 @app.route('/usuarios')
 @login_required
 def usuarios():
+    # Los rangos de id de los shards son consecutivos: concatenar en orden de shard ordena por id
+    datos = []
+    for abrir in fuentes_candidatos(archivo=False):
+        conn = abrir()
+        if conn is not None:
+            datos.extend(conn.execute('SELECT * FROM datos ORDER BY id ASC').fetchall())
+            conn.close()
     with get_db_connection() as conn:
-        datos = conn.execute('SELECT * FROM datos ORDER BY id ASC').fetchall()
         usuarios = conn.execute('SELECT id, username FROM users ORDER BY id').fetchall()
     return render_template("usuarios.html", datos=datos, usuarios=usuarios)
 
@@ -381,44 +999,67 @@ def eliminar_usuario(id):
 @app.route('/detalles/<int:id>')
 @login_required
 def detalles(id):
-    conn = get_db_connection()
-    persona = conn.execute("SELECT * FROM datos WHERE id = ?", (id,)).fetchone()
+    conn, persona = buscar_persona("id", id)
     
     if persona is None:
-        conn.close()
         flash("Persona no encontrada", "error")
         return redirect(url_for('usuarios'))
+
+    etag = etag_persona(persona)
+    ultima_modificacion = fecha_modificacion(persona)
+    if no_modificado(etag, ultima_modificacion):
+        conn.close()
+        return respuesta_no_modificada(etag, ultima_modificacion)
     
-    # Obtener TODOS los datos
+    # Secciones de solo lectura: se renderizan una vez por versión de la persona
+    fragmento_datos = cache_detalles.obtener(id, persona['version'])
+    if fragmento_datos is None:
+        fragmento_datos = Markup(render_template("_detalles_datos.html", persona=persona))
+        cache_detalles.guardar(id, persona['version'], fragmento_datos)
+
+    # Parte interactiva (selección de experiencia y resumen): en cada request
     experiencia = conn.execute("SELECT * FROM experiencia WHERE persona_id = ? ORDER BY desde DESC", (id,)).fetchall()
-    formacion = conn.execute("SELECT * FROM formacion_academica WHERE persona_id = ?", (id,)).fetchall()
-    cursos = conn.execute("SELECT * FROM cursos WHERE persona_id = ?", (id,)).fetchall()
-    paquetes = conn.execute("SELECT * FROM paquetes_informaticos WHERE persona_id = ?", (id,)).fetchall()
-    idiomas = conn.execute("SELECT * FROM idiomas WHERE persona_id = ?", (id,)).fetchall()
-    docencia = conn.execute("SELECT * FROM docencia WHERE persona_id = ?", (id,)).fetchall()
-    referencias = conn.execute("SELECT * FROM referencias WHERE persona_id = ?", (id,)).fetchall()
-    registro = conn.execute("SELECT * FROM registro_profesional WHERE persona_id = ?", (id,)).fetchone()
-    pretension = conn.execute("SELECT * FROM pretension_salarial WHERE persona_id = ?", (id,)).fetchone()
-    incompatibilidades = conn.execute("SELECT * FROM incompatibilidades WHERE persona_id = ?", (id,)).fetchone()
-    declaracion = conn.execute("SELECT * FROM declaracion_jurada WHERE persona_id = ?", (id,)).fetchone()
-    resumen = conn.execute("SELECT * FROM resumen_experiencia WHERE persona_id = ? ORDER BY id DESC LIMIT 1", (id,)).fetchone()
+    resumen = conn.execute("SELECT * FROM resumen_experiencia WHERE persona_id = ?", (id,)).fetchone()
     
     conn.close()
     
-    return render_template("detalles.html", 
+    resp = make_response(render_template("detalles.html", 
                         persona=persona,
+                        fragmento_datos=fragmento_datos,
                         experiencia=experiencia,
-                        formacion=formacion,
-                        cursos=cursos,
-                        paquetes=paquetes,
-                        idiomas=idiomas,
-                        docencia=docencia,
-                        referencias=referencias,
-                        registro=registro,
-                        pretension=pretension,
-                        incompatibilidades=incompatibilidades,
-                        declaracion=declaracion,
-                        resumen=resumen)
+                        resumen=resumen))
+    resp.set_etag(etag)
+    poner_ultima_modificacion(resp, ultima_modificacion)
+    resp.headers["Cache-Control"] = "private, no-cache"
+    return resp
+
+def guardar_historial_resumen(cursor, persona_id, anios, meses, fecha):
+    """Agrega el cálculo al historial y lo compacta a RESUMEN_HISTORIAL_MAX filas"""
+    ultimo = cursor.execute("""
+        SELECT id, total_anios, total_meses FROM resumen_experiencia_historial
+        WHERE persona_id = ? ORDER BY id DESC LIMIT 1
+    """, (persona_id,)).fetchone()
+
+    # Recalcular sin cambios solo actualiza la fecha del último registro
+    if ultimo and ultimo['total_anios'] == anios and ultimo['total_meses'] == meses:
+        cursor.execute(
+            "UPDATE resumen_experiencia_historial SET fecha_calculo = ? WHERE id = ?",
+            (fecha, ultimo['id'])
+        )
+        return
+
+    cursor.execute("""
+        INSERT INTO resumen_experiencia_historial (persona_id, total_anios, total_meses, fecha_calculo)
+        VALUES (?, ?, ?, ?)
+    """, (persona_id, anios, meses, fecha))
+
+    cursor.execute("""
+        DELETE FROM resumen_experiencia_historial
+        WHERE persona_id = ? AND id <= (
+            SELECT id FROM resumen_experiencia_historial
+            WHERE persona_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?
+        )
+    """, (persona_id, persona_id, RESUMEN_HISTORIAL_MAX))
 
 @app.route('/guardar_resumen/<int:id>', methods=['POST'])
 @login_required
@@ -426,19 +1067,31 @@ def guardar_resumen(id):
     try:
         anios = request.json.get('anios', 0)
         meses = request.json.get('meses', 0)
-        
-        from datetime import datetime
+
         fecha_actual = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
-        conn = get_db_connection()
+        conn = conexion_shard(shard_de_id(id))
+        if conn is None:
+            return {'success': False, 'message': 'Persona no encontrada'}, 404
         cursor = conn.cursor()
         
-        # Insertar nuevo resumen
+        # Una sola fila por persona: se actualiza el último cálculo. Si no cambió
+        # no se escribe, así no se disparan los triggers de versión, cambios y
+        # filtros (ni se invalidan los PDF y el ETag de la persona)
         cursor.execute("""
             INSERT INTO resumen_experiencia (persona_id, total_anios, total_meses, fecha_calculo)
             VALUES (?, ?, ?, ?)
+            ON CONFLICT(persona_id) DO UPDATE SET
+                total_anios = excluded.total_anios,
+                total_meses = excluded.total_meses,
+                fecha_calculo = excluded.fecha_calculo
+            WHERE excluded.total_anios IS NOT resumen_experiencia.total_anios
+               OR excluded.total_meses IS NOT resumen_experiencia.total_meses
         """, (id, anios, meses, fecha_actual))
-        
+
+        if RESUMEN_HISTORIAL_MAX > 0:
+            guardar_historial_resumen(cursor, id, anios, meses, fecha_actual)
+
         conn.commit()
         conn.close()
         
@@ -449,54 +1102,251 @@ def guardar_resumen(id):
 @app.route('/imprimir_detalles/<int:id>')
 @login_required
 def imprimir_detalles(id):
-    conn = get_db_connection()
-    
-    persona_row = conn.execute("SELECT * FROM datos WHERE id = ?", (id,)).fetchone()
+    conn, persona_row = buscar_persona("id", id)
     persona = dict(persona_row) if persona_row else None
 
     if not persona:
-        conn.close()
         flash("Persona no encontrada", "error")
         return redirect(url_for('usuarios'))
-    
-    experiencia_rows = conn.execute(
-        "SELECT * FROM experiencia WHERE persona_id = ? ORDER BY desde DESC", 
-        (id,)
-    ).fetchall()
-    experiencia = [dict(row) for row in experiencia_rows]
-    
-    resumen_row = conn.execute(
-        "SELECT * FROM resumen_experiencia WHERE persona_id = ? ORDER BY id DESC LIMIT 1", 
-        (id,)
-    ).fetchone()
-    resumen = dict(resumen_row) if resumen_row else None
-    
+
     conn.close()
     
-    id_marcados = request.args.get("ids_marcados", "[]")
-    
-    pdf_file = genera_pdf_detalles(persona, experiencia, resumen, ids_marcados=id_marcados)
+    from templates.pdf_filas import normalizar_ids_marcados
+    ids_marcados = normalizar_ids_marcados(request.args.get("ids_marcados", "[]"))
+    clave = hashlib.sha1(json.dumps(sorted(ids_marcados)).encode()).hexdigest()[:12]
+
+    etag = etag_persona(persona, clave)
+    ultima_modificacion = fecha_modificacion(persona)
+    if no_modificado(etag, ultima_modificacion):
+        return respuesta_no_modificada(etag, ultima_modificacion)
+
+    def generar():
+        conn, _ = buscar_persona("id", id, "id")
+        try:
+            # La experiencia se lee a medida que se dibuja
+            experiencia = filas_dict(conn, "SELECT * FROM experiencia WHERE persona_id = ? ORDER BY desde DESC", (id,))
+            resumen = una_fila_dict(conn, "SELECT * FROM resumen_experiencia WHERE persona_id = ?", (id,))
+
+            from templates.pdf_generator_detalles import genera_pdf_detalles
+
+            return genera_pdf_detalles(persona, experiencia, resumen, ids_marcados=ids_marcados,
+                                       compacto=app.config["PDF_COMPACTO"])
+        finally:
+            conn.close()
+
+    ruta = obtener_pdf(f"DETALLES_HV_{id}_v{persona['version']}_{clave}.pdf", con_turno_render(generar))
     nombre_pdf = f"DETALLES_HV_{id}.pdf"
     
-    return send_file(
-        pdf_file,
-        as_attachment=True,
-        download_name=nombre_pdf,
-        mimetype="application/pdf"
-    )
+    return enviar_pdf(ruta, nombre_pdf, etag, ultima_modificacion)
+
+def leer_lote_detalles(ids):
+    """
+    Datos, experiencia y resumen de varias personas con una consulta IN por tabla,
+    primero en su shard y las que falten en el archivo.
+    Devuelve {id: (persona, experiencia, resumen)}.
+    """
+    lote = {}
+    for abrir in fuentes_candidatos(ids):
+        faltan = [i for i in dict.fromkeys(ids) if i not in lote]
+        if not faltan:
+            break
+        conn = abrir()
+        if conn is None:
+            continue
+        try:
+            marcas = ", ".join("?" * len(faltan))
+            personas = {
+                row['id']: dict(row)
+                for row in conn.execute(f"SELECT * FROM datos WHERE id IN ({marcas})", faltan)
+            }
+            encontrados = list(personas)
+            marcas = ", ".join("?" * len(encontrados))
+
+            experiencia = {i: [] for i in encontrados}
+            for row in conn.execute(
+                f"SELECT * FROM experiencia WHERE persona_id IN ({marcas}) ORDER BY persona_id, desde DESC",
+                encontrados
+            ):
+                experiencia[row['persona_id']].append(dict(row))
+
+            resumenes = {
+                row['persona_id']: dict(row)
+                for row in conn.execute(
+                    f"SELECT * FROM resumen_experiencia WHERE persona_id IN ({marcas})", encontrados
+                )
+            }
+        finally:
+            conn.close()
+
+        for i, persona in personas.items():
+            lote[i] = (persona, experiencia[i], resumenes.get(i))
+    return lote
+
+def candidatos_comision(seleccion, tam_lote=LOTE_COMISION):
+    """
+    Recorre la selección [(id, ids_marcados), ...] en orden, por lotes: mientras
+    se dibuja un lote, el siguiente se lee de la base en otro hilo. Solo hay
+    un par de lotes en memoria a la vez.
+    """
+    lotes = [seleccion[i:i + tam_lote] for i in range(0, len(seleccion), tam_lote)]
+    if not lotes:
+        return
+
+    with ThreadPoolExecutor(max_workers=1) as lector:
+        siguiente = lector.submit(leer_lote_detalles, [i for i, _ in lotes[0]])
+        for n, lote in enumerate(lotes):
+            datos = siguiente.result()
+            if n + 1 < len(lotes):
+                siguiente = lector.submit(leer_lote_detalles, [i for i, _ in lotes[n + 1]])
+
+            for persona_id, ids_marcados in lote:
+                if persona_id in datos:
+                    persona, experiencia, resumen = datos[persona_id]
+                    yield persona, experiencia, resumen, ids_marcados
+
+def versiones_personas(ids):
+    """{id: version} de las personas indicadas (sus shards y el archivo)"""
+    versiones = {}
+    for abrir in fuentes_candidatos(ids):
+        faltan = [i for i in dict.fromkeys(ids) if i not in versiones]
+        if not faltan:
+            break
+        conn = abrir()
+        if conn is None:
+            continue
+        try:
+            for inicio in range(0, len(faltan), 500):
+                parte = faltan[inicio:inicio + 500]
+                versiones.update(conn.execute(
+                    f"SELECT id, version FROM datos WHERE id IN ({', '.join('?' * len(parte))})", parte
+                ).fetchall())
+        finally:
+            conn.close()
+    return versiones
+
+@app.route("/imprimir_comision", methods=["POST"])
+@login_required
+def imprimir_comision():
+    """
+    Un solo PDF con los detalles de varias personas (en el orden recibido), con un
+    marcador por persona. Recibe JSON:
+    {"candidatos": [{"id": 1, "ids_marcados": [4, 7]}, {"id": 2}, ...]}
+    """
+    from templates.pdf_filas import normalizar_ids_marcados
+
+    datos = request.get_json(silent=True) or {}
+    seleccion = []
+    try:
+        for item in datos.get('candidatos') or []:
+            seleccion.append((int(item['id']), normalizar_ids_marcados(item.get('ids_marcados'))))
+    except (KeyError, TypeError, ValueError):
+        return {'success': False, 'message': 'Cada candidato debe tener un id numérico'}, 400
+
+    if not seleccion:
+        return {'success': False, 'message': 'Selecciona al menos un candidato'}, 400
+
+    versiones = versiones_personas([i for i, _ in seleccion])
+    faltan = [i for i, _ in seleccion if i not in versiones]
+    if faltan:
+        return {'success': False, 'message': 'Personas no encontradas', 'ids': faltan}, 404
+
+    # El documento cambia si cambia la selección o la versión de alguna persona
+    clave = hashlib.sha1(json.dumps(
+        [(i, versiones[i], sorted(marcados)) for i, marcados in seleccion]
+    ).encode()).hexdigest()[:16]
+    nombre = f"COMISION_HV_{clave}.pdf"
+
+    def generar():
+        from templates.pdf_generator_detalles import genera_pdf_comision
+
+        return genera_pdf_comision(candidatos_comision(seleccion), compacto=app.config["PDF_COMPACTO"])
+
+    ruta = obtener_pdf(nombre, con_turno_render(generar))
+    return enviar_pdf(ruta, f"COMISION_HV_{len(seleccion)}.pdf")
+
+def conexiones_ranking():
+    """
+    Lectura pesada: la base principal desde el snapshot del último respaldo si es
+    reciente (ver SNAPSHOT_EDAD_MAXIMA), y los shards de las convocatorias
+    """
+    conexiones = [conexion_lectura()]
+    conexiones += [conn for conn in (conexion_shard(n) for n in shards_activos()[1:]) if conn is not None]
+    return conexiones
+
+def nombre_ranking(conexiones, orden):
+    """(nombre del PDF en el almacén, cantidad de postulantes) del estado actual de los datos"""
+    versiones = [version_ranking(conn) for conn in conexiones]
+    total = sum(v[0] for v in versiones)
+    suma_versiones = sum(v[1] for v in versiones)
+    ultimo_id = max(v[2] for v in versiones)
+    return f"REPORTE_RANKING_{orden}_{total}_{suma_versiones}_{ultimo_id}.pdf", total
+
+def generar_ranking(conexiones, orden):
+    def generar():
+        from templates.pdf_reporte import genera_pdf_reporte
+
+        return genera_pdf_reporte(filas_ranking_shards(conexiones, orden), compacto=app.config["PDF_COMPACTO"])
+    return generar
+
+@app.route("/reporte_ranking")
+@login_required
+def reporte_ranking():
+    """
+    Reporte PDF de todos los postulantes, ordenado por experiencia (o ?orden=grado|nombre).
+    Con más de REPORTE_MAX_FILAS postulantes no se genera aquí: se sirve el que
+    dejó en el almacén "flask reporte-ranking" para el estado actual de los datos.
+    """
+    orden = request.args.get("orden", "experiencia")
+    if orden not in ORDENES_RANKING:
+        flash("Orden de reporte no válido", "error")
+        return redirect(url_for('usuarios'))
+
+    conexiones = conexiones_ranking()
+    try:
+        nombre, total = nombre_ranking(conexiones, orden)
+        ruta = pdf_almacenado(nombre)
+        if ruta is None:
+            maximo = app.config["REPORTE_MAX_FILAS"]
+            if maximo and total > maximo:
+                flash(f"El reporte tiene {total} postulantes y en línea se generan hasta {maximo}. "
+                      f"Debe generarse con \"flask reporte-ranking --orden {orden}\" "
+                      "(hay que repetirlo si los datos cambian).", "error")
+                return redirect(url_for('usuarios'))
+            ruta = obtener_pdf(nombre, con_turno_render(generar_ranking(conexiones, orden)))
+    finally:
+        for conn in conexiones:
+            conn.close()
+
+    return enviar_pdf(ruta, "RANKING_POSTULANTES.pdf")
 
 @app.route("/eliminar/<int:id>", methods=['POST'])
 @login_required
 def eliminar(id):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("DELETE FROM experiencia WHERE persona_id = ?", (id, ))
-        cursor.execute("DELETE FROM datos WHERE id = ?", (id, ))
+        # En su shard o, si ya se archivó, en la base de archivo
+        conn, persona = buscar_persona("id", id, "id", escritura=True)
+        if persona is None:
+            flash("Persona no encontrada", "error")
+            return redirect(url_for('usuarios'))
+        try:
+            cursor = conn.cursor()
+            # Primero todas las tablas hijas, al final datos
+            for tabla in TABLAS_ARCHIVO:
+                cursor.execute(f"DELETE FROM {tabla} WHERE persona_id = ?", (id, ))
+            cursor.execute("DELETE FROM datos WHERE id = ?", (id, ))
+            borradas = cursor.rowcount
+            conn.commit()
+        finally:
+            conn.close()
+        if borradas == 0:
+            flash("Persona no encontrada", "error")
+            return redirect(url_for('usuarios'))
 
-        conn.commit()
-        conn.close()
+        # Los PDF de la persona se borran ya; los de comisión o ranking que la
+        # incluían no se vuelven a pedir con ese nombre y los poda el almacén
+        invalidar_pdfs(f"DETALLES_HV_{id}_")
+        invalidar_pdfs(f"FORMULARIO_HV_{id}_")
+        cache_detalles.invalidar(id)
 
         flash("Registro eliminado!!!", 'success')
         return redirect(url_for("usuarios"))
@@ -505,369 +1355,488 @@ def eliminar(id):
         flash(f"Error al eliminar: {str(e)}", 'error')
         return redirect(url_for('usuarios'))
 
-def obtener_datos_completos(persona_id):
-    """Obtiene todos los datos de una persona y los convierte a diccionarios"""
-    conn = get_db_connection()
-    
+@app.route("/editar/<int:id>", methods=["POST"])
+@login_required
+def editar(id):
+    """
+    Corrige un formulario enviado. JSON con las columnas de datos y las secciones
+    a cambiar (formato de la importación; ver validar_edicion) y opcionalmente
+    "version": si la persona cambió desde entonces se responde 409.
+    Solo se escriben las filas que cambian, en una transacción.
+    """
+    cambios = request.get_json(silent=True)
+    if not isinstance(cambios, dict):
+        return {'success': False, 'message': 'Se esperaba un objeto JSON'}, 400
+    version = cambios.pop('version', None)
+
+    def escribir(conn):
+        actual = conn.execute("SELECT version FROM datos WHERE id = ?", (id,)).fetchone()
+        if actual is None:
+            return 404, 'Persona no encontrada'
+        if version is not None and version != actual['version']:
+            return 409, 'El formulario fue modificado por otra persona; vuelve a cargarlo'
+
+        guardado = leer_candidato(conn, id)
+        edicion = validar_edicion(guardado, cambios)
+        if app.config["BLOQUEAR_CI_DUPLICADO"] and {'ci', 'exp'} & set(edicion['datos']) and any(
+            d['motivo'] == 'ci' for d in buscar_duplicados(conn, {**guardado, **edicion['datos']}, excluir_id=id)
+        ):
+            return 409, 'Ya existe un formulario registrado con ese CI'
+
+        resumen = aplicar_edicion(conn.cursor(), id, guardado, edicion)
+        persona = conn.execute("SELECT version, actualizado_en FROM datos WHERE id = ?", (id,)).fetchone()
+        return 200, {'success': True, 'version': persona['version'],
+                     'actualizado_en': persona['actualizado_en'], 'cambios': resumen}
+
+    # Los archivados no se editan: solo se busca en el shard de la persona
+    if not os.path.exists(ruta_shard(app.config["DATABASE"], shard_de_id(id))):
+        return {'success': False, 'message': 'Persona no encontrada'}, 404
+    try:
+        (estado, cuerpo), _ = transaccion_escritura(
+            partial(conexion_shard, shard_de_id(id)), escribir,
+            busy_timeout_ms=app.config["ESPERA_LOCK_MS"],
+            reintentos=app.config["REINTENTOS_ESCRITURA"],
+            metricas=metricas_escritura,
+        )
+    except (ValueError, TypeError) as e:
+        return {'success': False, 'message': str(e)}, 400
+    except sqlite3.IntegrityError:
+        return {'success': False, 'message': 'El correo ya existe'}, 409
+    except EscrituraOcupada:
+        return {'success': False, 'message': 'Base ocupada, intenta nuevamente'}, 503
+
+    if estado != 200:
+        return {'success': False, 'message': cuerpo}, estado
+    return cuerpo
+
+def filas_dict(conn, sql, params=()):
+    """Filas de una consulta como diccionarios, de a una (sin fetchall)"""
+    for row in conn.execute(sql, params):
+        yield dict(row)
+
+def una_fila_dict(conn, sql, params=()):
+    row = conn.execute(sql, params).fetchone()
+    return dict(row) if row else None
+
+def leer_datos_completos(conn, persona_row, persona_id):
+    """
+    Todos los datos de una persona. Las secciones de varias filas son
+    generadores sobre `conn`: la consulta corre recién al recorrerlas, así que
+    la conexión debe seguir abierta hasta terminar de usarlas.
+    """
     # Datos personales
-    persona_row = conn.execute("SELECT * FROM datos WHERE id = ?", (persona_id,)).fetchone()
-    persona = dict(persona_row) if persona_row else None
-    
+    persona = dict(persona_row)
+
     # Experiencia
-    experiencia_rows = conn.execute(
-        "SELECT * FROM experiencia WHERE persona_id = ? ORDER BY id DESC", 
-        (persona_id,)
-    ).fetchall()
-    experiencia = [dict(row) for row in experiencia_rows]
-    
+    experiencia = filas_dict(conn, "SELECT * FROM experiencia WHERE persona_id = ? ORDER BY id DESC", (persona_id,))
+
     # Formación académica
-    formacion_rows = conn.execute(
-        "SELECT * FROM formacion_academica WHERE persona_id = ?", 
-        (persona_id,)
-    ).fetchall()
-    formacion = [dict(row) for row in formacion_rows]
-    
+    formacion = filas_dict(conn, "SELECT * FROM formacion_academica WHERE persona_id = ?", (persona_id,))
+
     # Cursos
-    cursos_rows = conn.execute(
-        "SELECT * FROM cursos WHERE persona_id = ?", 
-        (persona_id,)
-    ).fetchall()
-    cursos = [dict(row) for row in cursos_rows]
-    
+    cursos = filas_dict(conn, "SELECT * FROM cursos WHERE persona_id = ?", (persona_id,))
+
     # Paquetes informáticos
-    paquetes_rows = conn.execute(
-        "SELECT * FROM paquetes_informaticos WHERE persona_id = ?", 
-        (persona_id,)
-    ).fetchall()
-    paquetes = [dict(row) for row in paquetes_rows]
-    
+    paquetes = filas_dict(conn, "SELECT * FROM paquetes_informaticos WHERE persona_id = ?", (persona_id,))
+
     # Idiomas
-    idiomas_rows = conn.execute(
-        "SELECT * FROM idiomas WHERE persona_id = ?", 
-        (persona_id,)
-    ).fetchall()
-    idiomas = [dict(row) for row in idiomas_rows]
-    
+    idiomas = filas_dict(conn, "SELECT * FROM idiomas WHERE persona_id = ?", (persona_id,))
+
     # Docencia
-    docencia_rows = conn.execute(
-        "SELECT * FROM docencia WHERE persona_id = ?", 
-        (persona_id,)
-    ).fetchall()
-    docencia = [dict(row) for row in docencia_rows]
-    
+    docencia = filas_dict(conn, "SELECT * FROM docencia WHERE persona_id = ?", (persona_id,))
+
     # Referencias
-    referencias_rows = conn.execute(
-        "SELECT * FROM referencias WHERE persona_id = ?", 
-        (persona_id,)
-    ).fetchall()
-    referencias = [dict(row) for row in referencias_rows]
-    
+    referencias = filas_dict(conn, "SELECT * FROM referencias WHERE persona_id = ?", (persona_id,))
+
     # Registro profesional
-    registro_row = conn.execute(
-        "SELECT * FROM registro_profesional WHERE persona_id = ?", 
-        (persona_id,)
-    ).fetchone()
-    registro = dict(registro_row) if registro_row else None
-    
+    registro = una_fila_dict(conn, "SELECT * FROM registro_profesional WHERE persona_id = ?", (persona_id,))
+
     # Pretensión salarial
-    pretension_row = conn.execute(
-        "SELECT * FROM pretension_salarial WHERE persona_id = ?", 
-        (persona_id,)
-    ).fetchone()
-    pretension = dict(pretension_row) if pretension_row else None
-    
+    pretension = una_fila_dict(conn, "SELECT * FROM pretension_salarial WHERE persona_id = ?", (persona_id,))
+
     # Incompatibilidades
-    incompatibilidades_row = conn.execute(
-        "SELECT * FROM incompatibilidades WHERE persona_id = ?", 
-        (persona_id,)
-    ).fetchone()
-    incompatibilidades = dict(incompatibilidades_row) if incompatibilidades_row else None
-    
+    incompatibilidades = una_fila_dict(conn, "SELECT * FROM incompatibilidades WHERE persona_id = ?", (persona_id,))
+
     # Declaración jurada
-    declaracion_row = conn.execute(
-        "SELECT * FROM declaracion_jurada WHERE persona_id = ?", 
-        (persona_id,)
-    ).fetchone()
-    declaracion = dict(declaracion_row) if declaracion_row else None
-    
-    conn.close()
-    
+    declaracion = una_fila_dict(conn, "SELECT * FROM declaracion_jurada WHERE persona_id = ?", (persona_id,))
+
     return persona, experiencia, formacion, cursos, paquetes, idiomas, docencia, referencias, registro, pretension, incompatibilidades, declaracion
 
+def obtener_convocatoria(conn, nombre):
+    """id de la convocatoria (se crea abierta si no existe)"""
+    conn.execute("INSERT OR IGNORE INTO convocatorias (nombre) VALUES (?)", (nombre,))
+    return conn.execute("SELECT id FROM convocatorias WHERE nombre = ?", (nombre,)).fetchone()['id']
+
+class ConvocatoriaCerrada(Exception):
+    """La convocatoria ya no recibe postulantes"""
+
+# (convocatoria, SHARDS) -> (shard, convocatoria_id, momento en que se leyó)
+_destinos = {}
+# Cada cuántos segundos se vuelve a leer el destino: una convocatoria cerrada
+# con "flask cerrar-convocatoria" (otro proceso) deja de recibir en ese plazo
+DESTINO_VIGENCIA = 5
+
+def destino_formularios(nombre=None):
+    """
+    (shard, convocatoria_id) donde se guardan los formularios nuevos y las
+    importaciones (nombre: convocatoria; por defecto CONVOCATORIA).
+    Con SHARDS activo, la convocatoria recibe su shard la primera vez; una
+    convocatoria que ya tiene shard lo conserva aunque luego se desactive.
+    Lanza ConvocatoriaCerrada si la convocatoria está cerrada.
+    """
+    nombre = nombre or app.config["CONVOCATORIA"]
+    if not nombre:
+        return 0, None
+
+    clave = (nombre, app.config["SHARDS"])
+    destino = _destinos.get(clave)
+    if destino is None or time.monotonic() - destino[2] > DESTINO_VIGENCIA:
+        def asignar(conn):
+            convocatoria_id = obtener_convocatoria(conn, nombre)
+            estado = conn.execute("SELECT estado FROM convocatorias WHERE id = ?", (convocatoria_id,)).fetchone()[0]
+            if estado == 'cerrada':
+                return None
+            if app.config["SHARDS"]:
+                conn.execute(
+                    """
+                    UPDATE convocatorias SET shard = (SELECT COALESCE(MAX(shard), 0) + 1 FROM convocatorias)
+                    WHERE id = ? AND shard IS NULL
+                    """,
+                    (convocatoria_id,)
+                )
+            numero = conn.execute("SELECT shard FROM convocatorias WHERE id = ?", (convocatoria_id,)).fetchone()[0]
+            return numero or 0, convocatoria_id
+
+        destino, _ = transaccion_escritura(
+            get_db_connection, asignar,
+            busy_timeout_ms=app.config["ESPERA_LOCK_MS"],
+            reintentos=app.config["REINTENTOS_ESCRITURA"],
+        )
+        if destino is None:
+            _destinos.pop(clave, None)
+            raise ConvocatoriaCerrada(nombre)
+        destino = _destinos[clave] = (*destino, time.monotonic())
+    return destino[:2]
+
+def generar_pdf_formulario(persona_id, compacto=None):
+    """Genera el PDF del formulario completo a partir de la base de datos"""
+    from templates.pdf_generator import genera_pdf_formulario
+
+    if compacto is None:
+        compacto = app.config["PDF_COMPACTO"]
+    conn, persona_row = buscar_persona("id", persona_id)
+    try:
+        # Las secciones se leen de la base a medida que se dibujan: la memoria
+        # no crece con la cantidad de cursos, docencia o experiencia
+        persona, experiencia, formacion, cursos, paquetes, idiomas, docencia, referencias, registro, pretension, incompatibilidades, declaracion = leer_datos_completos(conn, persona_row, persona_id)
+        return genera_pdf_formulario(persona, experiencia, formacion, cursos, paquetes, idiomas, docencia, referencias, registro, pretension, incompatibilidades, declaracion, compacto=compacto)
+    finally:
+        conn.close()
+
+def registrar_formulario(conn, candidato):
+    """
+    Fase de escritura de guardar_formulario (dentro de la transacción): chequeo
+    de CI repetido e INSERT. Devuelve la fila (id, version, actualizado_en)
+    de la persona nueva, o None si el CI ya estaba registrado.
+    """
+    if app.config["BLOQUEAR_CI_DUPLICADO"] and any(
+        d['motivo'] == 'ci' for d in buscar_duplicados(conn, candidato)
+    ):
+        return None
+
+    persona_id = insertar_candidato(conn.cursor(), candidato)
+    return conn.execute(
+        "SELECT id, version, actualizado_en FROM datos WHERE id = ?", (persona_id,)
+    ).fetchone()
+
+def escribir_formulario(candidato):
+    """
+    Fase de escritura: por el escritor grupal si está activo, si no en una
+    transacción propia. Devuelve (fila de la persona o None, segundos de espera).
+    """
+    numero, convocatoria_id = destino_formularios()
+    if convocatoria_id is not None:
+        candidato['convocatoria_id'] = convocatoria_id
+
+    escribir = lambda conn: registrar_formulario(conn, candidato)
+    escritor = escritor_de(numero)
+    if escritor is not None:
+        inicio = time.perf_counter()
+        persona = escritor.enviar(escribir).result()
+        return persona, time.perf_counter() - inicio
+
+    return transaccion_escritura(
+        partial(conexion_shard, numero, crear=True),
+        escribir,
+        busy_timeout_ms=app.config["ESPERA_LOCK_MS"],
+        reintentos=app.config["REINTENTOS_ESCRITURA"],
+        metricas=metricas_escritura,
+    )
+
 @app.route("/guardar_formulario", methods=["POST"])
 def guardar_formulario():
     try:
-        with get_db_connection() as conn:
-        
-            cursor = conn.cursor()
+        candidato = candidato_desde_formulario(request.form)
+
+        # 1) Escritura corta: solo el INSERT tiene el lock, la conexión se cierra al confirmar
+        persona, espera = escribir_formulario(candidato)
+        if persona is None:
+            flash('Ya existe un formulario registrado con ese CI. '
+                  'Puedes reimprimirlo con tu correo electrónico.', 'error')
+            return redirect(url_for('index'))
+        app.logger.info("Formulario %s guardado (espera por el lock: %.1f ms)", persona['id'], espera * 1000)
+
+    except EscrituraOcupada:
+        flash('Hay muchos formularios enviándose en este momento. Intenta nuevamente en unos segundos.', 'error')
+        return redirect(url_for('index'))
 
-            cursor.execute(
-                """
-                INSERT INTO datos (nombres, ap_pat, ap_mat, ci, exp, est_civil, fecha_nac, lugar, nacio, direccion, ciudad, gr_san, tcel, tfijo, correo, n_libser)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    request.form.get('nombres'),
-                    request.form.get('ap_pat'),
-                    request.form.get('ap_mat'),
-                    request.form.get('ci'),
-                    request.form.get('exp'),
-                    request.form.get('est_civil'),
-                    request.form.get('fecha_nac'),
-                    request.form.get('lugar'),
-                    request.form.get('nacio'),
-                    request.form.get('direccion'),
-                    request.form.get('ciudad'),
-                    request.form.get('gr_san'),
-                    request.form.get('tcel'),
-                    request.form.get('tfijo'),
-                    request.form.get('correo'),
-                    request.form.get('n_libser')
-                )
-            )
-            
-            persona_id = cursor.lastrowid
+    except ConvocatoriaCerrada:
+        flash('La convocatoria está cerrada: ya no se reciben formularios.', 'error')
+        return redirect(url_for('index'))
 
-            #formacion
-            detalles = request.form.getlist('detalle[]')
-            instituciones = request.form.getlist('institucion[]')
-            grados = request.form.getlist('grado[]')
-            anios = request.form.getlist('anio_form[]')
-            folios = request.form.getlist('n_folio[]')
+    except sqlite3.IntegrityError:
+        flash('El correo ya existe', 'error')
+        return redirect(url_for('index'))
 
-            for detalle, institucion, grado, anio, folio in zip_longest(detalles, instituciones, grados, anios, folios, fillvalue=""):
-                detalle = detalle.strip()
-                institucion = institucion.strip()
-                grado = grado.strip()
-                anio = anio.strip()
-                folio = folio.strip()
+    except Exception as e:
+        flash(f'Error al guardar: {str(e)}', 'error')
+        return redirect(url_for('index'))
 
-                if not detalle and not institucion and not grado and not anio and not folio:
-                    continue
+    # 2) Lectura y PDF, sin transacción abierta
+    persona_id = persona['id']
+    try:
+        ruta = obtener_pdf(f"FORMULARIO_HV_{persona_id}_v{persona['version']}.pdf",
+                           con_turno_render(lambda: generar_pdf_formulario(persona_id)))
+    except Saturado:
+        # El formulario ya está guardado: un 503 haría que el postulante lo reenvíe
+        flash('Formulario guardado exitosamente. Hay mucha demanda en este momento: '
+              'descarga tu PDF en unos segundos con la opción de reimprimir.', 'success')
+        return redirect(url_for('index'))
+    except Exception as e:
+        flash(f'El formulario se guardó, pero no se pudo generar el PDF ({e}). '
+              'Puedes reimprimirlo con tu correo electrónico.', 'error')
+        return redirect(url_for('index'))
 
-                cursor.execute(
-                    """
-                    INSERT INTO formacion_academica (persona_id, detalle, institucion, grado, anio_form, n_folio)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                    """,(persona_id, detalle, institucion, grado, 
-                        int(anio) if anio.isdigit() else None, 
-                        folio if folio else None)
-                )
+    flash('Formulario guardado exitosamente', 'success')
+    return enviar_pdf(ruta, f"FORMULARIO_HV_{persona_id}.pdf", etag_persona(persona), fecha_modificacion(persona))
 
-            # experiencia
-            nombres = request.form.getlist('nombre[]')
-            puestos = request.form.getlist('puesto[]')
-            breves = request.form.getlist('breve[]')
-            desdes = request.form.getlist('desde[]')
-            hastas = request.form.getlist('hasta[]')
-            motivos = request.form.getlist('motivo[]')
-
-            for nombre, puesto, breve, desde, hasta, motivo in zip_longest(nombres, puestos, breves, desdes, hastas, motivos, fillvalue=""):
-                # limpiamos
-                nombre = nombre.strip()
-                puesto = puesto.strip()
-                breve = breve.strip()
-                desde = desde.strip()
-                hasta = hasta.strip()
-                motivo = motivo.strip()
-
-                # si la fila está vacía, no insertamos
-                if not nombre and not puesto and not breve and not desde and not hasta and not motivo:
-                    continue
-
-                cursor.execute("""
-                    INSERT INTO experiencia (persona_id, nombre, puesto, breve, desde, hasta, motivo)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (persona_id, nombre, puesto, breve, desde if desde else None, hasta if hasta else None, motivo))
-
-            #cursos
-            anios_cursos = request.form.getlist('anio_curso[]')
-            capacitaciones = request.form.getlist('cap[]')
-            instituciones_curso = request.form.getlist('inst[]')
-            nombres_cap = request.form.getlist('n_cap[]')
-            horas = request.form.getlist('horas[]')
-
-            for anio, cap, inst, n_cap, horas in zip_longest(anios_cursos, capacitaciones, instituciones_curso, nombres_cap, horas, fillvalue=""):
-                anio = anio.strip()
-                cap = cap.strip()
-                inst = inst.strip()
-                n_cap = n_cap.strip()
-                horas = horas.strip()
-                
-                if not anio and not cap and not inst and not n_cap and not horas:
-                    continue
-                
-                cursor.execute(
-                    """
-                    INSERT INTO cursos (persona_id, anio_curso, area_capacitacion, institucion, nombre_capacitacion, duracion_horas)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                    """,(persona_id, 
-                        int(anio) if anio.isdigit() else None, cap, inst, n_cap, 
-                        int(horas) if horas.isdigit() else None))
-            
-            #paquetes
-            paquetes = request.form.getlist('paquete[]')
-            folios_paquete = request.form.getlist('folio_paquete[]')
-            
-            for i, (paquete, folio) in enumerate(zip_longest(paquetes, folios_paquete, fillvalue="")):
-                paquete = paquete.strip()
-                folio = folio.strip()
-                nivel = request.form.get(f'nivel_{i}')
+def formato_importacion(nombre_archivo, formato=None):
+    """jsonl o csv según lo indicado o la extensión del archivo"""
+    if formato:
+        return formato
+    return 'csv' if nombre_archivo.lower().endswith('.csv') else 'jsonl'
 
-                if not (paquete and folio and nivel):
-                    continue
+def importar_en_destino(texto, formato, tam_lote, convocatoria=None):
+    """
+    Importa en el mismo destino que los formularios (shard y convocatoria_id
+    de destino_formularios), cada lote con BEGIN IMMEDIATE, espera acotada y
+    reintentos. Lanza ConvocatoriaCerrada si la convocatoria está cerrada.
+    """
+    numero, convocatoria_id = destino_formularios(convocatoria)
+
+    def escribir_lote(escribir):
+        resultado, _ = transaccion_escritura(
+            partial(conexion_shard, numero, crear=True), escribir,
+            busy_timeout_ms=app.config["ESPERA_LOCK_MS"],
+            reintentos=app.config["REINTENTOS_ESCRITURA"],
+            metricas=metricas_escritura,
+        )
+        return resultado
 
-                cursor.execute(
-                    """
-                    INSERT INTO paquetes_informaticos (persona_id, paquete, nivel, folio)
-                    VALUES (?, ?, ?, ?)
-                    """,(persona_id, paquete, nivel, folio if folio else None))
+    return importar_candidatos(escribir_lote, leer_registros(texto, formato), tam_lote,
+                               app.config["BLOQUEAR_CI_DUPLICADO"], convocatoria_id)
 
-            #idiomas
-            idiomas = request.form.getlist('idioma[]')
-            folios_idioma = request.form.getlist('folio_idioma[]')
-            
-            for i, (idioma, folio_idioma) in enumerate(zip_longest(idiomas, folios_idioma, fillvalue="")):
-                idioma = idioma.strip()
-                folio_idioma = folio_idioma.strip()
-                
-                lectura = 1 if request.form.get(f'lectura_{i}') else 0
-                escritura = 1 if request.form.get(f'escritura_{i}') else 0
-                conversacion = 1 if request.form.get(f'conversacion_{i}') else 0
+@app.route("/importar", methods=["POST"])
+@login_required
+def importar():
+    """
+    Importación masiva de candidatos (JSONL o CSV), sin generar PDF. Van a la
+    convocatoria del campo "convocatoria" (o CONVOCATORIA) y a su shard.
+    """
+    archivo = request.files.get('archivo')
+    if not archivo or not archivo.filename:
+        return {'success': False, 'message': 'Selecciona un archivo JSONL o CSV'}, 400
 
-                if not (idioma or folio_idioma or lectura or escritura or conversacion):
-                    continue
+    formato = formato_importacion(archivo.filename, request.form.get('formato'))
+    tam_lote = request.form.get('lote', 1000, type=int)
+    texto = TextIOWrapper(archivo.stream, encoding='utf-8-sig', newline='')
 
-                cursor.execute(
-                        """
-                        INSERT INTO idiomas (persona_id, idioma, lectura, escritura, conversacion, folio)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                        """, (persona_id, idioma, lectura, escritura, conversacion, folio_idioma if folio_idioma else None))
-            
-            #docencia
-            anios_doc = request.form.getlist('anio_doc[]')
-            inst_doc = request.form.getlist('institucion_docencia[]')
-            nombres_curso = request.form.getlist('nombre_curso[]')
-            horas_doc = request.form.getlist('horas_docencia[]')
-            folios_doc = request.form.getlist('folio_docencia[]')
-
-            for anio, inst, curso, horas, folio in zip_longest(
-                anios_doc, inst_doc, nombres_curso, horas_doc, folios_doc, fillvalue=""
-            ):
-                anio = anio.strip()
-                inst = inst.strip()
-                curso = curso.strip()
-                horas = horas.strip()
-                folio = folio.strip()
-
-                if not (anio or inst or curso or horas or folio):
-                    continue
-
-                cursor.execute("""
-                    INSERT INTO docencia (persona_id, anio_doc, institucion, nombre_curso, duracion_horas, folio)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (
-                    persona_id,
-                    int(anio) if anio.isdigit() else None,
-                    inst,
-                    curso,
-                    int(horas) if horas.isdigit() else None,
-                    folio if folio else None
-                ))
-            
-            #referencias
-            nombres_ref = request.form.getlist('nombre_ref[]')
-            instituciones_ref = request.form.getlist('institucion_ref[]')
-            puestos_ref = request.form.getlist('puesto_ref[]')
-            telefonos_ref = request.form.getlist('telefono_ref[]')
-
-            for nom, inst, puesto, tel in zip_longest(
-                nombres_ref, instituciones_ref, puestos_ref, telefonos_ref, fillvalue=""
-            ):
-                nom = nom.strip()
-                inst = inst.strip()
-                puesto = puesto.strip()
-                tel = tel.strip()
-
-                if not (nom or inst or puesto or tel):
-                    continue
-
-                cursor.execute("""
-                    INSERT INTO referencias (persona_id, nombre_apellido, institucion, puesto, telefono)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (
-                    persona_id,
-                    nom,
-                    inst,
-                    puesto,
-                    tel if tel else None
-                ))
+    try:
+        informe = importar_en_destino(texto, formato, tam_lote, request.form.get('convocatoria'))
+    except ConvocatoriaCerrada as e:
+        return {'success': False, 'message': f'La convocatoria {e} está cerrada'}, 409
+    return {'success': not informe['lotes_fallidos'], **informe}
 
-            
-            #registro profesional
-            nombre_registro = (request.form.get('nombre_registro') or "").strip()
-            numero_registro = (request.form.get('numero_registro') or "").strip()
-
-            if nombre_registro or numero_registro:
-                cursor.execute("""
-                    INSERT INTO registro_profesional (persona_id, nombre, numero_registro)
-                    VALUES (?, ?, ?)
-                """, (persona_id, nombre_registro, numero_registro))
-
-            #pretension salarial
-            monto_bs = (request.form.get('monto_bs') or "").strip()
-            if monto_bs:
-                cursor.execute("""
-                    INSERT INTO pretension_salarial (persona_id, monto_bs)
-                    VALUES (?, ?)
-                """, (persona_id, monto_bs))
-
-            #incopatibilidades
-            cursor.execute("""
-                INSERT INTO incompatibilidades (
-                    persona_id, vinculacion_ministerio, otra_actividad, percibe_renta, destitucion_sentencia
-                )
-                VALUES (?, ?, ?, ?, ?)
-            """, (
-                persona_id,
-                request.form.get('prg1'),
-                request.form.get('prg2'),
-                request.form.get('prg3'),
-                request.form.get('prg4')
-            ))
-
-            #declaracion
-            lugar_decl = (request.form.get('lugar_declaracion') or "").strip()
-            fecha_decl = (request.form.get('fecha_declaracion') or "").strip()
-
-            if lugar_decl or fecha_decl:
-                cursor.execute("""
-                    INSERT INTO declaracion_jurada (persona_id, lugar, fecha)
-                    VALUES (?, ?, ?)
-                """, (persona_id, lugar_decl, fecha_decl))
+def informe_duplicados_shards(fuentes):
+    """
+    informe_duplicados de cada shard, uno detrás de otro. Las claves se comparan
+    dentro de cada shard: la misma persona puede postular a otra convocatoria.
+    """
+    informe = {'ci': [], 'nombre': []}
+    for abrir in fuentes:
+        conn = abrir()
+        if conn is None:
+            continue
+        try:
+            for motivo, grupos in informe_duplicados(conn).items():
+                informe[motivo].extend(grupos)
+        finally:
+            conn.close()
+    return informe
+
+@app.route("/duplicados")
+@login_required
+def duplicados():
+    """Grupos de postulantes con el mismo CI+expedido o el mismo nombre"""
+    return informe_duplicados_shards(fuentes_candidatos(archivo=False))
 
-            conn.commit()
-            
-            persona, experiencia, formacion, cursos, paquetes, idiomas, docencia, referencias, registro, pretension, incompatibilidades, declaracion = obtener_datos_completos(persona_id)
-            pdf_file = genera_pdf_formulario(persona, experiencia, formacion, cursos, paquetes, idiomas, docencia, referencias, registro, pretension, incompatibilidades, declaracion)
-            nombre_pdf = f"FORMULARIO_HV_{persona_id}.pdf"
+@app.route("/cambios")
+@login_required
+def cambios():
+    """
+    Altas, modificaciones y bajas desde el cursor (?desde=0:120,1:1000000045).
+    Se pide de nuevo con el cursor devuelto hasta que hay_mas sea falso.
+    Los postulantes archivados aparecen como bajas.
+    Si el cursor es anterior a la poda del registro responde 410 con el cursor
+    actual: se vuelve a copiar todo y se sigue desde ese cursor.
+    """
+    try:
+        desde = leer_cursor(request.args.get("desde"))
+    except ValueError:
+        return {'error': 'Cursor inválido'}, 400
+    limite = min(max(request.args.get("limite", 1000, type=int), 1), 10000)
 
-            flash('Formulario guardado exitosamente', 'success')
+    fuentes = [(numero, partial(conexion_shard, numero)) for numero in shards_activos()]
+    try:
+        lista, cursor, hay_mas = cambios_desde(fuentes, desde, limite)
+    except CursorVencido as e:
+        return {'error': f'Cursor vencido ({e}): hace falta una copia completa',
+                'cursor': escribir_cursor(cursor_actual(fuentes))}, 410
+    return {'cambios': lista, 'cursor': escribir_cursor(cursor), 'hay_mas': hay_mas}
 
-            return send_file(
-                pdf_file,
-                as_attachment=True,
-                download_name=nombre_pdf,
-                mimetype="application/pdf"
-            )
+@app.route("/tablero")
+@login_required
+def tablero():
+    """
+    Estadísticas de postulantes: por ciudad, grado más alto, idioma (y
+    habilidad), paquete (y nivel) y rango de pretensión salarial.
+    """
+    conexiones = [conn for conn in (conexion_shard(n) for n in shards_activos()) if conn is not None]
+    try:
+        return leer_tablero(conexiones)
+    finally:
+        for conn in conexiones:
+            conn.close()
 
-    except sqlite3.IntegrityError:
-        flash('El correo ya existe', 'error')
-        return redirect(url_for('index'))
+@app.route("/filtrar")
+@login_required
+def filtrar_postulantes():
+    """
+    Ids de los postulantes que cumplen todos los criterios (ver filtros.leer_criterios),
+    de a páginas: se pide de nuevo con ?desde=<siguiente> hasta que siguiente sea null.
+    """
+    try:
+        criterios = leer_criterios(request.args)
+        desde = request.args.get("desde", 0, type=int)
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    limite = min(max(request.args.get("limite", 100, type=int), 1), 1000)
 
-    except Exception as e:
-        flash(f'Error al guardar: {str(e)}', 'error')
-        return redirect(url_for('index'))
+    fuentes = [partial(conexion_shard, numero) for numero in shards_activos()]
+    ids, siguiente = filtrar(fuentes, criterios, desde, limite)
+    return {'ids': ids, 'siguiente': siguiente}
+
+@app.route("/metricas")
+@login_required
+def metricas():
+    """Contadores de este worker: generación de PDF y escrituras de formularios"""
+    return {
+        'pid': os.getpid(),
+        'render': limitador_render.estadisticas(),
+        'escritura': metricas_escritura.resumen(),
+        'escritor_grupal': {numero: e.estadisticas() for numero, e in escritores.items()},
+    }
+
+def estado_proceso():
+    """Contadores internos de este worker para /healthz y /readyz"""
+    bases = {}
+    for numero in shards_activos():
+        ruta = ruta_shard(app.config["DATABASE"], numero)
+        if numero == 0 or os.path.exists(ruta):
+            bases[numero] = estado_wal(ruta)
+    return {
+        'pid': os.getpid(),
+        'db_latencia_ms': latencia_db(get_db_connection),
+        'bases': bases,
+        'conexiones': estadisticas_conexiones(),
+        'render': limitador_render.estadisticas(),
+        'escritura': metricas_escritura.resumen(),
+        'escritor_grupal': {numero: e.estadisticas() for numero, e in escritores.items()},
+        'mantenimiento': mantenimiento.estadisticas() if mantenimiento is not None else None,
+        'cache': {
+            'detalles': cache_detalles.estadisticas(),
+            'pdf': estadisticas_almacen(),
+        },
+    }
+
+def detalle_salud_autorizado():
+    """Sesión iniciada o token SALUD_TOKEN en la cabecera Authorization"""
+    if current_user.is_authenticated:
+        return True
+    token = app.config["SALUD_TOKEN"]
+    enviado = request.headers.get("Authorization", "")
+    return bool(token) and hmac.compare_digest(enviado.encode(), f"Bearer {token}".encode())
+
+def respuesta_salud(ok, estado, **extra):
+    """Sin autorización solo el resultado; con ella, el estado interno completo"""
+    cuerpo = {'ok': ok, **extra, **estado} if detalle_salud_autorizado() else {'ok': ok}
+    return cuerpo, 200 if ok else 503
+
+@app.route("/healthz")
+def healthz():
+    """El proceso responde (sin login, para el balanceador; el detalle, ver respuesta_salud)"""
+    try:
+        estado = estado_proceso()
+    except sqlite3.Error as e:
+        app.logger.warning("healthz: %s", e)
+        return {'ok': False}, 503
+    return respuesta_salud(True, estado)
+
+def motivos_no_listo(estado):
+    """Por qué el worker no debería recibir tráfico (lista vacía: listo)"""
+    motivos = []
+    if estado['db_latencia_ms'] > app.config["LISTO_LATENCIA_MS"]:
+        motivos.append(f"latencia de la base {estado['db_latencia_ms']} ms")
+    for numero, wal in estado['bases'].items():
+        if wal['wal_bytes'] > app.config["LISTO_WAL_MB"] * 1024 * 1024:
+            motivos.append(f"WAL del shard {numero}: {wal['wal_bytes']} bytes")
+    for numero, escritor in estado['escritor_grupal'].items():
+        if escritor['en_cola'] >= escritor['max_cola']:
+            motivos.append(f"cola de escritura del shard {numero} llena")
+    if estado['render']['en_cola'] >= estado['render']['max_cola']:
+        motivos.append("cola de PDF llena")
+    return motivos
+
+@app.route("/readyz")
+def readyz():
+    """
+    Listo para recibir tráfico: además de /healthz, la base responde en menos de
+    LISTO_LATENCIA_MS, ningún WAL pasa de LISTO_WAL_MB y las colas de escritura y
+    de PDF no están llenas. Si no, 503. El detalle incluye además si el lock de
+    escritura de cada base está libre en este momento (sin esperarlo).
+    """
+    try:
+        estado = estado_proceso()
+        motivos = motivos_no_listo(estado)
+        locks = {}
+        if detalle_salud_autorizado():
+            for numero in estado['bases']:
+                obtenido, ms = lock_disponible(partial(conexion_shard, numero))
+                locks[numero] = {'obtenido': obtenido, 'ms': ms}
+    except sqlite3.Error as e:
+        app.logger.warning("readyz: %s", e)
+        return {'ok': False}, 503
+    return respuesta_salud(not motivos, estado, motivos=motivos, lock_escritura=locks)
 
 @app.route("/reimprimir", methods=["POST"])
 def reimprimir():
@@ -877,27 +1846,286 @@ def reimprimir():
         flash("Ingresa tu correo electrónico", "danger")
         return redirect(url_for("index"))
     
-    conn = get_db_connection()
-    persona_row = conn.execute("SELECT * FROM datos WHERE correo = ?", (correo,)).fetchone()
+    conn, persona_row = buscar_persona("correo", correo, "id, version, actualizado_en")
 
     if not persona_row:
-        conn.close()
         flash("No existe ningun formulario con ese correo.", "danger")
         return redirect(url_for("index"))
     
     persona_id = persona_row["id"]
     conn.close()
 
-    persona, experiencia, formacion, cursos, paquetes, idiomas, docencia, referencias, registro, pretension, incompatibilidades, declaracion = obtener_datos_completos(persona_id)
-    pdf_file = genera_pdf_formulario(persona, experiencia, formacion, cursos, paquetes, idiomas, docencia, referencias, registro, pretension, incompatibilidades, declaracion)
+    etag = etag_persona(persona_row)
+    ultima_modificacion = fecha_modificacion(persona_row)
+    if no_modificado(etag, ultima_modificacion):
+        return respuesta_no_modificada(etag, ultima_modificacion)
+
     nombre_pdf = f"FORMULARIO_HV_{persona_id}.pdf"
+    ruta = obtener_pdf(f"FORMULARIO_HV_{persona_id}_v{persona_row['version']}.pdf",
+                       con_turno_render(lambda: generar_pdf_formulario(persona_id)))
 
-    return send_file(
-        pdf_file,
-        as_attachment=True,
-        download_name=nombre_pdf,
-        mimetype="application/pdf"
+    return enviar_pdf(ruta, nombre_pdf, etag, ultima_modificacion)
+
+@app.cli.command("tamanio-pdf")
+@click.argument("ids", nargs=-1, type=int)
+def tamanio_pdf(ids):
+    """Compara el tamaño del formulario PDF en modo normal y compacto"""
+    from templates.pdf_compacto import comparar_tamanios
+
+    asegurar_esquema()
+    if not ids:
+        with get_db_connection() as conn:
+            ids = [row['id'] for row in conn.execute("SELECT id FROM datos ORDER BY id")]
+
+    total_normal = total_compacto = 0
+    for persona_id in ids:
+        normal, compacto = comparar_tamanios(lambda c: generar_pdf_formulario(persona_id, compacto=c))
+        total_normal += normal
+        total_compacto += compacto
+        click.echo(f"{persona_id}: {normal} -> {compacto} bytes")
+
+    if total_normal:
+        ahorro = total_normal - total_compacto
+        click.echo(f"Total: {total_normal} -> {total_compacto} bytes "
+                   f"(ahorro {ahorro} bytes, {ahorro * 100 / total_normal:.1f}%)")
+
+@app.cli.command("reporte-ranking")
+@click.option("--orden", type=click.Choice(list(ORDENES_RANKING)), default="experiencia")
+def reporte_ranking_cli(orden):
+    """Genera el reporte de ranking en el almacén de PDF (sin el límite REPORTE_MAX_FILAS)"""
+    asegurar_esquema()
+    conexiones = conexiones_ranking()
+    try:
+        nombre, total = nombre_ranking(conexiones, orden)
+        inicio = time.perf_counter()
+        ruta = obtener_pdf(nombre, generar_ranking(conexiones, orden))
+    finally:
+        for conn in conexiones:
+            conn.close()
+    click.echo(f"{ruta}: {total} postulantes ({time.perf_counter() - inicio:.1f} s)")
+
+@app.cli.command("importar")
+@click.argument("archivo", type=click.Path(exists=True, dir_okay=False))
+@click.option("--formato", type=click.Choice(["jsonl", "csv"]), help="Por defecto según la extensión")
+@click.option("--lote", default=1000, help="Candidatos por transacción")
+@click.option("--convocatoria", help="Convocatoria de los candidatos (por defecto CONVOCATORIA)")
+def importar_cli(archivo, formato, lote, convocatoria):
+    """Importa candidatos desde JSONL o CSV en transacciones por lote"""
+    asegurar_esquema()
+    formato = formato_importacion(archivo, formato)
+
+    with open(archivo, encoding='utf-8-sig', newline='') as texto:
+        try:
+            informe = importar_en_destino(texto, formato, lote, convocatoria)
+        except ConvocatoriaCerrada as e:
+            raise click.ClickException(f"La convocatoria {e} está cerrada")
+
+    click.echo(f"Leídos: {informe['leidos']}  Importados: {informe['importados']}  "
+               f"Errores: {len(informe['errores'])}  Lotes no importados: {informe['lotes_fallidos']}")
+    click.echo(f"{informe['segundos']} s ({informe['filas_por_segundo']} filas/s)")
+    for error in informe['errores']:
+        click.echo(f"  fila {error['fila']}: {error['error']}", err=True)
+
+@app.cli.command("duplicados")
+@click.option("--snapshot", is_flag=True, help="Leer del snapshot del último respaldo")
+def duplicados_cli(snapshot):
+    """Lista los postulantes repetidos por CI+expedido o por nombre"""
+    asegurar_esquema()
+    fuentes = fuentes_candidatos(archivo=False)
+    if snapshot:
+        # Pedido explícito: el snapshot sirve aunque sea viejo
+        fuentes[0] = lambda: conexion_lectura(edad_maxima=float("inf"))
+    informe = informe_duplicados_shards(fuentes)
+    for motivo, grupos in informe.items():
+        click.echo(f"Por {motivo}: {len(grupos)} grupos")
+        for grupo in grupos:
+            click.echo(f"  {grupo['clave']}: {', '.join(map(str, grupo['ids']))}")
+
+@app.cli.command("cambios")
+@click.option("--desde", default="", help="Cursor devuelto por la ejecución anterior")
+@click.option("--estado", type=click.Path(dir_okay=False),
+              help="Archivo donde leer y guardar el cursor entre ejecuciones")
+@click.option("--limite", default=1000, help="Cambios leídos por consulta")
+def cambios_cli(desde, estado, limite):
+    """Escribe en JSON Lines los cambios desde el cursor y muestra el cursor nuevo"""
+    asegurar_esquema()
+    if estado and not desde and os.path.exists(estado):
+        with open(estado) as f:
+            desde = f.read().strip()
+    cursor = leer_cursor(desde)
+
+    fuentes = [(numero, partial(conexion_shard, numero)) for numero in shards_activos()]
+    total = 0
+    hay_mas = True
+    while hay_mas:
+        try:
+            lista, cursor, hay_mas = cambios_desde(fuentes, cursor, limite)
+        except CursorVencido as e:
+            raise click.ClickException(
+                f"Cursor vencido ({e}): hace falta una copia completa y seguir desde "
+                f"{escribir_cursor(cursor_actual(fuentes))}"
+            )
+        for cambio in lista:
+            click.echo(json.dumps(cambio, ensure_ascii=False))
+        total += len(lista)
+
+    if estado:
+        with open(estado, "w") as f:
+            f.write(escribir_cursor(cursor))
+    click.echo(f"{total} cambios, cursor {escribir_cursor(cursor)}", err=True)
+
+@app.cli.command("podar-cambios")
+@click.option("--dias", type=int, help="Borrar los cambios con más de estos días (por defecto CAMBIOS_RETENCION_DIAS)")
+@click.option("--cursor", "hasta", default="", help="Cursor mínimo que ya leyeron todos los consumidores")
+@click.option("--lote", default=5000, help="Cambios borrados por transacción")
+def podar_cambios_cli(dias, hasta, lote):
+    """
+    Borra el principio del registro de cambios de cada shard: lo que tiene más
+    de --dias días y, con --cursor, solo lo que ya leyeron los consumidores.
+    Los cursores anteriores a lo borrado dejan de servir (ver cambios.py).
+    """
+    asegurar_esquema()
+    if dias is None:
+        dias = app.config["CAMBIOS_RETENCION_DIAS"]
+    hasta = leer_cursor(hasta) if hasta else None
+
+    for numero in shards_activos():
+        abrir = partial(conexion_shard, numero)
+        conn = abrir()
+        if conn is None:
+            continue
+        try:
+            # Con --cursor, un shard que no figura en él todavía no se leyó: no se borra nada
+            corte = corte_poda(conn, dias, hasta.get(numero, 0) if hasta is not None else None)
+        finally:
+            conn.close()
+        if corte is None:
+            continue
+
+        borrados = 0
+        while True:
+            cantidad, _ = transaccion_escritura(
+                abrir, lambda conn: podar_cambios(conn, corte, lote),
+                busy_timeout_ms=app.config["ESPERA_LOCK_MS"],
+                reintentos=app.config["REINTENTOS_ESCRITURA"],
+            )
+            borrados += cantidad
+            if cantidad < lote:
+                break
+        click.echo(f"Shard {numero}: {borrados} cambios borrados (hasta seq {corte})")
+
+@app.cli.command("cerrar-convocatoria")
+@click.argument("nombre")
+def cerrar_convocatoria(nombre):
+    """Marca una convocatoria como cerrada (ya no recibe postulantes)"""
+    asegurar_esquema()
+    with get_db_connection() as conn:
+        cursor = conn.execute("UPDATE convocatorias SET estado = 'cerrada' WHERE nombre = ?", (nombre,))
+        conn.commit()
+    # Los demás procesos lo ven al vencer su destino (DESTINO_VIGENCIA)
+    _destinos.clear()
+    if cursor.rowcount == 0:
+        raise click.ClickException(f"No existe la convocatoria {nombre}")
+    click.echo(f"Convocatoria {nombre} cerrada")
+
+@app.cli.command("archivar")
+@click.argument("nombre")
+@click.option("--lote", default=500, help="Personas por transacción")
+def archivar(nombre, lote):
+    """Mueve los postulantes de una convocatoria cerrada a la base de archivo"""
+    asegurar_esquema()
+    with get_db_connection() as conn:
+        convocatoria = conn.execute(
+            "SELECT id, estado, shard FROM convocatorias WHERE nombre = ?", (nombre,)
+        ).fetchone()
+    if convocatoria is None:
+        raise click.ClickException(f"No existe la convocatoria {nombre}")
+    if convocatoria['estado'] != 'cerrada':
+        raise click.ClickException(f"La convocatoria {nombre} sigue abierta")
+
+    # Los postulantes están en el shard de la convocatoria (o en la base principal)
+    conn = conexion_shard(convocatoria['shard'] or 0)
+    if conn is None:
+        raise click.ClickException(f"La convocatoria {nombre} no tiene postulantes")
+    try:
+        movidas, segundos = archivar_convocatoria(
+            conn, app.config["ARCHIVO_DATABASE"], convocatoria['id'], lote
+        )
+    finally:
+        conn.close()
+
+    click.echo(f"{movidas} postulantes movidos a {app.config['ARCHIVO_DATABASE']} en {segundos:.1f} s")
+
+@app.cli.command("respaldar")
+@click.option("--paginas", default=512, help="Páginas copiadas por paso")
+@click.option("--pausa", default=0.01, help="Segundos de descanso entre pasos")
+def respaldar_cli(paginas, pausa):
+    """Respaldo en caliente de la base y actualización del snapshot de lectura"""
+    asegurar_esquema()
+    metricas = respaldo_completo(
+        app.config["DATABASE"], app.config["RESPALDO_DIR"], app.config["RESPALDO_CONSERVAR"],
+        paginas=paginas, pausa=pausa
     )
+    click.echo(f"{metricas['destino']}: {metricas['bytes']} bytes, "
+               f"{metricas['pasos']} pasos, {metricas['segundos']} s")
+    for ruta in rutas_shards():
+        metricas = respaldo_completo(
+            ruta, app.config["RESPALDO_DIR"], app.config["RESPALDO_CONSERVAR"],
+            snapshot=False, paginas=paginas, pausa=pausa
+        )
+        click.echo(f"{metricas['destino']}: {metricas['bytes']} bytes, "
+                   f"{metricas['pasos']} pasos, {metricas['segundos']} s")
+
+@app.cli.command("construir-paginas")
+def construir_paginas():
+    """Precompila y comprime las páginas públicas (correr en cada despliegue)"""
+    carpeta = app.config["PAGINAS_DIR"]
+    manifiesto = {}
+    for plantilla, ruta in PAGINAS_PUBLICAS:
+        with app.test_request_context(ruta):
+            g.estaticos_usados = {}
+            html = render_template(plantilla)
+            estaticos = g.estaticos_usados
+
+        etag, tamanios = guardar_pagina(carpeta, plantilla, html)
+        ruta_plantilla = os.path.join(app.root_path, app.template_folder, plantilla)
+        manifiesto[plantilla] = {
+            'etag': etag,
+            'plantilla': ruta_plantilla,
+            'plantilla_mtime': os.stat(ruta_plantilla).st_mtime_ns,
+            'estaticos': estaticos,
+        }
+        click.echo(f"{plantilla}: " + ", ".join(f"{c} {n} bytes" for c, n in tamanios.items()))
+
+    guardar_manifiesto(carpeta, manifiesto)
+    paginas_precompiladas.recargar()
+
+@app.cli.command("init-db")
+def init_db():
+    """Crea o actualiza el esquema de la base de datos"""
+    init_database()
+    click.echo(f"Esquema en versión {ESQUEMA_VERSION}")
+
+@app.cli.command("perfil-arranque")
+@click.option("--top", default=15, help="Cantidad de módulos a mostrar")
+def perfil_arranque(top):
+    """Mide cuánto tarda importar app.py (python -X importtime)"""
+    resultado = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        capture_output=True, text=True, cwd=app.root_path
+    )
+
+    modulos = []
+    for linea in resultado.stderr.splitlines():
+        if not linea.startswith("import time:") or "cumulative" in linea:
+            continue
+        propio, acumulado, nombre = linea[len("import time:"):].split("|")
+        modulos.append((int(acumulado), int(propio), nombre.strip()))
+
+    total = max((m[0] for m in modulos if m[2] == "app"), default=0)
+    click.echo(f"Importar app: {total / 1000:.1f} ms")
+    for acumulado, propio, nombre in sorted(modulos, reverse=True)[:top]:
+        click.echo(f"{acumulado / 1000:9.1f} ms {propio / 1000:9.1f} ms  {nombre}")
 
 if __name__ == "__main__":
     app.run(debug=True)
\ No newline at end of file
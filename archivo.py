@@ -0,0 +1,142 @@
+import time
+
+# Tablas que se mueven al archivo junto con cada persona
+TABLAS_ARCHIVO = [
+    'formacion_academica', 'experiencia', 'cursos', 'paquetes_informaticos', 'idiomas',
+    'docencia', 'referencias', 'registro_profesional', 'pretension_salarial',
+    'incompatibilidades', 'declaracion_jurada', 'resumen_experiencia',
+    'resumen_experiencia_historial',
+]
+
+def _columnas(conn, esquema, tabla):
+    return [(c[1], c[2]) for c in conn.execute(f"PRAGMA {esquema}.table_info({tabla})").fetchall()]
+
+def preparar_archivo(conn, ruta):
+    """
+    Adjunta la base de archivo (ATTACH ... AS archivo) y crea en ella las tablas
+    que falten, copiando su definición de la base principal.
+    """
+    conn.execute("ATTACH DATABASE ? AS archivo", (ruta,))
+
+    for tabla in ['datos'] + TABLAS_ARCHIVO:
+        sql = conn.execute(
+            "SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?", (tabla,)
+        ).fetchone()[0]
+        existe = conn.execute(
+            "SELECT 1 FROM archivo.sqlite_master WHERE type = 'table' AND name = ?", (tabla,)
+        ).fetchone()
+
+        if not existe:
+            cuerpo = sql[sql.index("("):]
+            conn.execute(f"CREATE TABLE archivo.{tabla} {cuerpo}")
+        else:
+            # Columnas agregadas a la base principal después de crear el archivo
+            actuales = {nombre for nombre, _ in _columnas(conn, 'archivo', tabla)}
+            for nombre, tipo in _columnas(conn, 'main', tabla):
+                if nombre not in actuales:
+                    conn.execute(f"ALTER TABLE archivo.{tabla} ADD COLUMN {nombre} {tipo}")
+
+        columna = 'id' if tabla == 'datos' else 'persona_id'
+        if tabla != 'datos':
+            conn.execute(f"CREATE INDEX IF NOT EXISTS archivo.idx_{tabla}_persona ON {tabla}({columna})")
+
+    conn.execute("CREATE INDEX IF NOT EXISTS archivo.idx_datos_correo ON datos(correo)")
+
+def _copiar_lote(conn):
+    """Copia al archivo las personas de temp.lote_archivo, reemplazando lo que ya hubiera de ellas"""
+    for tabla in TABLAS_ARCHIVO + ['datos']:
+        columna = 'id' if tabla == 'datos' else 'persona_id'
+        lista = ", ".join(nombre for nombre, _ in _columnas(conn, 'main', tabla))
+        conn.execute(f"DELETE FROM archivo.{tabla} WHERE {columna} IN (SELECT id FROM temp.lote_archivo)")
+        conn.execute(
+            f"""
+            INSERT INTO archivo.{tabla} ({lista})
+            SELECT {lista} FROM main.{tabla}
+            WHERE {columna} IN (SELECT id FROM temp.lote_archivo)
+            """
+        )
+
+def _borrar_lote(conn, esquema, tabla_ids):
+    """Borra de `esquema` las personas de la tabla temporal indicada; devuelve cuántas había en datos"""
+    for tabla in TABLAS_ARCHIVO + ['datos']:
+        columna = 'id' if tabla == 'datos' else 'persona_id'
+        cursor = conn.execute(f"DELETE FROM {esquema}.{tabla} WHERE {columna} IN (SELECT id FROM temp.{tabla_ids})")
+    return cursor.rowcount
+
+def archivar_convocatoria(conn, ruta, convocatoria_id, tam_lote=500):
+    """
+    Mueve los postulantes de una convocatoria y todas sus filas hijas a la base
+    de archivo, en lotes de tam_lote personas. Devuelve (personas, segundos).
+
+    Con WAL, un COMMIT que toca dos bases adjuntas no es atómico entre ellas,
+    así que cada lote son dos transacciones: primero se copia al archivo y
+    recién después de confirmada la copia se borra de la base principal. Si el
+    proceso se corta entre las dos, la persona queda en ambas (las lecturas
+    usan la de la principal) y volver a correr el comando reemplaza la copia.
+    Solo se borra de la principal a quien no cambió desde que se copió (misma
+    datos.version); los demás se vuelven a copiar en el lote siguiente.
+    """
+    inicio = time.perf_counter()
+    preparar_archivo(conn, ruta)
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS lote_archivo(id INTEGER PRIMARY KEY, version INTEGER)")
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS lote_huerfano(id INTEGER PRIMARY KEY)")
+    movidas = 0
+
+    try:
+        while True:
+            # 1. Copia: solo escribe en el archivo
+            conn.execute("BEGIN")
+            try:
+                conn.execute("DELETE FROM temp.lote_archivo")
+                conn.execute(
+                    """
+                    INSERT INTO temp.lote_archivo (id, version)
+                    SELECT id, version FROM main.datos WHERE convocatoria_id = ? ORDER BY id LIMIT ?
+                    """,
+                    (convocatoria_id, tam_lote)
+                )
+                cantidad = conn.execute("SELECT COUNT(*) FROM temp.lote_archivo").fetchone()[0]
+                if cantidad == 0:
+                    conn.rollback()
+                    break
+                _copiar_lote(conn)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+            # 2. Borrado: solo escribe en la base principal
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM temp.lote_huerfano")
+                # Borradas de la principal mientras se copiaban: su copia sobra
+                conn.execute(
+                    """
+                    INSERT INTO temp.lote_huerfano (id)
+                    SELECT id FROM temp.lote_archivo WHERE id NOT IN (SELECT id FROM main.datos)
+                    """
+                )
+                conn.execute(
+                    """
+                    DELETE FROM temp.lote_archivo
+                    WHERE version IS NOT (SELECT version FROM main.datos d WHERE d.id = lote_archivo.id)
+                    """
+                )
+                movidas += _borrar_lote(conn, 'main', 'lote_archivo')
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+            if conn.execute("SELECT 1 FROM temp.lote_huerfano LIMIT 1").fetchone():
+                conn.execute("BEGIN")
+                try:
+                    _borrar_lote(conn, 'archivo', 'lote_huerfano')
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+    finally:
+        conn.execute("DETACH DATABASE archivo")
+
+    return movidas, time.perf_counter() - inicio
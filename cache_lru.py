@@ -0,0 +1,50 @@
+import threading
+from collections import OrderedDict
+
+class CacheLRU:
+    """
+    Cache en memoria (por proceso) con expulsión LRU.
+    Cada clave guarda una sola versión: pedir otra versión cuenta como fallo
+    y la entrada vieja se reemplaza al guardar la nueva.
+    """
+
+    def __init__(self, maximo=512):
+        self.maximo = maximo
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave, version):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None or entrada[0] != version:
+                self.fallos += 1
+                return None
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return entrada[1]
+
+    def guardar(self, clave, version, valor):
+        if self.maximo <= 0:
+            return
+        with self._lock:
+            self._datos[clave] = (version, valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.maximo:
+                self._datos.popitem(last=False)
+
+    def invalidar(self, clave):
+        with self._lock:
+            self._datos.pop(clave, None)
+
+    def estadisticas(self):
+        with self._lock:
+            total = self.aciertos + self.fallos
+            return {
+                'entradas': len(self._datos),
+                'maximo': self.maximo,
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': round(self.aciertos / total, 3) if total else None,
+            }
@@ -0,0 +1,213 @@
+import json
+
+# Registro de cambios (CDC) para sincronizar otros sistemas por diferencias.
+# Triggers en datos y sus tablas hijas agregan una fila a `cambios` por cada
+# INSERT, UPDATE o DELETE, con la fila nueva en JSON. cambios.seq es
+# AUTOINCREMENT: crece siempre y nunca se reutiliza, así que un consumidor
+# solo necesita recordar el último seq que leyó.
+# Cada shard tiene su propio registro y su seq empieza en el rango del shard,
+# por eso el cursor guarda un seq por shard ("0:120,1:1000000045").
+# El registro no crece sin límite: "flask podar-cambios" borra el principio
+# (por antigüedad o hasta el cursor que ya leyeron los consumidores) y anota en
+# cambios_poda hasta qué seq borró. Un cursor anterior a ese seq ya no sirve
+# (perdería cambios): cambios_desde lanza CursorVencido y el consumidor tiene
+# que volver a copiar todo y seguir desde cursor_actual (tomado antes de copiar).
+
+OPERACIONES = {'INSERT': 'I', 'UPDATE': 'U', 'DELETE': 'D'}
+
+# Columnas de datos que los triggers de versión actualizan solos: un UPDATE
+# que solo toca estas no es un cambio para los consumidores
+COLUMNAS_INTERNAS_DATOS = ('version', 'actualizado_en')
+
+def crear_tabla_cambios(cursor):
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS cambios(
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        tabla TEXT NOT NULL,
+        operacion TEXT NOT NULL CHECK(operacion IN ('I', 'U', 'D')),
+        fila_id INTEGER NOT NULL,
+        persona_id INTEGER,
+        datos TEXT,
+        registrado_en TEXT NOT NULL DEFAULT (datetime('now'))
+        )
+        """
+    )
+
+    # Hasta qué seq se podó el registro (una sola fila)
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS cambios_poda(
+        id INTEGER PRIMARY KEY CHECK(id = 1),
+        hasta_seq INTEGER NOT NULL,
+        podado_en TEXT NOT NULL DEFAULT (datetime('now'))
+        )
+        """
+    )
+
+class CursorVencido(Exception):
+    """El cursor apunta a cambios ya podados: hay que resincronizar completo"""
+
+    def __init__(self, shard, desde, podado_hasta):
+        super().__init__(f"shard {shard}: cursor {desde} anterior a la poda ({podado_hasta})")
+        self.shard = shard
+        self.desde = desde
+        self.podado_hasta = podado_hasta
+
+def crear_triggers_cambios(cursor, tablas):
+    """
+    (Re)crea los triggers de cambios de cada tabla con sus columnas actuales.
+    Se llama en cada actualización del esquema, después de los ALTER TABLE.
+    """
+    for tabla in tablas:
+        columnas = [c[1] for c in cursor.execute(f"PRAGMA table_info({tabla})").fetchall()]
+        persona = 'id' if tabla == 'datos' else 'persona_id'
+
+        for evento, letra in OPERACIONES.items():
+            fila = 'OLD' if evento == 'DELETE' else 'NEW'
+            datos = 'NULL' if evento == 'DELETE' else (
+                "json_object(" + ", ".join(f"'{c}', NEW.{c}" for c in columnas) + ")"
+            )
+            momento = f"AFTER {evento}"
+            if evento == 'UPDATE' and tabla == 'datos':
+                visibles = [c for c in columnas if c not in COLUMNAS_INTERNAS_DATOS]
+                momento = f"AFTER UPDATE OF {', '.join(visibles)}"
+
+            nombre = f"{tabla}_cdc_{letra.lower()}"
+            cursor.execute(f"DROP TRIGGER IF EXISTS {nombre}")
+            cursor.execute(
+                f"""
+                CREATE TRIGGER {nombre} {momento} ON {tabla}
+                BEGIN
+                    INSERT INTO cambios (tabla, operacion, fila_id, persona_id, datos)
+                    VALUES ('{tabla}', '{letra}', {fila}.id, {fila}.{persona}, {datos});
+                END
+                """
+            )
+
+def leer_cursor(texto):
+    """'0:120,1:1000000045' -> {0: 120, 1: 1000000045} (vacío = desde el principio)"""
+    cursor = {}
+    for parte in (texto or "").split(","):
+        if not parte.strip():
+            continue
+        shard, seq = parte.split(":")
+        cursor[int(shard)] = int(seq)
+    return cursor
+
+def escribir_cursor(cursor):
+    return ",".join(f"{shard}:{seq}" for shard, seq in sorted(cursor.items()))
+
+def podado_hasta(conn):
+    """Último seq borrado por la poda (0 si nunca se podó)"""
+    row = conn.execute("SELECT hasta_seq FROM cambios_poda WHERE id = 1").fetchone()
+    return row[0] if row else 0
+
+def corte_poda(conn, dias=None, hasta_seq=None):
+    """
+    Último seq que se puede borrar: el de los cambios con más de `dias` días
+    y, si se indica, no posterior a hasta_seq (lo que ya leyeron todos los
+    consumidores). Siempre un prefijo del registro. None si no hay nada que borrar.
+    """
+    corte = conn.execute("SELECT MAX(seq) FROM cambios").fetchone()[0]
+    if dias is not None:
+        corte = conn.execute(
+            "SELECT MAX(seq) FROM cambios WHERE registrado_en < datetime('now', ?)", (f"-{dias} days",)
+        ).fetchone()[0]
+    if corte is not None and hasta_seq is not None:
+        corte = min(corte, hasta_seq)
+    if corte is None or corte <= podado_hasta(conn):
+        return None
+    return corte
+
+def podar_cambios(conn, corte, tam_lote=5000):
+    """
+    Un lote de la poda, dentro de la transacción de conn: anota el corte en
+    cambios_poda (los cursores anteriores quedan vencidos desde ya) y borra
+    hasta tam_lote cambios con seq <= corte. Devuelve cuántos borró.
+    """
+    conn.execute(
+        """
+        INSERT INTO cambios_poda (id, hasta_seq) VALUES (1, ?)
+        ON CONFLICT (id) DO UPDATE SET hasta_seq = MAX(hasta_seq, excluded.hasta_seq),
+                                       podado_en = excluded.podado_en
+        """,
+        (corte,)
+    )
+    return conn.execute(
+        "DELETE FROM cambios WHERE seq IN (SELECT seq FROM cambios WHERE seq <= ? ORDER BY seq LIMIT ?)",
+        (corte, tam_lote)
+    ).rowcount
+
+def leer_cambios(conn, desde_seq, limite):
+    """Hasta `limite` cambios con seq > desde_seq, en orden"""
+    cambios = []
+    for row in conn.execute(
+        """
+        SELECT seq, tabla, operacion, fila_id, persona_id, datos, registrado_en
+        FROM cambios WHERE seq > ? ORDER BY seq LIMIT ?
+        """,
+        (desde_seq, limite)
+    ):
+        cambios.append({
+            'seq': row[0],
+            'tabla': row[1],
+            'operacion': row[2],
+            'fila_id': row[3],
+            'persona_id': row[4],
+            'datos': json.loads(row[5]) if row[5] is not None else None,
+            'registrado_en': row[6],
+        })
+    return cambios
+
+def cambios_desde(fuentes, cursor, limite=1000):
+    """
+    Cambios de varios shards a partir del cursor, shard por shard, hasta
+    `limite` en total. fuentes: [(shard, abrir)]. Devuelve (cambios, cursor
+    nuevo, hay_mas). Lanza CursorVencido si el cursor de algún shard es
+    anterior a su poda.
+    """
+    cursor = dict(cursor)
+    resultado = []
+    hay_mas = False
+    for shard, abrir in fuentes:
+        restantes = limite - len(resultado)
+        if restantes <= 0:
+            hay_mas = True
+            break
+        conn = abrir()
+        if conn is None:
+            continue
+        try:
+            # Un shard nuevo empieza en su rango; 0 lee todo su registro
+            desde = cursor.get(shard, 0)
+            podado = podado_hasta(conn)
+            if desde < podado:
+                raise CursorVencido(shard, desde, podado)
+            lote = leer_cambios(conn, desde, restantes + 1)
+        finally:
+            conn.close()
+        if len(lote) > restantes:
+            lote = lote[:restantes]
+            hay_mas = True
+        for cambio in lote:
+            cambio['shard'] = shard
+        resultado.extend(lote)
+        if lote:
+            cursor[shard] = lote[-1]['seq']
+    return resultado, cursor, hay_mas
+
+def cursor_actual(fuentes):
+    """Cursor al final del registro de cada shard (fuentes: [(shard, abrir)])"""
+    cursor = {}
+    for shard, abrir in fuentes:
+        conn = abrir()
+        if conn is None:
+            continue
+        try:
+            row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'cambios'").fetchone()
+        finally:
+            conn.close()
+        if row:
+            cursor[shard] = row[0]
+    return cursor
@@ -0,0 +1,560 @@
+import csv
+import json
+import time
+import sqlite3
+from itertools import zip_longest
+from duplicados import claves_candidato
+from escritura import EscrituraOcupada
+
+# Columnas de datos que el postulante llena
+COLUMNAS_DATOS = [
+    'nombres', 'ap_pat', 'ap_mat', 'ci', 'exp', 'est_civil', 'fecha_nac', 'lugar', 'nacio',
+    'direccion', 'ciudad', 'gr_san', 'tcel', 'tfijo', 'correo', 'n_libser'
+]
+
+# Columnas de datos que no aceptan NULL
+OBLIGATORIOS_DATOS = [
+    'nombres', 'ci', 'est_civil', 'fecha_nac', 'lugar', 'nacio', 'direccion', 'ciudad', 'gr_san', 'tcel'
+]
+
+# Secciones del formulario: clave -> (tabla, columnas, obligatorias, una_sola_fila)
+# Las claves son las mismas que devuelve leer_datos_completos (app.py).
+SECCIONES = {
+    'formacion': ('formacion_academica',
+                  ['detalle', 'institucion', 'grado', 'anio_form', 'n_folio'],
+                  ['detalle', 'institucion', 'grado'], False),
+    'experiencia': ('experiencia',
+                    ['nombre', 'puesto', 'breve', 'desde', 'hasta', 'motivo'],
+                    ['nombre', 'puesto', 'breve', 'motivo'], False),
+    'cursos': ('cursos',
+               ['anio_curso', 'area_capacitacion', 'institucion', 'nombre_capacitacion', 'duracion_horas'],
+               ['area_capacitacion', 'institucion', 'nombre_capacitacion'], False),
+    'paquetes': ('paquetes_informaticos',
+                 ['paquete', 'nivel', 'folio'],
+                 ['paquete'], False),
+    'idiomas': ('idiomas',
+                ['idioma', 'lectura', 'escritura', 'conversacion', 'folio'],
+                ['idioma'], False),
+    'docencia': ('docencia',
+                 ['anio_doc', 'institucion', 'nombre_curso', 'duracion_horas', 'folio'],
+                 ['institucion', 'nombre_curso'], False),
+    'referencias': ('referencias',
+                    ['nombre_apellido', 'institucion', 'puesto', 'telefono'],
+                    ['nombre_apellido', 'institucion', 'puesto'], False),
+    'registro': ('registro_profesional', ['nombre', 'numero_registro'], [], True),
+    'pretension': ('pretension_salarial', ['monto_bs'], [], True),
+    'incompatibilidades': ('incompatibilidades',
+                           ['vinculacion_ministerio', 'otra_actividad', 'percibe_renta', 'destitucion_sentencia'],
+                           [], True),
+    'declaracion': ('declaracion_jurada', ['lugar', 'fecha'], [], True),
+}
+
+COLUMNAS_ENTERAS = {'tcel', 'tfijo', 'anio_form', 'anio_curso', 'duracion_horas', 'anio_doc'}
+COLUMNAS_BOOLEANAS = {'lectura', 'escritura', 'conversacion'}
+NIVELES_PAQUETE = ('regular', 'bueno', 'muy_bueno')
+RESPUESTAS_SI_NO = ('si', 'no')
+
+def sql_insertar(tabla, columnas):
+    """INSERT con placeholders para las columnas dadas"""
+    return f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES ({', '.join('?' for _ in columnas)})"
+
+def _entero(v):
+    v = (v or "").strip()
+    return int(v) if v.isdigit() else None
+
+def candidato_desde_formulario(form):
+    """Convierte el POST de index.html en un candidato (dict con sus secciones)"""
+    candidato = {col: form.get(col) for col in COLUMNAS_DATOS}
+
+    #formacion
+    candidato['formacion'] = []
+    for detalle, institucion, grado, anio, folio in zip_longest(
+        form.getlist('detalle[]'), form.getlist('institucion[]'), form.getlist('grado[]'),
+        form.getlist('anio_form[]'), form.getlist('n_folio[]'), fillvalue=""
+    ):
+        detalle, institucion, grado, anio, folio = (v.strip() for v in (detalle, institucion, grado, anio, folio))
+        if not detalle and not institucion and not grado and not anio and not folio:
+            continue
+        candidato['formacion'].append({
+            'detalle': detalle, 'institucion': institucion, 'grado': grado,
+            'anio_form': _entero(anio), 'n_folio': folio if folio else None
+        })
+
+    # experiencia
+    candidato['experiencia'] = []
+    for nombre, puesto, breve, desde, hasta, motivo in zip_longest(
+        form.getlist('nombre[]'), form.getlist('puesto[]'), form.getlist('breve[]'),
+        form.getlist('desde[]'), form.getlist('hasta[]'), form.getlist('motivo[]'), fillvalue=""
+    ):
+        nombre, puesto, breve, desde, hasta, motivo = (v.strip() for v in (nombre, puesto, breve, desde, hasta, motivo))
+        # si la fila está vacía, no insertamos
+        if not nombre and not puesto and not breve and not desde and not hasta and not motivo:
+            continue
+        candidato['experiencia'].append({
+            'nombre': nombre, 'puesto': puesto, 'breve': breve,
+            'desde': desde if desde else None, 'hasta': hasta if hasta else None, 'motivo': motivo
+        })
+
+    #cursos
+    candidato['cursos'] = []
+    for anio, cap, inst, n_cap, horas in zip_longest(
+        form.getlist('anio_curso[]'), form.getlist('cap[]'), form.getlist('inst[]'),
+        form.getlist('n_cap[]'), form.getlist('horas[]'), fillvalue=""
+    ):
+        anio, cap, inst, n_cap, horas = (v.strip() for v in (anio, cap, inst, n_cap, horas))
+        if not anio and not cap and not inst and not n_cap and not horas:
+            continue
+        candidato['cursos'].append({
+            'anio_curso': _entero(anio), 'area_capacitacion': cap, 'institucion': inst,
+            'nombre_capacitacion': n_cap, 'duracion_horas': _entero(horas)
+        })
+
+    #paquetes
+    candidato['paquetes'] = []
+    for i, (paquete, folio) in enumerate(zip_longest(
+        form.getlist('paquete[]'), form.getlist('folio_paquete[]'), fillvalue=""
+    )):
+        paquete = paquete.strip()
+        folio = folio.strip()
+        nivel = form.get(f'nivel_{i}')
+        if not (paquete and folio and nivel):
+            continue
+        candidato['paquetes'].append({'paquete': paquete, 'nivel': nivel, 'folio': folio if folio else None})
+
+    #idiomas
+    candidato['idiomas'] = []
+    for i, (idioma, folio_idioma) in enumerate(zip_longest(
+        form.getlist('idioma[]'), form.getlist('folio_idioma[]'), fillvalue=""
+    )):
+        idioma = idioma.strip()
+        folio_idioma = folio_idioma.strip()
+        lectura = 1 if form.get(f'lectura_{i}') else 0
+        escritura = 1 if form.get(f'escritura_{i}') else 0
+        conversacion = 1 if form.get(f'conversacion_{i}') else 0
+        if not (idioma or folio_idioma or lectura or escritura or conversacion):
+            continue
+        candidato['idiomas'].append({
+            'idioma': idioma, 'lectura': lectura, 'escritura': escritura,
+            'conversacion': conversacion, 'folio': folio_idioma if folio_idioma else None
+        })
+
+    #docencia
+    candidato['docencia'] = []
+    for anio, inst, curso, horas, folio in zip_longest(
+        form.getlist('anio_doc[]'), form.getlist('institucion_docencia[]'), form.getlist('nombre_curso[]'),
+        form.getlist('horas_docencia[]'), form.getlist('folio_docencia[]'), fillvalue=""
+    ):
+        anio, inst, curso, horas, folio = (v.strip() for v in (anio, inst, curso, horas, folio))
+        if not (anio or inst or curso or horas or folio):
+            continue
+        candidato['docencia'].append({
+            'anio_doc': _entero(anio), 'institucion': inst, 'nombre_curso': curso,
+            'duracion_horas': _entero(horas), 'folio': folio if folio else None
+        })
+
+    #referencias
+    candidato['referencias'] = []
+    for nom, inst, puesto, tel in zip_longest(
+        form.getlist('nombre_ref[]'), form.getlist('institucion_ref[]'),
+        form.getlist('puesto_ref[]'), form.getlist('telefono_ref[]'), fillvalue=""
+    ):
+        nom, inst, puesto, tel = (v.strip() for v in (nom, inst, puesto, tel))
+        if not (nom or inst or puesto or tel):
+            continue
+        candidato['referencias'].append({
+            'nombre_apellido': nom, 'institucion': inst, 'puesto': puesto, 'telefono': tel if tel else None
+        })
+
+    #registro profesional
+    nombre_registro = (form.get('nombre_registro') or "").strip()
+    numero_registro = (form.get('numero_registro') or "").strip()
+    if nombre_registro or numero_registro:
+        candidato['registro'] = {'nombre': nombre_registro, 'numero_registro': numero_registro}
+
+    #pretension salarial
+    monto_bs = (form.get('monto_bs') or "").strip()
+    if monto_bs:
+        candidato['pretension'] = {'monto_bs': monto_bs}
+
+    #incompatibilidades (siempre se registran, aunque no se respondan)
+    candidato['incompatibilidades'] = {
+        'vinculacion_ministerio': form.get('prg1'),
+        'otra_actividad': form.get('prg2'),
+        'percibe_renta': form.get('prg3'),
+        'destitucion_sentencia': form.get('prg4'),
+    }
+
+    #declaracion
+    lugar_decl = (form.get('lugar_declaracion') or "").strip()
+    fecha_decl = (form.get('fecha_declaracion') or "").strip()
+    if lugar_decl or fecha_decl:
+        candidato['declaracion'] = {'lugar': lugar_decl, 'fecha': fecha_decl}
+
+    return candidato
+
+def filas_seccion(candidato, persona_id, clave):
+    """Parámetros de INSERT de una sección para executemany"""
+    tabla, columnas, _, una_sola = SECCIONES[clave]
+    valor = candidato.get(clave)
+    if not valor:
+        return []
+    filas = [valor] if una_sola else valor
+    return [(persona_id, *(fila.get(col) for col in columnas)) for fila in filas]
+
+def insertar_datos(cursor, candidato):
+    """Inserta la fila de datos (con sus claves de duplicados). Devuelve el persona_id"""
+    cursor.execute(
+        sql_insertar('datos', COLUMNAS_DATOS + ['clave_ci', 'clave_nombre', 'convocatoria_id']),
+        (*(candidato.get(col) for col in COLUMNAS_DATOS), *claves_candidato(candidato),
+         candidato.get('convocatoria_id'))
+    )
+    return cursor.lastrowid
+
+def insertar_candidato(cursor, candidato):
+    """Inserta un candidato con todas sus secciones. Devuelve el persona_id"""
+    persona_id = insertar_datos(cursor, candidato)
+
+    for clave, (tabla, columnas, _, _) in SECCIONES.items():
+        filas = filas_seccion(candidato, persona_id, clave)
+        if filas:
+            cursor.executemany(sql_insertar(tabla, ['persona_id'] + columnas), filas)
+
+    return persona_id
+
+# ==================== IMPORTACIÓN MASIVA ====================
+
+def _limpiar(v):
+    """Texto sin espacios sobrantes; vacío pasa a None"""
+    if isinstance(v, str):
+        v = v.strip()
+        return v if v else None
+    return v
+
+def _normalizar_fila(fila, columnas, obligatorias, contexto):
+    """Valida y convierte una fila de sección. Lanza ValueError si no es válida"""
+    if not isinstance(fila, dict):
+        raise ValueError(f"{contexto}: se esperaba un objeto")
+    resultado = {}
+    for col in columnas:
+        v = _limpiar(fila.get(col))
+        if col in COLUMNAS_ENTERAS and v is not None:
+            try:
+                v = int(v)
+            except (TypeError, ValueError):
+                raise ValueError(f"{contexto}.{col}: debe ser un número entero")
+        elif col in COLUMNAS_BOOLEANAS:
+            v = 1 if v in (1, True, "1", "si", "sí", "true", "True") else 0
+        elif v is not None and not isinstance(v, str):
+            v = str(v)
+        resultado[col] = v
+    faltantes = [col for col in obligatorias if resultado[col] is None]
+    if faltantes:
+        raise ValueError(f"{contexto}: faltan {', '.join(faltantes)}")
+    return resultado
+
+def validar_candidato(registro):
+    """
+    Valida un candidato importado (dict con las secciones anidadas).
+    Devuelve el candidato normalizado o lanza ValueError con el motivo.
+    """
+    if not isinstance(registro, dict):
+        raise ValueError("se esperaba un objeto")
+
+    candidato = _normalizar_fila(registro, COLUMNAS_DATOS, OBLIGATORIOS_DATOS, "datos")
+
+    for clave in SECCIONES:
+        valor = validar_seccion(clave, registro.get(clave))
+        if valor:
+            candidato[clave] = valor
+
+    return candidato
+
+def validar_seccion(clave, valor):
+    """Normaliza una sección (None si viene vacía). Lanza ValueError si no es válida"""
+    tabla, columnas, obligatorias, una_sola = SECCIONES[clave]
+    if isinstance(valor, str):
+        # En CSV las secciones vienen como JSON dentro de la celda
+        valor = json.loads(valor) if valor.strip() else None
+    if not valor:
+        return None
+    if una_sola:
+        seccion = _normalizar_fila(valor, columnas, obligatorias, clave)
+    else:
+        if not isinstance(valor, list):
+            raise ValueError(f"{clave}: se esperaba una lista")
+        seccion = [
+            _normalizar_fila(fila, columnas, obligatorias, f"{clave}[{i}]")
+            for i, fila in enumerate(valor)
+        ]
+
+    if clave == 'paquetes':
+        for p in seccion:
+            if p['nivel'] not in NIVELES_PAQUETE:
+                raise ValueError(f"paquetes: nivel debe ser uno de {', '.join(NIVELES_PAQUETE)}")
+    if clave == 'incompatibilidades':
+        for col, v in seccion.items():
+            if v is not None and v not in RESPUESTAS_SI_NO:
+                raise ValueError(f"incompatibilidades.{col}: debe ser 'si' o 'no'")
+
+    return seccion
+
+def leer_registros(archivo, formato):
+    """
+    Lee candidatos de un archivo de texto abierto.
+    formato: 'jsonl' (un objeto por línea) o 'csv' (secciones como JSON en su columna).
+    Genera (numero_de_fila, registro); los errores de formato se devuelven como excepción.
+    """
+    if formato == 'csv':
+        for n, fila in enumerate(csv.DictReader(archivo), start=2):
+            yield n, fila
+    else:
+        for n, linea in enumerate(archivo, start=1):
+            if not linea.strip():
+                continue
+            try:
+                yield n, json.loads(linea)
+            except json.JSONDecodeError as e:
+                yield n, ValueError(f"JSON inválido: {e.msg}")
+
+def _insertar_lote(conn, lote, bloquear_ci):
+    """
+    Inserta un lote de candidatos validados en la transacción abierta de conn.
+    datos se inserta fila por fila (hace falta el id); las secciones con executemany.
+    Devuelve (insertados, errores por fila).
+    """
+    cursor = conn.cursor()
+    filas = {clave: [] for clave in SECCIONES}
+    insertados = 0
+    errores = []
+
+    for n, candidato in lote:
+        c_ci = claves_candidato(candidato)[0]
+        if bloquear_ci and c_ci and cursor.execute(
+            "SELECT 1 FROM datos WHERE clave_ci = ?", (c_ci,)
+        ).fetchone():
+            errores.append({'fila': n, 'error': "duplicado: ya existe un postulante con ese CI"})
+            continue
+        try:
+            persona_id = insertar_datos(cursor, candidato)
+        except sqlite3.IntegrityError as e:
+            errores.append({'fila': n, 'error': f"duplicado: {e}"})
+            continue
+        insertados += 1
+        for clave in SECCIONES:
+            filas[clave].extend(filas_seccion(candidato, persona_id, clave))
+
+    for clave, (tabla, columnas, _, _) in SECCIONES.items():
+        if filas[clave]:
+            cursor.executemany(sql_insertar(tabla, ['persona_id'] + columnas), filas[clave])
+    return insertados, errores
+
+def importar_candidatos(escribir_lote, registros, tam_lote=1000, bloquear_ci=True, convocatoria_id=None):
+    """
+    Importa candidatos en lotes de tam_lote, cada lote en una transacción.
+    escribir_lote(escribir) corre escribir(conn) en una transacción de escritura
+    (BEGIN IMMEDIATE, ver escritura.transaccion_escritura) y devuelve su resultado.
+    registros: iterable de (numero_de_fila, registro) como el de leer_registros.
+    bloquear_ci rechaza las filas cuyo CI+expedido ya está registrado.
+    convocatoria_id se asigna a todos los candidatos (como a los formularios).
+    Un lote que no se puede escribir (base ocupada, error de SQLite) no corta la
+    importación: sus filas quedan en errores y se sigue con el siguiente.
+    No genera PDF. Devuelve un informe con totales, errores por fila y filas/segundo.
+    """
+    inicio = time.perf_counter()
+    errores = []
+    importados = leidos = lotes_fallidos = 0
+    lote = []
+
+    def escribir(lote):
+        nonlocal importados, lotes_fallidos
+        try:
+            insertados, errores_lote = escribir_lote(lambda conn: _insertar_lote(conn, lote, bloquear_ci))
+        except (sqlite3.Error, EscrituraOcupada) as e:
+            lotes_fallidos += 1
+            errores.extend({'fila': n, 'error': f"lote no importado: {e}"} for n, _ in lote)
+            return
+        importados += insertados
+        errores.extend(errores_lote)
+
+    for n, registro in registros:
+        leidos += 1
+        try:
+            if isinstance(registro, Exception):
+                raise registro
+            candidato = validar_candidato(registro)
+        except (ValueError, TypeError) as e:
+            errores.append({'fila': n, 'error': str(e)})
+            continue
+        if convocatoria_id is not None:
+            candidato['convocatoria_id'] = convocatoria_id
+        lote.append((n, candidato))
+
+        if len(lote) >= tam_lote:
+            escribir(lote)
+            lote = []
+
+    if lote:
+        escribir(lote)
+
+    segundos = time.perf_counter() - inicio
+    return {
+        'leidos': leidos,
+        'importados': importados,
+        'lotes_fallidos': lotes_fallidos,
+        'errores': sorted(errores, key=lambda e: e['fila']),
+        'segundos': round(segundos, 3),
+        'filas_por_segundo': round(leidos / segundos, 1) if segundos else 0,
+    }
+
+# ==================== EDICIÓN ====================
+# Corregir un formulario ya enviado sin borrarlo y volver a crearlo: se compara
+# cada sección enviada con las filas guardadas y solo se escriben las filas que
+# cambian. Los triggers suben datos.version una vez por fila escrita, así que
+# una edición sin cambios no invalida nada.
+
+# Columnas de datos de las que dependen las claves de duplicados
+COLUMNAS_CLAVES = ('ci', 'exp', 'nombres', 'ap_pat', 'ap_mat')
+
+def leer_candidato(conn, persona_id):
+    """
+    Candidato guardado: columnas de datos y, por sección, la lista de filas
+    guardadas (dict con su id). None si la persona no existe.
+    """
+    fila = conn.execute(f"SELECT {', '.join(COLUMNAS_DATOS)} FROM datos WHERE id = ?", (persona_id,)).fetchone()
+    if fila is None:
+        return None
+    candidato = dict(zip(COLUMNAS_DATOS, fila))
+    for clave, (tabla, columnas, _, _) in SECCIONES.items():
+        candidato[clave] = [
+            dict(zip(['id'] + columnas, f)) for f in conn.execute(
+                f"SELECT id, {', '.join(columnas)} FROM {tabla} WHERE persona_id = ? ORDER BY id",
+                (persona_id,)
+            )
+        ]
+    return candidato
+
+def _id_fila(fila, clave, i):
+    fila_id = fila.get('id') if isinstance(fila, dict) else None
+    if fila_id is None:
+        return None
+    try:
+        return int(fila_id)
+    except (TypeError, ValueError):
+        raise ValueError(f"{clave}[{i}].id: debe ser un número entero")
+
+def validar_edicion(guardado, cambios):
+    """
+    Valida una edición: las columnas de datos y las secciones enviadas (mismo
+    formato que la importación). Lo que no se envía no se toca; una sección
+    enviada reemplaza a la guardada y sus filas pueden traer el id de la fila
+    que corrigen. Devuelve {'datos': {col: valor}, 'secciones': {clave: (filas, ids)}}
+    con solo las columnas de datos que cambian. Lanza ValueError.
+    """
+    if not isinstance(cambios, dict):
+        raise ValueError("se esperaba un objeto")
+    desconocidas = set(cambios) - set(COLUMNAS_DATOS) - set(SECCIONES)
+    if desconocidas:
+        raise ValueError(f"campos desconocidos: {', '.join(sorted(desconocidas))}")
+
+    enviados = [col for col in COLUMNAS_DATOS if col in cambios]
+    datos = _normalizar_fila(
+        {**{col: guardado[col] for col in COLUMNAS_DATOS}, **{col: cambios[col] for col in enviados}},
+        COLUMNAS_DATOS, OBLIGATORIOS_DATOS, "datos"
+    )
+
+    secciones = {}
+    for clave, (_, _, _, una_sola) in SECCIONES.items():
+        if clave not in cambios:
+            continue
+        valor = cambios[clave]
+        ids = [] if una_sola or not isinstance(valor, list) else [
+            _id_fila(fila, clave, i) for i, fila in enumerate(valor)
+        ]
+        seccion = validar_seccion(clave, valor)
+        if una_sola:
+            secciones[clave] = ([seccion], [None]) if seccion else ([], [])
+        else:
+            secciones[clave] = (seccion or [], ids if seccion else [])
+
+    return {
+        'datos': {col: datos[col] for col in enviados if datos[col] != guardado[col]},
+        'secciones': secciones,
+    }
+
+def diferencias_filas(guardadas, nuevas, ids):
+    """
+    Operaciones mínimas para pasar de las filas guardadas (dict con id) a las nuevas.
+    Una fila nueva con id corrige esa fila; sin id, si es igual a una guardada
+    se deja como está y si no ocupa una guardada que sobra (o se inserta).
+    Devuelve (insertar [fila], actualizar [(id, {col: valor})], eliminar [id]).
+    """
+    libres = {f['id']: f for f in guardadas}
+    pares = []
+    sin_id = []
+    for fila, fila_id in zip(nuevas, ids):
+        if fila_id is None:
+            sin_id.append(fila)
+        elif fila_id in libres:
+            pares.append((libres.pop(fila_id), fila))
+        else:
+            raise ValueError(f"la fila {fila_id} no es de esta persona o está repetida")
+
+    sin_pareja = []
+    for fila in sin_id:
+        igual = next((g for g in libres.values() if all(g[col] == v for col, v in fila.items())), None)
+        if igual is not None:
+            del libres[igual['id']]
+        else:
+            sin_pareja.append(fila)
+
+    insertar = []
+    for fila in sin_pareja:
+        if libres:
+            pares.append((libres.pop(next(iter(libres))), fila))
+        else:
+            insertar.append(fila)
+
+    actualizar = []
+    for guardada, fila in pares:
+        distintas = {col: v for col, v in fila.items() if guardada[col] != v}
+        if distintas:
+            actualizar.append((guardada['id'], distintas))
+    return insertar, actualizar, list(libres)
+
+def aplicar_edicion(cursor, persona_id, guardado, edicion):
+    """
+    Escribe la edición validada con el mínimo de INSERT/UPDATE/DELETE.
+    Devuelve cuántas filas se escribieron por sección.
+    """
+    resumen = {}
+
+    datos = dict(edicion['datos'])
+    if datos:
+        if any(col in datos for col in COLUMNAS_CLAVES):
+            datos['clave_ci'], datos['clave_nombre'] = claves_candidato({**guardado, **datos})
+        cursor.execute(
+            f"UPDATE datos SET {', '.join(f'{col} = ?' for col in datos)} WHERE id = ?",
+            (*datos.values(), persona_id)
+        )
+        resumen['datos'] = sorted(edicion['datos'])
+
+    for clave, (nuevas, ids) in edicion['secciones'].items():
+        tabla, columnas, _, _ = SECCIONES[clave]
+        insertar, actualizar, eliminar = diferencias_filas(guardado[clave], nuevas, ids)
+        if insertar:
+            cursor.executemany(
+                sql_insertar(tabla, ['persona_id'] + columnas),
+                [(persona_id, *(fila[col] for col in columnas)) for fila in insertar]
+            )
+        for fila_id, distintas in actualizar:
+            cursor.execute(
+                f"UPDATE {tabla} SET {', '.join(f'{col} = ?' for col in distintas)} WHERE id = ?",
+                (*distintas.values(), fila_id)
+            )
+        if eliminar:
+            cursor.executemany(f"DELETE FROM {tabla} WHERE id = ?", [(fila_id,) for fila_id in eliminar])
+        if insertar or actualizar or eliminar:
+            resumen[clave] = {'insertadas': len(insertar), 'actualizadas': len(actualizar),
+                              'eliminadas': len(eliminar)}
+
+    return resumen
@@ -0,0 +1,83 @@
+import re
+import unicodedata
+
+# Claves de bloqueo para detectar postulantes repetidos con distinto correo.
+# Se guardan en datos.clave_ci y datos.clave_nombre (con índice), así la búsqueda
+# es por igualdad en el índice y el informe completo es un GROUP BY, no una
+# comparación de todos contra todos.
+
+def _plegar(texto):
+    """Minúsculas, sin tildes y con espacios simples"""
+    texto = unicodedata.normalize("NFKD", texto or "")
+    texto = "".join(ch for ch in texto if not unicodedata.combining(ch))
+    texto = re.sub(r"[^\w\s]", " ", texto.casefold())
+    return " ".join(texto.split())
+
+def clave_ci(ci, exp):
+    """CI + expedido normalizados ('1234567-1A', 'lp' -> '12345671A|LP')"""
+    ci = re.sub(r"[^0-9A-Za-z]", "", str(ci or "")).upper().lstrip("0")
+    if not ci:
+        return None
+    exp = re.sub(r"[^0-9A-Za-z]", "", str(exp or "")).upper()
+    return f"{ci}|{exp}"
+
+def clave_nombre(nombres, ap_pat, ap_mat):
+    """Nombre completo plegado ('José  PÉREZ', '' -> 'jose|perez|')"""
+    partes = [_plegar(nombres), _plegar(ap_pat), _plegar(ap_mat)]
+    if not any(partes):
+        return None
+    return "|".join(partes)
+
+def claves_candidato(candidato):
+    """(clave_ci, clave_nombre) de un candidato o fila de datos"""
+    return (
+        clave_ci(candidato.get('ci'), candidato.get('exp')),
+        clave_nombre(candidato.get('nombres'), candidato.get('ap_pat'), candidato.get('ap_mat')),
+    )
+
+def buscar_duplicados(conn, candidato, excluir_id=None):
+    """
+    Postulantes ya registrados con el mismo CI+expedido o el mismo nombre.
+    Devuelve una lista de dict con id, correo y motivo ('ci' o 'nombre').
+    """
+    c_ci, c_nombre = claves_candidato(candidato)
+    encontrados = []
+    for columna, clave in (('clave_ci', c_ci), ('clave_nombre', c_nombre)):
+        if clave is None:
+            continue
+        for row in conn.execute(
+            f"SELECT id, correo FROM datos WHERE {columna} = ? AND id IS NOT ?",
+            (clave, excluir_id)
+        ):
+            encontrados.append({'id': row[0], 'correo': row[1], 'motivo': columna[len('clave_'):]})
+    return encontrados
+
+def informe_duplicados(conn):
+    """
+    Grupos de postulantes con la misma clave en toda la tabla.
+    Un recorrido del índice por clave: tiempo casi lineal en la cantidad de filas.
+    """
+    informe = {}
+    for columna in ('clave_ci', 'clave_nombre'):
+        grupos = []
+        for clave, ids in conn.execute(
+            f"""
+            SELECT {columna}, GROUP_CONCAT(id) FROM datos
+            WHERE {columna} IS NOT NULL
+            GROUP BY {columna} HAVING COUNT(*) > 1
+            ORDER BY {columna}
+            """
+        ):
+            grupos.append({'clave': clave, 'ids': sorted(int(i) for i in ids.split(','))})
+        informe[columna[len('clave_'):]] = grupos
+    return informe
+
+def completar_claves(cursor):
+    """Calcula las claves de las filas de datos que aún no las tienen"""
+    filas = cursor.execute(
+        "SELECT id, ci, exp, nombres, ap_pat, ap_mat FROM datos WHERE clave_ci IS NULL AND clave_nombre IS NULL"
+    ).fetchall()
+    cursor.executemany(
+        "UPDATE datos SET clave_ci = ?, clave_nombre = ? WHERE id = ?",
+        [(*claves_candidato(dict(zip(('id', 'ci', 'exp', 'nombres', 'ap_pat', 'ap_mat'), f))), f[0]) for f in filas]
+    )
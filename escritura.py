@@ -0,0 +1,209 @@
+import time
+import queue
+import random
+import sqlite3
+import threading
+from concurrent.futures import Future
+
+# Escrituras cortas con espera acotada por el lock de SQLite.
+# Solo puede haber un escritor a la vez: la transacción toma el lock al empezar
+# (BEGIN IMMEDIATE), espera con busy_timeout y, si igual no lo consigue, se
+# reintenta después de una pausa aleatoria para que los que chocaron no
+# vuelvan a intentarlo todos juntos.
+
+class EscrituraOcupada(Exception):
+    """No se obtuvo el lock de escritura después de todos los reintentos"""
+
+class MetricasEscritura:
+    """Espera por el lock de escritura (por proceso)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.escrituras = 0
+        self.fallidas = 0
+        self.reintentos = 0
+        self.espera_total = 0.0
+        self.espera_max = 0.0
+
+    def registrar(self, espera, reintentos, ok=True):
+        with self._lock:
+            if ok:
+                self.escrituras += 1
+            else:
+                self.fallidas += 1
+            self.reintentos += reintentos
+            self.espera_total += espera
+            self.espera_max = max(self.espera_max, espera)
+
+    def resumen(self):
+        with self._lock:
+            total = self.escrituras + self.fallidas
+            return {
+                'escrituras': self.escrituras,
+                'fallidas': self.fallidas,
+                'reintentos': self.reintentos,
+                'espera_media_ms': round(self.espera_total / total * 1000, 2) if total else 0.0,
+                'espera_max_ms': round(self.espera_max * 1000, 2),
+            }
+
+def lock_ocupado(error):
+    """El error es 'database is locked' / 'database is busy'"""
+    mensaje = str(error).lower()
+    return 'locked' in mensaje or 'busy' in mensaje
+
+def transaccion_escritura(abrir, escribir, busy_timeout_ms=5000, reintentos=3,
+                          pausa_base=0.05, metricas=None):
+    """
+    Ejecuta escribir(conn) en una transacción BEGIN IMMEDIATE y confirma.
+    abrir() devuelve una conexión nueva, que se cierra al terminar.
+    Devuelve (resultado de escribir, segundos de espera por el lock).
+    Lanza EscrituraOcupada si el lock no se obtiene tras los reintentos.
+    """
+    espera = 0.0
+    for intento in range(reintentos + 1):
+        conn = abrir()
+        try:
+            conn.execute(f"PRAGMA busy_timeout = {int(busy_timeout_ms)}")
+            inicio = time.perf_counter()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+            except sqlite3.OperationalError as e:
+                espera += time.perf_counter() - inicio
+                if not lock_ocupado(e):
+                    raise
+                if intento == reintentos:
+                    if metricas:
+                        metricas.registrar(espera, intento, ok=False)
+                    raise EscrituraOcupada(str(e)) from e
+                # Backoff exponencial con jitter completo
+                pausa = random.uniform(0, pausa_base * 2 ** intento)
+                time.sleep(pausa)
+                espera += pausa
+                continue
+            espera += time.perf_counter() - inicio
+
+            try:
+                resultado = escribir(conn)
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+        finally:
+            conn.close()
+
+        if metricas:
+            metricas.registrar(espera, intento)
+        return resultado, espera
+
+class EscritorGrupal:
+    """
+    Hilo escritor único por proceso. Los workers le pasan funciones escribir(conn)
+    y reciben un Future con el resultado. El hilo junta los trabajos que llegan
+    juntos (hasta max_grupo, esperando como mucho espera_grupo segundos) y los
+    confirma en una sola transacción: un commit (un fsync) por grupo.
+    Cada trabajo corre en su propio SAVEPOINT: si falla, se deshace solo ese.
+    """
+
+    def __init__(self, abrir, max_grupo=32, espera_grupo=0.005, max_cola=1000,
+                 busy_timeout_ms=5000, metricas=None):
+        self.abrir = abrir
+        self.max_grupo = max_grupo
+        self.espera_grupo = espera_grupo
+        self.busy_timeout_ms = busy_timeout_ms
+        self.metricas = metricas
+        self._cola = queue.Queue(max_cola)
+        self._conn = None
+        self.grupos = 0
+        self.trabajos = 0
+        self.grupo_max = 0
+        self._hilo = threading.Thread(target=self._ciclo, name="escritor", daemon=True)
+        self._hilo.start()
+
+    def enviar(self, escribir):
+        """Encola escribir(conn); lanza EscrituraOcupada si la cola está llena"""
+        futuro = Future()
+        try:
+            self._cola.put_nowait((escribir, futuro, time.perf_counter()))
+        except queue.Full:
+            raise EscrituraOcupada("cola de escritura llena")
+        return futuro
+
+    def estadisticas(self):
+        return {
+            'en_cola': self._cola.qsize(),
+            'max_cola': self._cola.maxsize,
+            'grupos': self.grupos,
+            'trabajos': self.trabajos,
+            'grupo_medio': round(self.trabajos / self.grupos, 2) if self.grupos else 0.0,
+            'grupo_max': self.grupo_max,
+        }
+
+    def _juntar_grupo(self):
+        grupo = [self._cola.get()]
+        limite = time.perf_counter() + self.espera_grupo
+        while len(grupo) < self.max_grupo:
+            restante = limite - time.perf_counter()
+            try:
+                grupo.append(self._cola.get(timeout=restante) if restante > 0 else self._cola.get_nowait())
+            except queue.Empty:
+                break
+        return grupo
+
+    def _conexion(self):
+        if self._conn is None:
+            self._conn = self.abrir()
+            self._conn.isolation_level = None  # BEGIN / SAVEPOINT / COMMIT explícitos
+            self._conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        return self._conn
+
+    def _ciclo(self):
+        while True:
+            grupo = self._juntar_grupo()
+            try:
+                self._escribir_grupo(grupo)
+            except BaseException as e:
+                # Error de la transacción entera (lock, disco): falla todo el grupo
+                for _, futuro, _ in grupo:
+                    if not futuro.done():
+                        futuro.set_exception(e if isinstance(e, Exception) else RuntimeError(str(e)))
+                if self._conn is not None:
+                    self._conn.close()
+                    self._conn = None
+
+    def _escribir_grupo(self, grupo):
+        conn = self._conexion()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError as e:
+            if lock_ocupado(e):
+                raise EscrituraOcupada(str(e)) from e
+            raise
+
+        listos = []
+        try:
+            for escribir, futuro, encolado in grupo:
+                conn.execute("SAVEPOINT trabajo")
+                try:
+                    resultado = escribir(conn)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO trabajo")
+                    conn.execute("RELEASE trabajo")
+                    futuro.set_exception(e)
+                    continue
+                conn.execute("RELEASE trabajo")
+                listos.append((futuro, resultado, encolado))
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+        fin = time.perf_counter()
+        self.grupos += 1
+        self.trabajos += len(grupo)
+        self.grupo_max = max(self.grupo_max, len(grupo))
+        for futuro, resultado, encolado in listos:
+            if self.metricas:
+                # Para el que envía, la espera es la cola más la transacción del grupo
+                self.metricas.registrar(fin - encolado, 0)
+            futuro.set_result(resultado)
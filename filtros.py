@@ -0,0 +1,260 @@
+from reportes import ETIQUETAS_GRADO, SQL_MESES, SQL_EXPERIENCIA_VALIDA
+
+# Filtro de postulantes por varios criterios a la vez ("5 años de experiencia,
+# lee y habla inglés, Excel muy bueno, vive en La Paz, sin incompatibilidades").
+# Cada criterio es una consulta que devuelve persona_id leyendo solo un índice
+# compuesto que termina en persona_id, y el resultado es su intersección (ver
+# consulta_filtro). Las páginas van por clave (persona_id > desde), así una
+# página cuesta lo mismo al principio que al final.
+# Ciudad, idioma, paquete y grado se leen de tablero_persona (ver tablero.py),
+# que ya tiene esos valores normalizados por persona; la experiencia total se
+# mantiene aparte en experiencia_persona.
+
+HABILIDADES_IDIOMA = ('lectura', 'escritura', 'conversacion')
+NIVELES_PAQUETE = ('regular', 'bueno', 'muy_bueno')
+
+# Experiencia total en meses por persona, como en el ranking: el resumen
+# guardado o, si no hay, la suma de sus filas de experiencia
+def _sql_meses_persona(persona):
+    return f"""
+        COALESCE(
+            (SELECT total_anios * 12 + total_meses FROM resumen_experiencia WHERE persona_id = {persona}),
+            (SELECT SUM(MAX(0, {SQL_MESES})) FROM experiencia
+             WHERE persona_id = {persona} AND {SQL_EXPERIENCIA_VALIDA})
+        )
+    """
+
+def crear_indices_filtros(cursor):
+    """Tabla de experiencia por persona con sus triggers e índices compuestos de cada criterio"""
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS experiencia_persona(
+        persona_id INTEGER PRIMARY KEY,
+        meses INTEGER NOT NULL
+        )
+        """
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_experiencia_persona_meses ON experiencia_persona(meses, persona_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_experiencia_persona ON experiencia(persona_id)")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_tablero_persona_valor ON tablero_persona(dimension, valor, detalle, persona_id)"
+    )
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_incompatibilidades_respuestas ON incompatibilidades(
+        vinculacion_ministerio, otra_actividad, percibe_renta, destitucion_sentencia, persona_id)
+        """
+    )
+
+    for tabla, columnas in (('experiencia', ['desde', 'hasta']),
+                            ('resumen_experiencia', ['total_anios', 'total_meses'])):
+        triggers = {
+            'i': (f"AFTER INSERT ON {tabla}", "NEW"),
+            'u': (f"AFTER UPDATE OF {', '.join(columnas)}, persona_id ON {tabla}", "NEW"),
+            'm': (f"AFTER UPDATE OF persona_id ON {tabla} WHEN OLD.persona_id IS NOT NEW.persona_id", "OLD"),
+            'd': (f"AFTER DELETE ON {tabla}", "OLD"),
+        }
+        for letra, (momento, fila) in triggers.items():
+            nombre = f"{tabla}_filtro_{letra}"
+            persona = f"{fila}.persona_id"
+            cursor.execute(f"DROP TRIGGER IF EXISTS {nombre}")
+            cursor.execute(
+                f"""
+                CREATE TRIGGER {nombre} {momento}
+                BEGIN
+                    DELETE FROM experiencia_persona WHERE persona_id = {persona};
+                    INSERT INTO experiencia_persona (persona_id, meses)
+                    SELECT {persona}, meses FROM (SELECT {_sql_meses_persona(persona)} AS meses)
+                    WHERE meses IS NOT NULL;
+                END
+                """
+            )
+
+def reconstruir_filtros(cursor):
+    """Recalcula experiencia_persona completa (al crear o cambiar la tabla)"""
+    cursor.execute("DELETE FROM experiencia_persona")
+    cursor.execute(
+        f"""
+        INSERT INTO experiencia_persona (persona_id, meses)
+        SELECT persona_id, meses FROM (
+            SELECT p.persona_id, ({_sql_meses_persona('p.persona_id')}) AS meses
+            FROM (SELECT persona_id FROM resumen_experiencia
+                  UNION SELECT persona_id FROM experiencia) p
+        )
+        WHERE meses IS NOT NULL
+        """
+    )
+
+def leer_criterios(args):
+    """
+    Criterios desde los parámetros del request (ValueError si alguno no es válido):
+    ciudad=La Paz (repetible: cualquiera de ellas), idioma=inglés:lectura,conversacion
+    (repetible), paquete=excel:bueno (nivel mínimo; repetible), experiencia_min=5
+    (años), grado_min=5 (nivel de reportes.NIVELES_GRADO) y sin_incompatibilidades=1.
+    """
+    criterios = {}
+
+    ciudades = [c.strip() for c in args.getlist('ciudad') if c.strip()]
+    if ciudades:
+        criterios['ciudades'] = ciudades
+
+    idiomas = []
+    for valor in args.getlist('idioma'):
+        idioma, _, habilidades = valor.partition(':')
+        habilidades = [h.strip() for h in habilidades.split(',') if h.strip()]
+        if not idioma.strip() or any(h not in HABILIDADES_IDIOMA for h in habilidades):
+            raise ValueError(f"Idioma no válido: {valor}")
+        idiomas.append((idioma.strip(), habilidades))
+    if idiomas:
+        criterios['idiomas'] = idiomas
+
+    paquetes = []
+    for valor in args.getlist('paquete'):
+        paquete, _, nivel = valor.partition(':')
+        nivel = nivel.strip()
+        if not paquete.strip() or (nivel and nivel not in NIVELES_PAQUETE):
+            raise ValueError(f"Paquete no válido: {valor}")
+        paquetes.append((paquete.strip(), nivel))
+    if paquetes:
+        criterios['paquetes'] = paquetes
+
+    if args.get('experiencia_min'):
+        anios = float(args.get('experiencia_min'))
+        if anios < 0:
+            raise ValueError("experiencia_min no puede ser negativa")
+        criterios['experiencia_meses'] = round(anios * 12)
+
+    if args.get('grado_min'):
+        grado = int(args.get('grado_min'))
+        if grado not in ETIQUETAS_GRADO:
+            raise ValueError(f"Grado no válido: {grado}")
+        criterios['grado_min'] = grado
+
+    if args.get('sin_incompatibilidades') in ('1', 'si', 'true'):
+        criterios['sin_incompatibilidades'] = True
+
+    return criterios
+
+# Los criterios que no están en el tablero se cuentan hasta este tope para
+# elegir el más selectivo
+TOPE_ESTIMACION = 20000
+
+def _criterio(cuerpo, params, columna='persona_id', ramas=None, conteo=None):
+    """
+    Un criterio del filtro:
+    - cuerpo/params: FROM ... WHERE ... con las personas que lo cumplen;
+    - ramas: las mismas personas en rangos de un índice que termina en
+      persona_id (se leen ya ordenadas);
+    - conteo: SELECT de cuántas personas lo cumplen (aproximado).
+    """
+    return {
+        'cuerpo': cuerpo,
+        'params': params,
+        'columna': columna,
+        'ramas': ramas or [(cuerpo, params)],
+        'conteo': conteo or (f"SELECT COUNT(*) FROM (SELECT 1 {cuerpo} LIMIT {TOPE_ESTIMACION})", params),
+    }
+
+def _clave(dimension, valores, detalles):
+    """Criterio: personas con alguna de las claves (dimension, valor, detalle) en tablero_persona"""
+    condicion = (
+        f"dimension = '{dimension}' AND valor IN ({', '.join('?' * len(valores))})"
+        f" AND detalle IN ({', '.join('?' * len(detalles))})"
+    )
+    params = list(valores) + list(detalles)
+    return _criterio(
+        f"FROM tablero_persona WHERE {condicion}", params,
+        # Una rama por clave
+        ramas=[
+            (f"FROM tablero_persona WHERE dimension = '{dimension}' AND valor = ? AND detalle = ?", [valor, detalle])
+            for valor in valores for detalle in detalles
+        ],
+        # El tablero ya tiene la cantidad de personas de cada clave
+        conteo=(f"SELECT COALESCE(SUM(postulantes), 0) FROM tablero WHERE {condicion}", params),
+    )
+
+def terminos_filtro(criterios):
+    """Un criterio de _criterio por cada condición pedida"""
+    terminos = []
+    if 'ciudades' in criterios:
+        terminos.append(_clave('ciudad', criterios['ciudades'], ['']))
+    for idioma, habilidades in criterios.get('idiomas', []):
+        for habilidad in habilidades or ['']:
+            terminos.append(_clave('idioma', [idioma], [habilidad]))
+    for paquete, nivel in criterios.get('paquetes', []):
+        niveles = NIVELES_PAQUETE[NIVELES_PAQUETE.index(nivel):] if nivel else ['']
+        terminos.append(_clave('paquete', [paquete], niveles))
+    if 'grado_min' in criterios:
+        niveles = [str(n) for n in ETIQUETAS_GRADO if n >= criterios['grado_min']]
+        terminos.append(_clave('grado', niveles, ['']))
+    if 'experiencia_meses' in criterios:
+        terminos.append(_criterio("FROM experiencia_persona WHERE meses >= ?", [criterios['experiencia_meses']]))
+    if criterios.get('sin_incompatibilidades'):
+        terminos.append(_criterio(
+            """
+            FROM incompatibilidades
+            WHERE vinculacion_ministerio = 'no' AND otra_actividad = 'no'
+            AND percibe_renta = 'no' AND destitucion_sentencia = 'no'
+            """,
+            []
+        ))
+    if not terminos:
+        terminos.append(_criterio("FROM datos WHERE 1", [], 'id'))
+    return terminos
+
+def consulta_filtro(conn, criterios, desde=0, limite=100):
+    """
+    SELECT de una página de ids y sus parámetros. Un INTERSECT de los criterios
+    armaría el conjunto completo de cada uno antes de cortar la página; en
+    cambio se recorre en orden de persona_id el criterio con menos personas
+    (sus ramas mezcladas con UNION) y cada persona se busca en el índice de los
+    demás (EXISTS), hasta juntar `limite`.
+    """
+    terminos = terminos_filtro(criterios)
+    for termino in terminos:
+        sql, params = termino['conteo']
+        termino['personas'] = conn.execute(sql, params).fetchone()[0]
+    terminos.sort(key=lambda t: t['personas'])
+
+    guia, resto = terminos[0], terminos[1:]
+    columna = guia['columna']
+    ramas = guia['ramas']
+    if guia['cuerpo'].startswith("FROM experiencia_persona") and guia['personas'] < TOPE_ESTIMACION:
+        # Pocas personas con esa experiencia: se buscan por meses. Sin estadísticas
+        # del rango, SQLite prefiere recorrer la tabla en orden de persona_id
+        ramas = [(cuerpo.replace("FROM experiencia_persona",
+                                 "FROM experiencia_persona INDEXED BY idx_experiencia_persona_meses", 1), parametros)
+                 for cuerpo, parametros in ramas]
+    selects, params = [], []
+    for cuerpo, parametros in ramas:
+        sql = f"SELECT DISTINCT {columna} AS guia {cuerpo} AND {columna} > ?"
+        params.extend(parametros + [desde])
+        for otro in resto:
+            sql += f" AND EXISTS (SELECT 1 {otro['cuerpo']} AND {otro['columna']} = guia)"
+            params.extend(otro['params'])
+        selects.append(sql)
+    return " UNION ".join(selects) + " ORDER BY guia LIMIT ?", params + [limite]
+
+def filtrar(fuentes, criterios, desde=0, limite=100):
+    """
+    Ids que cumplen todos los criterios, en orden, después de `desde`.
+    fuentes: funciones que abren cada shard, en orden de shard (los ids de un
+    shard son mayores que los del anterior). Devuelve (ids, siguiente); con
+    siguiente=None no hay más páginas.
+    """
+    ids = []
+    for abrir in fuentes:
+        faltan = limite + 1 - len(ids)
+        if faltan <= 0:
+            break
+        conn = abrir()
+        if conn is None:
+            continue
+        try:
+            sql, params = consulta_filtro(conn, criterios, desde, faltan)
+            ids.extend(row[0] for row in conn.execute(sql, params))
+        finally:
+            conn.close()
+    if len(ids) > limite:
+        return ids[:limite], ids[limite - 1]
+    return ids, None
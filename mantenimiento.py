@@ -0,0 +1,126 @@
+import os
+import time
+import sqlite3
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin lock entre procesos
+    fcntl = None
+
+from salud import estado_wal
+
+# Mantenimiento de las bases en segundo plano, fuera del camino de los requests:
+# - checkpoint PASSIVE cuando el WAL tiene frames sin copiar (no bloquea a nadie);
+# - checkpoint TRUNCATE cuando el -wal pasa de un tamaño (lo devuelve a 0 bytes);
+#   si pasa del doble, se intenta aunque el PASSIVE no haya terminado;
+# - PRAGMA optimize cada tanto (ANALYZE acotado donde hace falta).
+# Con el hilo activo, las conexiones de los requests usan un wal_autocheckpoint
+# alto (WAL_AUTOCHECKPOINT): en la práctica un request no paga el checkpoint
+# del commit que llena el WAL, pero si el hilo no da abasto el WAL no crece sin límite.
+# Cada worker tiene su hilo, pero solo el que obtiene el lock del archivo trabaja;
+# si ese worker muere, otro toma el lock en su siguiente vuelta.
+
+class Mantenimiento:
+    """Hilo de checkpoints y PRAGMA optimize con los tiempos de cada paso"""
+
+    def __init__(self, rutas, archivo_lock, intervalo=1, wal_max_bytes=64 * 1024 * 1024,
+                 intervalo_optimize=3600, busy_timeout_ms=1000, registrar=print):
+        self.rutas = rutas  # función que devuelve las rutas de las bases
+        self.archivo_lock = archivo_lock
+        self.intervalo = intervalo
+        self.wal_max_bytes = wal_max_bytes
+        self.intervalo_optimize = intervalo_optimize
+        self.busy_timeout_ms = busy_timeout_ms
+        self.registrar = registrar
+        self.lider = fcntl is None
+        self._lock_archivo = None
+        self._lock = threading.Lock()
+        self._ultimo_optimize = time.monotonic()
+        self.vueltas = 0
+        self.errores = 0
+        self.pasos = {}  # ruta -> {'passive'|'truncate'|'optimize': último resultado}
+        self._hilo = threading.Thread(target=self._ciclo, name="mantenimiento", daemon=True)
+
+    def iniciar(self):
+        self._hilo.start()
+        return self
+
+    def _tomar_lock(self):
+        if self.lider:
+            return True
+        archivo = open(self.archivo_lock, "w")
+        try:
+            fcntl.flock(archivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            archivo.close()
+            return False
+        self._lock_archivo = archivo  # el lock vive mientras viva el proceso
+        self.lider = True
+        return True
+
+    def _paso(self, ruta, nombre, sql, busy_timeout_ms=None):
+        """Ejecuta un paso sobre la base y guarda su duración y resultado"""
+        inicio = time.perf_counter()
+        conn = sqlite3.connect(ruta)
+        try:
+            espera = self.busy_timeout_ms if busy_timeout_ms is None else busy_timeout_ms
+            conn.execute(f"PRAGMA busy_timeout = {int(espera)}")
+            fila = None
+            for sentencia in sql:
+                fila = conn.execute(sentencia).fetchone()
+        finally:
+            conn.close()
+        resultado = {'ms': round((time.perf_counter() - inicio) * 1000, 2), 'en': time.time()}
+        if nombre != 'optimize':
+            # wal_checkpoint devuelve (ocupado, frames del WAL, frames copiados)
+            resultado.update(ocupado=bool(fila[0]), frames=fila[1], copiados=fila[2])
+        with self._lock:
+            self.pasos.setdefault(ruta, {})[nombre] = resultado
+        return resultado
+
+    def mantener(self, ruta, optimizar=False):
+        """Una vuelta de mantenimiento de una base"""
+        wal = estado_wal(ruta)
+        al_dia = wal['frames_pendientes'] == 0
+        if not al_dia:
+            resultado = self._paso(ruta, 'passive', ["PRAGMA wal_checkpoint(PASSIVE)"])
+            # Si quedó poco sin copiar (llegaron escrituras mientras tanto), TRUNCATE lo termina
+            al_dia = not resultado['ocupado'] and resultado['frames'] - resultado['copiados'] < 1000
+        # Con escrituras seguidas el WAL solo vuelve a empezar si un checkpoint frena
+        # a los escritores. TRUNCATE espera el lock de escritura (hasta busy_timeout_ms)
+        # y lo tiene un instante: el PASSIVE anterior ya copió casi todo. Con el WAL
+        # en el doble del máximo se fuerza igual, con la misma espera acotada.
+        excedido = wal['wal_bytes'] >= 2 * self.wal_max_bytes
+        if (al_dia and wal['wal_bytes'] >= self.wal_max_bytes) or excedido:
+            resultado = self._paso(ruta, 'truncate', ["PRAGMA wal_checkpoint(TRUNCATE)"])
+            if resultado['ocupado']:
+                self.registrar(f"Checkpoint TRUNCATE de {ruta} no terminó: base ocupada ({resultado['ms']} ms)")
+        if optimizar:
+            self._paso(ruta, 'optimize', ["PRAGMA analysis_limit = 400", "PRAGMA optimize"])
+
+    def _ciclo(self):
+        while True:
+            time.sleep(self.intervalo)
+            try:
+                if not self._tomar_lock():
+                    continue
+                optimizar = time.monotonic() - self._ultimo_optimize >= self.intervalo_optimize
+                for ruta in self.rutas():
+                    if os.path.exists(ruta):
+                        self.mantener(ruta, optimizar)
+                if optimizar:
+                    self._ultimo_optimize = time.monotonic()
+                self.vueltas += 1
+            except Exception as e:
+                self.errores += 1
+                self.registrar(f"Error en mantenimiento de la base: {e}")
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                'lider': self.lider,
+                'vueltas': self.vueltas,
+                'errores': self.errores,
+                'bases': {ruta: dict(pasos) for ruta, pasos in self.pasos.items()},
+            }
@@ -0,0 +1,123 @@
+import os
+import gzip
+import json
+import hashlib
+import threading
+
+try:
+    import brotli
+except ImportError:  # opcional: sin brotli solo se generan .gz
+    brotli = None
+
+# Páginas públicas precompiladas: "flask construir-paginas" renderiza las
+# plantillas sin mensajes flash y guarda el HTML ya comprimido, así la página
+# de inicio (la más pedida durante una convocatoria) no se renderiza ni se
+# comprime en cada request.
+
+MANIFIESTO = "paginas.json"
+
+# Codificaciones en orden de preferencia del servidor
+CODIFICACIONES = ('br', 'gzip', 'identity')
+EXTENSIONES = {'br': '.br', 'gzip': '.gz', 'identity': ''}
+
+_huellas = {}
+_huellas_lock = threading.Lock()
+
+def huella_archivo(ruta):
+    """Primeros 12 hex del sha1 del contenido (None si el archivo no existe)"""
+    try:
+        estado = os.stat(ruta)
+    except OSError:
+        return None
+    clave = (ruta, estado.st_mtime_ns, estado.st_size)
+    huella = _huellas.get(clave)
+    if huella is None:
+        with open(ruta, "rb") as f:
+            huella = hashlib.sha1(f.read()).hexdigest()[:12]
+        with _huellas_lock:
+            _huellas[clave] = huella
+    return huella
+
+def guardar_pagina(carpeta, nombre, html):
+    """Escribe nombre, nombre.gz y (si hay brotli) nombre.br. Devuelve (ETag, bytes por codificación)"""
+    os.makedirs(carpeta, exist_ok=True)
+    cuerpo = html.encode("utf-8")
+    variantes = {'identity': cuerpo, 'gzip': gzip.compress(cuerpo, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variantes['br'] = brotli.compress(cuerpo, quality=11)
+
+    for codificacion, datos in variantes.items():
+        ruta = os.path.join(carpeta, nombre + EXTENSIONES[codificacion])
+        tmp = f"{ruta}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(datos)
+        os.replace(tmp, ruta)
+
+    for codificacion in set(CODIFICACIONES) - set(variantes):
+        ruta = os.path.join(carpeta, nombre + EXTENSIONES[codificacion])
+        if os.path.exists(ruta):
+            os.remove(ruta)
+
+    return hashlib.sha1(cuerpo).hexdigest()[:16], {c: len(d) for c, d in variantes.items()}
+
+def guardar_manifiesto(carpeta, paginas):
+    """paginas: {nombre: {'etag', 'plantilla', 'plantilla_mtime', 'estaticos': {ruta: huella}}}"""
+    with open(os.path.join(carpeta, MANIFIESTO), "w") as f:
+        json.dump(paginas, f, indent=2)
+
+class PaginasPrecompiladas:
+    """
+    Variantes de las páginas precompiladas, leídas una vez por proceso.
+    Una página cuya plantilla cambió después de construirla se ignora
+    (se vuelve a renderizar normalmente hasta el próximo construir-paginas).
+    """
+
+    def __init__(self, carpeta):
+        self.carpeta = carpeta
+        self._paginas = None
+        self._lock = threading.Lock()
+
+    def _cargar(self):
+        paginas = {}
+        try:
+            with open(os.path.join(self.carpeta, MANIFIESTO)) as f:
+                manifiesto = json.load(f)
+        except (OSError, ValueError):
+            return paginas
+
+        for nombre, info in manifiesto.items():
+            try:
+                if os.stat(info['plantilla']).st_mtime_ns != info['plantilla_mtime']:
+                    continue
+                # El HTML lleva la huella de los estáticos que usa
+                if any(huella_archivo(ruta) != huella for ruta, huella in info.get('estaticos', {}).items()):
+                    continue
+                variantes = {}
+                for codificacion in CODIFICACIONES:
+                    ruta = os.path.join(self.carpeta, nombre + EXTENSIONES[codificacion])
+                    if os.path.exists(ruta):
+                        with open(ruta, "rb") as f:
+                            variantes[codificacion] = f.read()
+            except (OSError, KeyError):
+                continue
+            if 'identity' in variantes:
+                paginas[nombre] = (info['etag'], variantes)
+        return paginas
+
+    def obtener(self, nombre, accept_encodings):
+        """(cuerpo, codificación, etag) según Accept-Encoding, o None si no está precompilada"""
+        if self._paginas is None:
+            with self._lock:
+                if self._paginas is None:
+                    self._paginas = self._cargar()
+
+        pagina = self._paginas.get(nombre)
+        if pagina is None:
+            return None
+        etag, variantes = pagina
+        codificacion = accept_encodings.best_match([c for c in CODIFICACIONES if c in variantes]) or 'identity'
+        return variantes[codificacion], codificacion, etag
+
+    def recargar(self):
+        with self._lock:
+            self._paginas = None
@@ -0,0 +1,122 @@
+import heapq
+
+# Reporte de postulantes ordenado por experiencia.
+# Todo se resuelve en una sola consulta (agregados por tabla hija) y las filas
+# se leen del cursor de a una página, sin armar la lista completa en memoria.
+
+# Grado más alto declarado en formacion_academica.grado (texto libre).
+# lower() de SQLite solo pasa a minúsculas ASCII: los patrones evitan letras con tilde.
+NIVELES_GRADO = [
+    (7, 'Doctorado', ('%doctor%', '%phd%')),
+    (6, 'Postgrado', ('%maestr%', '%magister%', '%master%', '%postgrad%', '%posgrad%',
+                      '%diplomad%', '%especiali%')),
+    (5, 'Profesional', ('%licenci%', '%profesional%', '%titulad%', '%ingenier%', '%abogad%')),
+    (4, 'Técnico Superior', ('%superior%',)),
+    (3, 'Técnico Medio', ('%cnico%',)),
+    (2, 'Estudiante Universitario', ('%universit%', '%egresad%')),
+    (1, 'Bachiller', ('%bachiller%',)),
+    (0, 'Estudios Secundarios', ('%secundari%',)),
+]
+
+ETIQUETAS_GRADO = {nivel: etiqueta for nivel, etiqueta, _ in NIVELES_GRADO}
+
+ORDENES_RANKING = {
+    'experiencia': "meses_experiencia DESC, d.id",
+    'grado': "COALESCE(nivel_grado, -1) DESC, meses_experiencia DESC, d.id",
+    'nombre': "COALESCE(d.ap_pat, ''), COALESCE(d.ap_mat, ''), COALESCE(d.nombres, ''), d.id",
+}
+
+# El mismo orden en Python, para mezclar el ranking de varios shards
+CLAVES_RANKING = {
+    'experiencia': lambda f: (-f['meses_experiencia'], f['id']),
+    'grado': lambda f: (-(f['nivel_grado'] if f['nivel_grado'] is not None else -1),
+                        -f['meses_experiencia'], f['id']),
+    'nombre': lambda f: (f['ap_pat'] or '', f['ap_mat'] or '', f['nombres'] or '', f['id']),
+}
+
+def sql_nivel_grado():
+    """CASE que convierte el texto del grado a su nivel (NULL si no se reconoce)"""
+    ramas = []
+    for nivel, _, patrones in NIVELES_GRADO:
+        condicion = " OR ".join(f"lower(grado) LIKE '{p}'" for p in patrones)
+        ramas.append(f"WHEN {condicion} THEN {nivel}")
+    return "CASE " + " ".join(ramas) + " END"
+
+# Meses entre desde y hasta con la misma regla que diffMesesJusto (detalles.html):
+# el mes final cuenta si el día final no es menor que el inicial.
+SQL_MESES = """
+    (CAST(strftime('%Y', hasta) AS INTEGER) - CAST(strftime('%Y', desde) AS INTEGER)) * 12
+    + CAST(strftime('%m', hasta) AS INTEGER) - CAST(strftime('%m', desde) AS INTEGER) + 1
+    - (CAST(strftime('%d', hasta) AS INTEGER) < CAST(strftime('%d', desde) AS INTEGER))
+"""
+# Filas de experiencia con las dos fechas y en orden (las demás no suman)
+SQL_EXPERIENCIA_VALIDA = "date(desde) IS NOT NULL AND date(hasta) IS NOT NULL AND date(hasta) >= date(desde)"
+
+def sql_ranking(orden='experiencia'):
+    """
+    Una fila por postulante: CI, ciudad, grado más alto, experiencia total en meses
+    (resumen_experiencia guardado o, si no hay, calculado de experiencia),
+    idiomas y pretensión salarial.
+    """
+    return f"""
+    WITH grado AS (
+        SELECT persona_id, MAX({sql_nivel_grado()}) AS nivel, MAX(grado) AS texto
+        FROM formacion_academica GROUP BY persona_id
+    ),
+    calculada AS (
+        SELECT persona_id, SUM(MAX(0, {SQL_MESES})) AS meses
+        FROM experiencia
+        WHERE {SQL_EXPERIENCIA_VALIDA}
+        GROUP BY persona_id
+    ),
+    idioma AS (
+        SELECT persona_id, GROUP_CONCAT(idioma, ', ') AS idiomas
+        FROM idiomas GROUP BY persona_id
+    ),
+    pretension AS (
+        SELECT persona_id, MAX(monto_bs) AS monto_bs
+        FROM pretension_salarial GROUP BY persona_id
+    )
+    SELECT d.id, d.nombres, d.ap_pat, d.ap_mat, d.ci, d.exp, d.ciudad,
+           grado.nivel AS nivel_grado, grado.texto AS grado_texto,
+           COALESCE(r.total_anios * 12 + r.total_meses, calculada.meses, 0) AS meses_experiencia,
+           r.persona_id IS NOT NULL AS experiencia_guardada,
+           idioma.idiomas, pretension.monto_bs
+    FROM datos d
+    LEFT JOIN resumen_experiencia r ON r.persona_id = d.id
+    LEFT JOIN grado ON grado.persona_id = d.id
+    LEFT JOIN calculada ON calculada.persona_id = d.id
+    LEFT JOIN idioma ON idioma.persona_id = d.id
+    LEFT JOIN pretension ON pretension.persona_id = d.id
+    ORDER BY {ORDENES_RANKING[orden]}
+    """
+
+def filas_ranking(conn, orden='experiencia', tam_pagina=500):
+    """Recorre el ranking leyendo del cursor de a tam_pagina filas (dict)"""
+    cursor = conn.execute(sql_ranking(orden))
+    columnas = [c[0] for c in cursor.description]
+    while True:
+        pagina = cursor.fetchmany(tam_pagina)
+        if not pagina:
+            break
+        for fila in pagina:
+            fila = dict(zip(columnas, fila))
+            fila['grado'] = ETIQUETAS_GRADO.get(fila['nivel_grado']) or fila['grado_texto'] or ''
+            yield fila
+
+def filas_ranking_shards(conexiones, orden='experiencia', tam_pagina=500):
+    """
+    Ranking de varias bases (una por shard) mezclado en orden: cada base ya
+    viene ordenada y heapq.merge solo tiene una fila de cada una a la vez.
+    """
+    fuentes = [filas_ranking(conn, orden, tam_pagina) for conn in conexiones]
+    if len(fuentes) == 1:
+        return fuentes[0]
+    return heapq.merge(*fuentes, key=CLAVES_RANKING[orden])
+
+def version_ranking(conn):
+    """
+    Identifica el estado de los datos del reporte: cambia con cada alta, baja o
+    escritura (los triggers incrementan datos.version).
+    """
+    return conn.execute("SELECT COUNT(*), COALESCE(SUM(version), 0), COALESCE(MAX(id), 0) FROM datos").fetchone()
@@ -0,0 +1,182 @@
+import os
+import json
+import glob
+import time
+import sqlite3
+import threading
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin lock entre procesos
+    fcntl = None
+
+def _escribir_metricas(ruta_metricas, metricas):
+    """Guarda las métricas del respaldo (JSON) de forma atómica"""
+    if not ruta_metricas:
+        return
+    tmp = f"{ruta_metricas}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(metricas, f, indent=2)
+    os.replace(tmp, ruta_metricas)
+
+class _DemasiadosReinicios(Exception):
+    pass
+
+def respaldar(origen, destino, paginas=512, pausa=0.01, ruta_metricas=None, max_reinicios=5):
+    """
+    Copia en caliente la base origen a destino con la API de backup de SQLite.
+    Copia de a `paginas` páginas y descansa `pausa` segundos entre pasos: cada paso
+    solo toma un lock de lectura y en WAL los escritores nunca quedan bloqueados.
+    Si otra conexión escribe durante la copia, SQLite la reinicia; después de
+    max_reinicios se copia en un solo paso, que en WAL lee una foto consistente
+    sin frenar a los escritores.
+    El destino queda en modo DELETE (sin -wal) y se escribe a un temporal que
+    luego se renombra. Devuelve las métricas del respaldo.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(destino)), exist_ok=True)
+    tmp = f"{destino}.{os.getpid()}.{threading.get_ident()}.tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+
+    metricas = {
+        'origen': origen,
+        'destino': destino,
+        'inicio': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'estado': 'en_curso',
+        'pasos': 0,
+        'paginas_total': None,
+        'paginas_restantes': None,
+        'reinicios': 0,
+    }
+    inicio = time.perf_counter()
+
+    def progreso(status, restantes, total):
+        if metricas['paginas_restantes'] is not None and restantes > metricas['paginas_restantes']:
+            metricas['reinicios'] += 1
+            if metricas['reinicios'] > max_reinicios:
+                raise _DemasiadosReinicios()
+        metricas['pasos'] += 1
+        metricas['paginas_total'] = total
+        metricas['paginas_restantes'] = restantes
+        metricas['segundos'] = round(time.perf_counter() - inicio, 3)
+        # No reescribir el archivo de métricas en cada paso
+        if metricas['pasos'] % 20 == 1:
+            _escribir_metricas(ruta_metricas, metricas)
+        if restantes and pausa:
+            time.sleep(pausa)
+
+    fuente = sqlite3.connect(origen)
+    copia = sqlite3.connect(tmp)
+    try:
+        try:
+            fuente.backup(copia, pages=paginas, progress=progreso)
+        except _DemasiadosReinicios:
+            metricas['un_solo_paso'] = True
+            fuente.backup(copia, pages=-1)
+        copia.execute("PRAGMA journal_mode = DELETE")
+        copia.close()
+        os.replace(tmp, destino)
+    except Exception as e:
+        copia.close()
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        metricas['estado'] = 'error'
+        metricas['error'] = str(e)
+        _escribir_metricas(ruta_metricas, metricas)
+        raise
+    finally:
+        fuente.close()
+
+    metricas['estado'] = 'completo'
+    metricas['fin'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    metricas['segundos'] = round(time.perf_counter() - inicio, 3)
+    metricas['bytes'] = os.path.getsize(destino)
+    _escribir_metricas(ruta_metricas, metricas)
+    return metricas
+
+def actualizar_snapshot(origen, ruta_snapshot, **kwargs):
+    """Respalda origen sobre el snapshot de lectura y lo deja en solo lectura"""
+    metricas = respaldar(origen, ruta_snapshot, **kwargs)
+    os.chmod(ruta_snapshot, 0o444)
+    return metricas
+
+def conexion_snapshot(ruta_snapshot, edad_maxima=float("inf")):
+    """
+    Conexión de solo lectura al snapshot (None si no existe o si se actualizó
+    hace más de `edad_maxima` segundos: quien lee usa entonces la base en uso).
+    immutable=1: SQLite no toma locks ni busca -wal, el archivo no cambia.
+    """
+    try:
+        edad = time.time() - os.path.getmtime(ruta_snapshot)
+    except OSError:
+        return None
+    if edad > edad_maxima:
+        return None
+    conn = sqlite3.connect(f"file:{os.path.abspath(ruta_snapshot)}?mode=ro&immutable=1", uri=True)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def respaldo_completo(origen, carpeta, conservar=7, snapshot=True, **kwargs):
+    """
+    Respaldo con fecha en carpeta + snapshot de lectura actualizado
+    (snapshot=False para bases que no lo usan, como los shards).
+    Conserva los últimos `conservar` respaldos.
+    """
+    nombre = os.path.splitext(os.path.basename(origen))[0]
+    destino = os.path.join(carpeta, f"{nombre}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.db")
+    ruta_metricas = os.path.join(carpeta, "ultimo_respaldo.json" if snapshot else f"ultimo_respaldo_{nombre}.json")
+    metricas = respaldar(origen, destino, ruta_metricas=ruta_metricas, **kwargs)
+
+    # El snapshot se arma desde el respaldo recién hecho, no desde la base en uso
+    if snapshot:
+        ruta_snapshot = os.path.join(carpeta, "snapshot.db")
+        if os.path.exists(ruta_snapshot):
+            os.chmod(ruta_snapshot, 0o644)
+        actualizar_snapshot(destino, ruta_snapshot, paginas=-1, pausa=0)
+
+    anteriores = sorted(glob.glob(os.path.join(carpeta, f"{glob.escape(nombre)}-*.db")))
+    for ruta in anteriores[:-conservar] if conservar > 0 else []:
+        os.remove(ruta)
+    return metricas
+
+def iniciar_respaldos_programados(origen, carpeta, intervalo, conservar=7, registrar=print, otras=None):
+    """
+    Hilo en segundo plano que respalda cada `intervalo` segundos.
+    otras() devuelve las rutas de otras bases a respaldar en cada ciclo (shards).
+    Con varios workers, solo el que obtiene el lock de la carpeta hace los respaldos;
+    los demás lo vuelven a intentar en cada ciclo, así si ese worker muere otro
+    toma su lugar (como en mantenimiento.Mantenimiento).
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    archivo_lock = os.path.join(carpeta, ".programado.lock")
+
+    def tomar_lock():
+        if fcntl is None or hilo.lock is not None:
+            return True
+        archivo = open(archivo_lock, "w")
+        try:
+            fcntl.flock(archivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            archivo.close()
+            return False
+        hilo.lock = archivo  # el lock vive mientras viva el hilo
+        return True
+
+    def ciclo():
+        while True:
+            time.sleep(intervalo)
+            if not tomar_lock():
+                continue
+            bases = [(origen, True)] + [(ruta, False) for ruta in (otras() if otras else [])]
+            for ruta, snapshot in bases:
+                try:
+                    metricas = respaldo_completo(ruta, carpeta, conservar, snapshot=snapshot)
+                    registrar(f"Respaldo {metricas['destino']} ({metricas['bytes']} bytes, {metricas['segundos']} s)")
+                except Exception as e:
+                    registrar(f"Error en respaldo programado de {ruta}: {e}")
+
+    hilo = threading.Thread(target=ciclo, name="respaldos", daemon=True)
+    hilo.lock = None
+    hilo.start()
+    return hilo
@@ -0,0 +1,66 @@
+import os
+import sys
+import time
+import sqlite3
+import struct
+
+# Sondas baratas para /healthz y /readyz: el balanceador las consulta cada
+# segundo, así que nada de esto recorre tablas ni escribe en la base.
+
+# Cabecera del índice del WAL (archivo -shm, en el orden de bytes de la máquina):
+# mxFrame (último frame válido del WAL) en el byte 16 y nBackfill (frames ya
+# copiados a la base por un checkpoint) en el 96.
+_SHM_MX_FRAME = 16
+_SHM_BACKFILL = 96
+
+def estado_wal(ruta):
+    """
+    Tamaño del -wal y frames pendientes de checkpoint (mxFrame - nBackfill).
+    Se lee la cabecera del -shm sin lock: es una foto aproximada.
+    """
+    estado = {'wal_bytes': 0, 'frames': None, 'frames_pendientes': None}
+    try:
+        estado['wal_bytes'] = os.path.getsize(ruta + "-wal")
+        with open(ruta + "-shm", "rb") as f:
+            cabecera = f.read(_SHM_BACKFILL + 4)
+    except OSError:
+        return estado
+    if len(cabecera) < _SHM_BACKFILL + 4:
+        return estado
+    orden = "<" if sys.byteorder == "little" else ">"
+    frames = struct.unpack_from(orden + "I", cabecera, _SHM_MX_FRAME)[0]
+    copiados = struct.unpack_from(orden + "I", cabecera, _SHM_BACKFILL)[0]
+    estado['frames'] = frames
+    estado['frames_pendientes'] = max(frames - copiados, 0)
+    return estado
+
+def latencia_db(abrir):
+    """Milisegundos de abrir la base y hacer un SELECT (ida y vuelta)"""
+    inicio = time.perf_counter()
+    conn = abrir()
+    try:
+        conn.execute("SELECT 1").fetchone()
+    finally:
+        conn.close()
+    return round((time.perf_counter() - inicio) * 1000, 2)
+
+def lock_disponible(abrir, espera_ms=0):
+    """
+    Intenta tomar el lock de escritura (BEGIN IMMEDIATE) esperando hasta espera_ms
+    y lo suelta enseguida sin escribir. Devuelve (obtenido, milisegundos).
+    Es solo informativo: un escritor largo lo tiene ocupado sin que la base
+    tenga problemas, y esperarlo en cada sonda ocuparía los workers.
+    """
+    inicio = time.perf_counter()
+    conn = abrir()
+    try:
+        conn.execute(f"PRAGMA busy_timeout = {int(espera_ms)}")
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.rollback()
+            obtenido = True
+        except sqlite3.OperationalError:
+            obtenido = False
+    finally:
+        conn.close()
+    return obtenido, round((time.perf_counter() - inicio) * 1000, 2)
@@ -0,0 +1,45 @@
+import os
+
+# Una base SQLite por convocatoria ("shard"): el lock de escritura de una
+# convocatoria con mucha demanda no frena a las demás.
+# Los AUTOINCREMENT de cada shard empiezan en numero * RANGO_SHARD, así el id
+# de una persona alcanza para saber en qué base está. El shard 0 es la base
+# principal: usuarios, convocatorias y postulantes sin convocatoria.
+
+RANGO_SHARD = 1_000_000_000
+
+def shard_de_id(persona_id):
+    """Número de shard al que pertenece un id"""
+    return int(persona_id) // RANGO_SHARD
+
+def ruta_shard(base, numero):
+    """form_hv.db -> form_hv_shard3.db (el 0 es la base principal)"""
+    if numero == 0:
+        return base
+    raiz, extension = os.path.splitext(base)
+    return f"{raiz}_shard{numero}{extension or '.db'}"
+
+def agrupar_por_shard(ids):
+    """{shard: [ids]} conservando el orden de aparición"""
+    grupos = {}
+    for persona_id in ids:
+        grupos.setdefault(shard_de_id(persona_id), []).append(persona_id)
+    return grupos
+
+def reservar_rango(cursor, numero):
+    """Hace que todas las tablas AUTOINCREMENT del shard numeren dentro de su rango"""
+    inicio = numero * RANGO_SHARD
+    tablas = [
+        row[0] for row in cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND sql LIKE '%AUTOINCREMENT%'"
+        ).fetchall()
+    ]
+    for tabla in tablas:
+        cursor.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?", (inicio, tabla))
+        cursor.execute(
+            """
+            INSERT INTO sqlite_sequence (name, seq)
+            SELECT ?, ? WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = ?)
+            """,
+            (tabla, inicio, tabla)
+        )
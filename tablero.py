@@ -0,0 +1,232 @@
+from reportes import ETIQUETAS_GRADO, sql_nivel_grado
+
+# Tablero de estadísticas de postulantes, mantenido por triggers.
+# tablero_persona guarda con qué valores cuenta cada persona en cada dimensión
+# (su ciudad, su grado más alto, sus idiomas...) y tablero el total de personas
+# por valor. Una escritura en una tabla de la dimensión recalcula solo las claves
+# de esa persona: resta las que tenía y suma las nuevas. Leer el tablero no
+# recorre postulantes: cuesta lo mismo con cien que con cien mil.
+# Los valores de texto libre (ciudad, idioma, paquete) se agrupan sin distinguir
+# mayúsculas (COLLATE NOCASE, solo ASCII) y se muestran como llegó el primero.
+
+# Pretensión salarial por rangos: límite inferior de cada uno en Bs
+RANGOS_PRETENSION = [0, 3000, 5000, 7000, 10000, 15000]
+SIN_DATO = -1
+
+# monto_bs es texto libre ('5000', '5.000', '5,000', '3500.50', '3.500,00'): sin
+# espacios, se corta una parte decimal final de 1 o 2 cifras y lo que queda tiene
+# que ser un entero, con o sin separadores de miles ('.' o ',' seguido de
+# exactamente 3 cifras, el mismo en todo el número). Lo demás cuenta como SIN_DATO.
+_SQL_TEXTO = "replace(trim(monto_bs), ' ', '')"
+_SQL_ENTERO = """
+    CASE WHEN texto GLOB '*[.,][0-9][0-9]' THEN substr(texto, 1, length(texto) - 3)
+         WHEN texto GLOB '*[.,][0-9]' THEN substr(texto, 1, length(texto) - 2)
+         ELSE texto END
+"""
+_MILES = [
+    "[0-9]" * cifras + "[.,][0-9][0-9][0-9]" * grupos
+    for cifras in (1, 2, 3) for grupos in (1, 2, 3)
+]
+_SQL_MONTO = f"""
+    CASE WHEN entero GLOB '[0-9]*' AND entero NOT GLOB '*[^0-9]*' THEN CAST(entero AS INTEGER)
+         WHEN ({' OR '.join(f"entero GLOB '{patron}'" for patron in _MILES)})
+              AND NOT (entero GLOB '*.*' AND entero GLOB '*,*')
+         THEN CAST(replace(replace(entero, '.', ''), ',', '') AS INTEGER) END
+"""
+
+def _sql_rango_pretension():
+    ramas = " ".join(f"WHEN monto >= {limite} THEN {limite}" for limite in reversed(RANGOS_PRETENSION))
+    return f"CASE WHEN monto IS NULL THEN {SIN_DATO} {ramas} ELSE {SIN_DATO} END"
+
+# dimensión -> (tabla, columna de la persona, columnas que la afectan, consulta).
+# La consulta devuelve (persona_id, valor, detalle) de las personas que cumplen
+# {donde}; detalle '' es "declaró el valor" y el resto un desglose (nivel, habilidad).
+DIMENSIONES = {
+    'ciudad': (
+        'datos', 'id', ['ciudad'],
+        "SELECT id AS persona_id, trim(ciudad) AS valor, '' AS detalle FROM datos WHERE {donde}"
+    ),
+    'grado': (
+        'formacion_academica', 'persona_id', ['grado'],
+        f"""
+        SELECT persona_id, COALESCE(MAX({sql_nivel_grado()}), {SIN_DATO}) AS valor, '' AS detalle
+        FROM formacion_academica WHERE {{donde}} GROUP BY persona_id
+        """
+    ),
+    'idioma': (
+        'idiomas', 'persona_id', ['idioma', 'lectura', 'escritura', 'conversacion'],
+        """
+        SELECT persona_id, trim(idioma) AS valor, '' AS detalle FROM idiomas WHERE {donde}
+        UNION SELECT persona_id, trim(idioma), 'lectura' FROM idiomas WHERE {donde} AND lectura
+        UNION SELECT persona_id, trim(idioma), 'escritura' FROM idiomas WHERE {donde} AND escritura
+        UNION SELECT persona_id, trim(idioma), 'conversacion' FROM idiomas WHERE {donde} AND conversacion
+        """
+    ),
+    'paquete': (
+        'paquetes_informaticos', 'persona_id', ['paquete', 'nivel'],
+        """
+        SELECT persona_id, trim(paquete) AS valor, '' AS detalle FROM paquetes_informaticos WHERE {donde}
+        UNION SELECT persona_id, trim(paquete), nivel FROM paquetes_informaticos
+        WHERE {donde} AND nivel IS NOT NULL
+        """
+    ),
+    'pretension': (
+        'pretension_salarial', 'persona_id', ['monto_bs'],
+        f"""
+        SELECT persona_id, {_sql_rango_pretension()} AS valor, '' AS detalle FROM (
+            SELECT persona_id, {_SQL_MONTO} AS monto FROM (
+                SELECT persona_id, {_SQL_ENTERO} AS entero FROM (
+                    SELECT persona_id, {_SQL_TEXTO} AS texto FROM pretension_salarial WHERE {{donde}}
+                )
+            )
+        )
+        """
+    ),
+}
+
+def crear_tablas_tablero(cursor):
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS tablero(
+        dimension TEXT NOT NULL,
+        valor TEXT NOT NULL COLLATE NOCASE,
+        detalle TEXT NOT NULL DEFAULT '',
+        postulantes INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (dimension, valor, detalle)
+        ) WITHOUT ROWID
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS tablero_persona(
+        persona_id INTEGER NOT NULL,
+        dimension TEXT NOT NULL,
+        valor TEXT NOT NULL COLLATE NOCASE,
+        detalle TEXT NOT NULL DEFAULT '',
+        PRIMARY KEY (persona_id, dimension, valor, detalle)
+        ) WITHOUT ROWID
+        """
+    )
+    # El recálculo de una persona lee solo sus filas
+    for tabla, columna, _, _ in DIMENSIONES.values():
+        if tabla != 'datos':
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{tabla}_persona ON {tabla}({columna})")
+
+def _sql_recalcular(dimension, persona):
+    """Sentencias del trigger que rehacen las claves de una persona en una dimensión"""
+    _, columna, _, consulta = DIMENSIONES[dimension]
+    claves = consulta.format(donde=f"{columna} = {persona}")
+    anteriores = f"""
+        (SELECT valor, detalle FROM tablero_persona
+         WHERE persona_id = {persona} AND dimension = '{dimension}')
+    """
+    return f"""
+        UPDATE tablero SET postulantes = postulantes - 1
+        WHERE dimension = '{dimension}' AND (valor, detalle) IN {anteriores};
+        DELETE FROM tablero
+        WHERE dimension = '{dimension}' AND (valor, detalle) IN {anteriores} AND postulantes <= 0;
+        DELETE FROM tablero_persona WHERE persona_id = {persona} AND dimension = '{dimension}';
+        INSERT OR IGNORE INTO tablero_persona (persona_id, dimension, valor, detalle)
+        SELECT persona_id, '{dimension}', valor, detalle FROM ({claves});
+        INSERT INTO tablero (dimension, valor, detalle, postulantes)
+        SELECT dimension, valor, detalle, 1 FROM tablero_persona
+        WHERE persona_id = {persona} AND dimension = '{dimension}'
+        ON CONFLICT (dimension, valor, detalle) DO UPDATE SET postulantes = postulantes + 1;
+    """
+
+def crear_triggers_tablero(cursor):
+    """(Re)crea los triggers de cada dimensión; se llama en cada actualización del esquema"""
+    for dimension, (tabla, columna, columnas, _) in DIMENSIONES.items():
+        triggers = {
+            'i': (f"AFTER INSERT ON {tabla}", "NEW"),
+            'u': (f"AFTER UPDATE OF {', '.join(columnas + [columna])} ON {tabla}", "NEW"),
+            # La fila pasó a otra persona: también se recalcula la anterior
+            'm': (f"AFTER UPDATE OF {columna} ON {tabla} WHEN OLD.{columna} IS NOT NEW.{columna}", "OLD"),
+            'd': (f"AFTER DELETE ON {tabla}", "OLD"),
+        }
+        for letra, (momento, fila) in triggers.items():
+            nombre = f"tablero_{dimension}_{letra}"
+            cursor.execute(f"DROP TRIGGER IF EXISTS {nombre}")
+            cursor.execute(
+                f"""
+                CREATE TRIGGER {nombre} {momento}
+                BEGIN
+                    {_sql_recalcular(dimension, f"{fila}.{columna}")}
+                END
+                """
+            )
+
+def reconstruir_tablero(cursor):
+    """Recalcula el tablero completo desde las tablas (al crear o cambiar las dimensiones)"""
+    cursor.execute("DELETE FROM tablero_persona")
+    cursor.execute("DELETE FROM tablero")
+    for dimension, (_, _, _, consulta) in DIMENSIONES.items():
+        cursor.execute(
+            f"""
+            INSERT OR IGNORE INTO tablero_persona (persona_id, dimension, valor, detalle)
+            SELECT persona_id, '{dimension}', valor, detalle FROM ({consulta.format(donde='1')})
+            """
+        )
+    cursor.execute(
+        """
+        INSERT INTO tablero (dimension, valor, detalle, postulantes)
+        SELECT dimension, valor, detalle, COUNT(*) FROM tablero_persona
+        GROUP BY dimension, valor, detalle
+        """
+    )
+
+def _etiqueta_rango(limite):
+    if limite == SIN_DATO:
+        return 'Sin dato'
+    siguiente = [r for r in RANGOS_PRETENSION if r > limite]
+    if not siguiente:
+        return f"{limite:,} o más".replace(",", ".")
+    return f"{limite:,} - {siguiente[0] - 1:,}".replace(",", ".")
+
+def leer_tablero(conexiones):
+    """
+    Suma los tableros de varias bases (una por shard) y los arma por dimensión.
+    Lee solo las filas de tablero: una por valor, no por postulante.
+    """
+    conteos = {dimension: {} for dimension in DIMENSIONES}
+    for conn in conexiones:
+        for dimension, valor, detalle, postulantes in conn.execute(
+            "SELECT dimension, valor, detalle, postulantes FROM tablero"
+        ):
+            if dimension not in conteos:
+                continue
+            # Entre shards se agrupa igual que en la tabla (sin distinguir mayúsculas)
+            grupo = conteos[dimension].setdefault(valor.lower(), {'valor': valor})
+            grupo[detalle] = grupo.get(detalle, 0) + postulantes
+
+    def ordenados(dimension):
+        return sorted(conteos[dimension].values(), key=lambda g: (-g.get('', 0), g['valor'].lower()))
+
+    grados = sorted(conteos['grado'].values(), key=lambda g: -int(g['valor']))
+    # Rangos de menor a mayor y 'Sin dato' al final
+    rangos = sorted(conteos['pretension'].values(), key=lambda g: (int(g['valor']) == SIN_DATO, int(g['valor'])))
+    return {
+        # Toda persona tiene exactamente una ciudad
+        'postulantes': sum(g.get('', 0) for g in conteos['ciudad'].values()),
+        'ciudad': [{'ciudad': g['valor'], 'postulantes': g.get('', 0)} for g in ordenados('ciudad')],
+        'grado': [
+            {'nivel': int(g['valor']), 'grado': ETIQUETAS_GRADO.get(int(g['valor']), 'Sin clasificar'),
+             'postulantes': g.get('', 0)}
+            for g in grados
+        ],
+        'idiomas': [
+            {'idioma': g['valor'], 'postulantes': g.get('', 0), 'lectura': g.get('lectura', 0),
+             'escritura': g.get('escritura', 0), 'conversacion': g.get('conversacion', 0)}
+            for g in ordenados('idioma')
+        ],
+        'paquetes': [
+            {'paquete': g['valor'], 'postulantes': g.get('', 0), 'regular': g.get('regular', 0),
+             'bueno': g.get('bueno', 0), 'muy_bueno': g.get('muy_bueno', 0)}
+            for g in ordenados('paquete')
+        ],
+        'pretension': [
+            {'rango': _etiqueta_rango(int(g['valor'])), 'desde': int(g['valor']) if int(g['valor']) != SIN_DATO else None,
+             'postulantes': g.get('', 0)}
+            for g in rangos
+        ],
+    }
@@ -0,0 +1,51 @@
+import os
+from io import BytesIO
+from functools import lru_cache
+from PIL import Image
+
+# Logo del encabezado y ancho con que se imprime (mm)
+LOGO = "static/image.png"
+LOGO_ANCHO_MM = 40
+
+# Resolución de impresión a la que se reduce el logo en modo compacto
+DPI_IMPRESION = int(os.environ.get("PDF_DPI_IMPRESION", 150))
+
+@lru_cache(maxsize=None)
+def logo_compacto(ancho_mm=LOGO_ANCHO_MM, dpi=DPI_IMPRESION):
+    """
+    PNG del logo reducido a su resolución impresa.
+    Se calcula una sola vez por proceso; fpdf reconoce la imagen repetida
+    y la incluye una sola vez en el documento aunque salga en cada página.
+    """
+    with Image.open(LOGO) as im:
+        im.load()
+        ancho_px = round(ancho_mm / 25.4 * dpi)
+        if im.width > ancho_px:
+            alto_px = max(1, round(im.height * ancho_px / im.width))
+            im = im.resize((ancho_px, alto_px), Image.LANCZOS)
+
+        # Sin transparencia real el canal alfa solo agrega una máscara al PDF
+        if im.mode == "RGBA" and im.getchannel("A").getextrema()[0] == 255:
+            im = im.convert("RGB")
+        # Paleta de 256 colores: suficiente para un logo y mucho más liviano
+        if im.mode == "RGB":
+            im = im.quantize(colors=256, method=Image.FASTOCTREE)
+
+        salida = BytesIO()
+        im.save(salida, "PNG", optimize=True)
+        return salida.getvalue()
+
+def imagen_logo(compacto):
+    """Fuente del logo a usar en el encabezado"""
+    if compacto:
+        return BytesIO(logo_compacto())
+    return LOGO
+
+def comparar_tamanios(generar):
+    """
+    Genera el mismo PDF en modo normal y compacto.
+    generar(compacto) debe devolver un BytesIO. Devuelve (bytes_normal, bytes_compacto).
+    """
+    normal = generar(False).getbuffer().nbytes
+    compacto = generar(True).getbuffer().nbytes
+    return normal, compacto
@@ -0,0 +1,32 @@
+import json
+from itertools import chain
+
+# Las secciones de los PDF pueden llegar como listas, generadores o cursores de
+# la base: se dibujan a medida que llegan las filas, sin tenerlas todas en memoria.
+
+def filas(seccion):
+    """
+    Iterador sobre las filas de una sección, o None si no tiene ninguna.
+    Mira solo la primera fila (sin len() ni materializar el resto) y la
+    devuelve al principio del iterador.
+    """
+    if seccion is None:
+        return None
+    iterador = iter(seccion)
+    for primera in iterador:
+        return chain((primera,), iterador)
+    return None
+
+# Este módulo no importa fpdf: app.py lo usa para armar la clave del PDF antes
+# de saber si hace falta generarlo (304 o PDF ya almacenado)
+def normalizar_ids_marcados(ids_marcados):
+    """Convierte ids_marcados (JSON o lista) a una lista de enteros"""
+    if ids_marcados:
+        if isinstance(ids_marcados, str):
+            try:
+                ids_marcados = json.loads(ids_marcados)
+            except:
+                ids_marcados = []
+        # Asegurar que todos sean enteros
+        return [int(id) for id in ids_marcados if id is not None]
+    return []
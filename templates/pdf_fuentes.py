@@ -0,0 +1,144 @@
+import os
+import logging
+from io import BytesIO
+from functools import lru_cache
+from fontTools import ttLib
+from fpdf import FPDF_VERSION
+from fpdf.errors import FPDFUnicodeEncodingException
+from fpdf.fonts import TTFFont, SubsetMap
+
+# Fuente TrueType para textos que Helvetica no puede escribir (fuera de Latin-1:
+# nombres en aymara, quechua o guaraní, comillas tipográficas, €...).
+# Por defecto la DejaVu Sans de static/fonts; PDF_FUENTE_TTF la reemplaza.
+# Negrita y cursiva son opcionales (si faltan se usa la regular).
+_DIR_FUENTES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static", "fonts")
+FUENTES_TTF = {
+    '': os.environ.get("PDF_FUENTE_TTF") or os.path.join(_DIR_FUENTES, "DejaVuSans.ttf"),
+    'B': os.environ.get("PDF_FUENTE_TTF_NEGRITA")
+         or (None if os.environ.get("PDF_FUENTE_TTF") else os.path.join(_DIR_FUENTES, "DejaVuSans-Bold.ttf")),
+    'I': os.environ.get("PDF_FUENTE_TTF_CURSIVA"),
+}
+FAMILIA_TTF = "unicode"
+FAMILIA_CORE = "Helvetica"
+
+# La copia de TTFFont de _copia_fuente toca atributos internos de fpdf2: solo se
+# usa con las versiones en que se probó; con otras se va por add_font
+_COPIA_PROBADA = FPDF_VERSION.startswith("2.8.")
+
+def fuente_ttf_configurada():
+    return os.path.isfile(FUENTES_TTF[''])
+
+class TextoCoreSeguro:
+    """
+    Mezcla para las clases FPDF: si no hay TrueType y un texto no entra en
+    Latin-1, esos caracteres salen como '?' en lugar de fallar el documento.
+    """
+
+    def normalize_text(self, text):
+        try:
+            return super().normalize_text(text)
+        except FPDFUnicodeEncodingException:
+            return text.encode("latin-1", "replace").decode("latin-1")
+
+def necesita_unicode(*valores):
+    """Algún texto (en dicts, listas o tuplas anidadas) no entra en Latin-1"""
+    pendientes = list(valores)
+    while pendientes:
+        v = pendientes.pop()
+        if isinstance(v, str):
+            try:
+                v.encode("latin-1")
+            except UnicodeEncodeError:
+                return True
+        elif isinstance(v, dict):
+            pendientes.extend(v.values())
+        elif isinstance(v, (list, tuple)):
+            pendientes.extend(v)
+    return False
+
+class _SinDocumento:
+    """Lo único de FPDF que TTFFont consulta al construirse"""
+    fonts = {}
+    render_color_fonts = False
+
+@lru_cache(maxsize=None)
+def _contenido(ruta):
+    with open(ruta, "rb") as f:
+        return f.read()
+
+@lru_cache(maxsize=None)
+def _fuente_procesada(ruta, estilo):
+    """
+    TTFFont leído una sola vez por proceso: cmap, anchos de cada carácter y
+    descriptor. Es la parte cara de add_font y no depende del documento.
+    """
+    return TTFFont(_SinDocumento(), ruta, f"{FAMILIA_TTF}{estilo}", estilo)
+
+def _copia_fuente(pdf, ruta, estilo):
+    """
+    Copia de la fuente procesada para un documento: comparte cmap, anchos y
+    descriptor, y tiene su propio subconjunto de glifos. fpdf recorta la
+    TTFont al subconjunto al generar el PDF, así que cada documento abre la
+    suya (lazy, desde los bytes ya leídos).
+    """
+    base = _fuente_procesada(ruta, estilo)
+    fuente = TTFFont.__new__(TTFFont)
+    for atributo in TTFFont.__slots__:
+        if hasattr(base, atributo):
+            setattr(fuente, atributo, getattr(base, atributo))
+    fuente.i = len(pdf.fonts) + 1
+    fuente.ttfont = ttLib.TTFont(BytesIO(_contenido(ruta)), recalcTimestamp=False, lazy=True)
+    # TTFFont tiene __slots__: si fpdf2 renombra alguno de estos, falla acá (AttributeError)
+    fuente._hbfont = None
+    fuente.missing_glyphs = []
+    fuente.biggest_size_pt = 0
+    fuente.subset = SubsetMap(fuente)
+    return fuente
+
+def _agregar_fuente(pdf, ruta, estilo):
+    """Registra un estilo de la TrueType: copia de la procesada o, si no se puede, add_font"""
+    if _COPIA_PROBADA:
+        try:
+            pdf.fonts[f"{FAMILIA_TTF}{estilo}"] = _copia_fuente(pdf, ruta, estilo)
+            return
+        except (AttributeError, TypeError, ValueError):
+            logging.getLogger(__name__).warning("No se pudo copiar la fuente %s; se usa add_font", ruta)
+    pdf.add_font(FAMILIA_TTF, estilo, ruta)
+
+def usar_fuente_unicode(pdf):
+    """
+    Registra la fuente TrueType en el documento (una vez por estilo) y la deja
+    como fuente del PDF. Si no se puede leer, el documento sigue en Helvetica
+    (ver TextoCoreSeguro) y devuelve False.
+    """
+    try:
+        for estilo in ('', 'B', 'I'):
+            ruta = FUENTES_TTF[estilo] if FUENTES_TTF[estilo] and os.path.isfile(FUENTES_TTF[estilo]) else FUENTES_TTF['']
+            _agregar_fuente(pdf, ruta, estilo)
+    except Exception:
+        logging.getLogger(__name__).exception("No se pudo cargar la fuente TrueType %s", FUENTES_TTF[''])
+        for estilo in ('', 'B', 'I'):
+            pdf.fonts.pop(f"{FAMILIA_TTF}{estilo}", None)
+        return False
+    pdf.fuente = FAMILIA_TTF
+    return True
+
+def elegir_fuente(pdf, *valores):
+    """
+    Helvetica si todo el texto entra en Latin-1 (sin fuente embebida: el PDF
+    no crece); la TrueType si hay otros caracteres y el archivo está.
+    Las secciones que llegan como generadores o cursores no se miran acá (se
+    consumirían): sus filas pasan por asegurar_fuente al dibujarse.
+    """
+    if fuente_ttf_configurada() and necesita_unicode(*valores):
+        usar_fuente_unicode(pdf)
+
+def asegurar_fuente(pdf, *valores):
+    """
+    Cambia a la TrueType a mitad del documento si una fila que recién llega
+    trae texto fuera de Latin-1. Conserva el estilo y tamaño actuales; lo ya
+    dibujado sigue en Helvetica.
+    """
+    if pdf.fuente == FAMILIA_CORE and fuente_ttf_configurada() and necesita_unicode(*valores):
+        if usar_fuente_unicode(pdf):
+            pdf.set_font(pdf.fuente, pdf.font_style, pdf.font_size_pt)
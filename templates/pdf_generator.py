@@ -1,5 +1,8 @@
 from fpdf import FPDF
 from io import BytesIO
+from templates.pdf_compacto import imagen_logo
+from templates.pdf_fuentes import FAMILIA_CORE, TextoCoreSeguro, elegir_fuente, asegurar_fuente
+from templates.pdf_filas import filas
 
 # Colores
 BLUE = (0, 51, 102)
@@ -12,27 +15,32 @@ def safe_text(v):
         return ""
     return str(v)
 
-class FormularioPDF(FPDF):
+class FormularioPDF(TextoCoreSeguro, FPDF):
     """Clase personalizada para el PDF de hoja de vida"""
     
+    # Modo compacto: logo reducido a su resolución impresa
+    compacto = False
+    # Familia de todos los textos (ver pdf_fuentes.elegir_fuente)
+    fuente = FAMILIA_CORE
+
     def header(self):
         """Encabezado del documento"""
-        self.image("static/image.png", x=12, y=8, w=40)
-        self.set_font('Helvetica', 'B', 14)
+        self.image(imagen_logo(self.compacto), x=12, y=8, w=40)
+        self.set_font(self.fuente, 'B', 14)
         self.cell(0, 10, 'FORMULARIO HOJA DE VIDA', align='C', ln=True)
         self.ln(3)
     
     def footer(self):
         """Pie de página con número de página"""
         self.set_y(-15)
-        self.set_font('Helvetica', 'I', 8)
+        self.set_font(self.fuente, 'I', 8)
         self.cell(0, 10, f'Página {self.page_no()}', align='C')
     
     def section_title(self, title):
         """Título de sección con fondo azul"""
         self.set_fill_color(*BLUE)
         self.set_text_color(*WHITE)
-        self.set_font('Helvetica', 'B', 11)
+        self.set_font(self.fuente, 'B', 11)
         self.cell(0, 7, title, fill=True, ln=True)
         self.set_text_color(*BLACK)
         self.ln(1)
@@ -40,11 +48,11 @@ class FormularioPDF(FPDF):
     def add_labeled_field(self, label, value, label_w, value_w, height=5):
         """Campo con etiqueta y línea para valor"""
         # Etiqueta
-        self.set_font('Helvetica', 'B', 9)
+        self.set_font(self.fuente, 'B', 9)
         self.cell(label_w, height, label, border=0)
         
         # Valor con línea debajo
-        self.set_font('Helvetica', '', 9)
+        self.set_font(self.fuente, '', 9)
         x_start = self.get_x()
         y_start = self.get_y()
         self.cell(value_w, height, safe_text(value), border=0)
@@ -122,6 +130,9 @@ def row_multicell(pdf, data, widths, line_height=5, aligns=None, valign="T"):
     if aligns is None:
         aligns = ["L"] * len(data)
 
+    # Las filas llegan de a una: la fuente se decide al ver cada una
+    asegurar_fuente(pdf, data)
+
     # Calcular altura máxima de la fila
     max_lines = 1
     for txt, w in zip(data, widths):
@@ -172,10 +183,13 @@ def cortar(txt, max_len=120):
 def genera_pdf_formulario(persona, experiencia=None, formacion=None, cursos=None,
                          paquetes=None, idiomas=None, docencia=None, referencias=None,
                          registro=None, pretension=None, incompatibilidades=None, 
-                         declaracion=None):
-    """Genera el PDF del formulario completo"""
+                         declaracion=None, compacto=False):
+    """Genera el PDF del formulario completo (compacto=True reduce el tamaño del archivo)"""
     
     pdf = FormularioPDF(format='A4')
+    pdf.compacto = compacto
+    elegir_fuente(pdf, persona, experiencia, formacion, cursos, paquetes, idiomas, docencia,
+                  referencias, registro, pretension, incompatibilidades, declaracion)
     pdf.set_auto_page_break(auto=True, margin=15)
     pdf.add_page()
     
@@ -220,11 +234,12 @@ def genera_pdf_formulario(persona, experiencia=None, formacion=None, cursos=None
     pdf.check_page_break(40)
     pdf.section_title('II. FORMACIÓN ACADÉMICA')
 
-    if formacion and len(formacion) > 0:
+    formacion = filas(formacion)
+    if formacion:
         widths = [45, 45, 50, 20, 25]
 
         # Encabezados
-        pdf.set_font('Helvetica', 'B', 7)
+        pdf.set_font(pdf.fuente, 'B', 7)
         pdf.set_fill_color(200, 220, 255)
         headers = ['Detalle', 'Institución', 'Grado/Título', 'Año', 'N° Folio']
 
@@ -233,7 +248,7 @@ def genera_pdf_formulario(persona, experiencia=None, formacion=None, cursos=None
         pdf.ln()
 
         # Filas
-        pdf.set_font('Helvetica', '', 7)
+        pdf.set_font(pdf.fuente, '', 7)
         for f in formacion:
             row_multicell(
                 pdf,
@@ -249,7 +264,7 @@ def genera_pdf_formulario(persona, experiencia=None, formacion=None, cursos=None
                 aligns=['L', 'L', 'L', 'C', 'C']
             )
     else:
-        pdf.set_font('Helvetica', 'I', 9)
+        pdf.set_font(pdf.fuente, 'I', 9)
         pdf.cell(0, 8, 'Sin registros de formación académica', ln=True)
 
     pdf.ln(8)
@@ -258,11 +273,12 @@ def genera_pdf_formulario(persona, experiencia=None, formacion=None, cursos=None
     pdf.check_page_break(40)
     pdf.section_title('III. EXPERIENCIA LABORAL')
 
-    if experiencia and len(experiencia) > 0:
+    experiencia = filas(experiencia)
+    if experiencia:
         widths = [55, 42, 35, 53]  # deben sumar ~185
 
         # Encabezado
-        pdf.set_font('Helvetica', 'B', 8)
+        pdf.set_font(pdf.fuente, 'B', 8)
         pdf.set_fill_color(200, 220, 255)
         headers = ['Institución/Empresa', 'Cargo', 'Periodo', 'Motivo Retiro']
 
@@ -271,7 +287,7 @@ def genera_pdf_formulario(persona, experiencia=None, formacion=None, cursos=None
         pdf.ln()
 
         # Filas
-        pdf.set_font('Helvetica', '', 7)
+        pdf.set_font(pdf.fuente, '', 7)
         for exp in experiencia:
             desde = safe_text(exp.get('desde', ''))
             hasta = safe_text(exp.get('hasta', ''))
@@ -290,19 +306,20 @@ def genera_pdf_formulario(persona, experiencia=None, formacion=None, cursos=None
                 aligns=['L', 'L', 'C', 'L']
             )
     else:
-        pdf.set_font('Helvetica', 'I', 9)
+        pdf.set_font(pdf.fuente, 'I', 9)
         pdf.cell(0, 8, 'Sin registros de experiencia laboral', ln=True)
 
     pdf.ln(8)
 
     # ==================== IV. CURSOS Y CAPACITACIONES ====================
-    if cursos and len(cursos) > 0:
+    cursos = filas(cursos)
+    if cursos:
         pdf.check_page_break(40)
         pdf.section_title('IV. CURSOS Y CAPACITACIONES')
 
         widths = [15, 38, 50, 57, 25]
 
-        pdf.set_font('Helvetica', 'B', 7)
+        pdf.set_font(pdf.fuente, 'B', 7)
         pdf.set_fill_color(200, 220, 255)
         headers = ['Año', 'Área', 'Institución', 'Nombre Capacitación', 'Horas']
 
@@ -310,7 +327,7 @@ def genera_pdf_formulario(persona, experiencia=None, formacion=None, cursos=None
             pdf.cell(w, 7, h, border=1, fill=True, align='C')
         pdf.ln()
 
-        pdf.set_font('Helvetica', '', 7)
+        pdf.set_font(pdf.fuente, '', 7)
         for c in cursos:
             row_multicell(
                 pdf,
@@ -329,14 +346,15 @@ def genera_pdf_formulario(persona, experiencia=None, formacion=None, cursos=None
         pdf.ln(8)
     
     # ==================== V. PAQUETES INFORMÁTICOS ====================
-    if paquetes and len(paquetes) > 0:
+    paquetes = filas(paquetes)
+    if paquetes:
         pdf.check_page_break(40)
         pdf.section_title('V. CONOCIMIENTO DE PAQUETES INFORMÁTICOS')
 
         widths = [65, 45, 75]
 
         # Encabezado
-        pdf.set_font('Helvetica', 'B', 8)
+        pdf.set_font(pdf.fuente, 'B', 8)
         pdf.set_fill_color(200, 220, 255)
         headers = ['Paquete', 'Nivel', 'N° Folio']
 
@@ -345,7 +363,7 @@ def genera_pdf_formulario(persona, experiencia=None, formacion=None, cursos=None
         pdf.ln()
 
         # Filas
-        pdf.set_font('Helvetica', '', 8)
+        pdf.set_font(pdf.fuente, '', 8)
         for p in paquetes:
             nivel = safe_text(p.get('nivel', ''))
             if nivel == 'muy_bueno':
@@ -370,14 +388,15 @@ def genera_pdf_formulario(persona, experiencia=None, formacion=None, cursos=None
         pdf.ln(8)
 
     # ==================== VI. IDIOMAS ====================
-    if idiomas and len(idiomas) > 0:
+    idiomas = filas(idiomas)
+    if idiomas:
         pdf.check_page_break(40)
         pdf.section_title('VI. IDIOMAS')
 
         widths = [50, 30, 30, 30, 35]
 
         # Encabezado
-        pdf.set_font('Helvetica', 'B', 8)
+        pdf.set_font(pdf.fuente, 'B', 8)
         pdf.set_fill_color(200, 220, 255)
         headers = ['Idioma', 'Lectura', 'Escritura', 'Conversación', 'N° Folio']
 
@@ -386,7 +405,7 @@ def genera_pdf_formulario(persona, experiencia=None, formacion=None, cursos=None
         pdf.ln()
 
         # Filas
-        pdf.set_font('Helvetica', '', 8)
+        pdf.set_font(pdf.fuente, '', 8)
         for i in idiomas:
             row_multicell(
                 pdf,
@@ -405,13 +424,14 @@ def genera_pdf_formulario(persona, experiencia=None, formacion=None, cursos=None
         pdf.ln(8)
     
     # ==================== VII. DOCENCIA ====================
-    if docencia and len(docencia) > 0:
+    docencia = filas(docencia)
+    if docencia:
         pdf.check_page_break(40)
         pdf.section_title('VII. DOCENCIA')
 
         widths = [15, 55, 65, 25, 25]
 
-        pdf.set_font('Helvetica', 'B', 7)
+        pdf.set_font(pdf.fuente, 'B', 7)
         pdf.set_fill_color(200, 220, 255)
         headers = ['Año', 'Institución', 'Nombre del Curso', 'Horas', 'N° Folio']
 
@@ -419,7 +439,7 @@ def genera_pdf_formulario(persona, experiencia=None, formacion=None, cursos=None
             pdf.cell(w, 7, h, border=1, fill=True, align='C')
         pdf.ln()
 
-        pdf.set_font('Helvetica', '', 7)
+        pdf.set_font(pdf.fuente, '', 7)
         for d in docencia:
             row_multicell(
                 pdf,
@@ -438,14 +458,15 @@ def genera_pdf_formulario(persona, experiencia=None, formacion=None, cursos=None
         pdf.ln(8)
 
     # ==================== VIII. REFERENCIAS ====================
-    if referencias and len(referencias) > 0:
+    referencias = filas(referencias)
+    if referencias:
         pdf.check_page_break(40)
         pdf.section_title('VIII. REFERENCIAS PERSONALES')
 
         widths = [55, 50, 45, 35]
 
         # Encabezado
-        pdf.set_font('Helvetica', 'B', 8)
+        pdf.set_font(pdf.fuente, 'B', 8)
         pdf.set_fill_color(200, 220, 255)
         headers = ['Nombre y Apellido', 'Institución', 'Puesto', 'Teléfono']
 
@@ -454,7 +475,7 @@ def genera_pdf_formulario(persona, experiencia=None, formacion=None, cursos=None
         pdf.ln()
 
         # Filas
-        pdf.set_font('Helvetica', '', 8)
+        pdf.set_font(pdf.fuente, '', 8)
         for r in referencias:
             row_multicell(
                 pdf,
@@ -493,7 +514,7 @@ def genera_pdf_formulario(persona, experiencia=None, formacion=None, cursos=None
         pdf.check_page_break(50)
         pdf.section_title('XI. INCOMPATIBILIDADES')
         
-        pdf.set_font('Helvetica', '', 9)
+        pdf.set_font(pdf.fuente, '', 9)
         
         vinc = incompatibilidades.get('vinculacion_ministerio', '')
         pdf.add_labeled_field('¿Tiene vinculación con el Ministerio de Culturas?', 
@@ -520,7 +541,7 @@ def genera_pdf_formulario(persona, experiencia=None, formacion=None, cursos=None
         pdf.check_page_break(60)
         pdf.section_title('XII. DECLARACIÓN JURADA')
         
-        pdf.set_font('Helvetica', '', 9)
+        pdf.set_font(pdf.fuente, '', 9)
         pdf.multi_cell(0, 5, 
             'Declaro bajo juramento que los datos consignados en el presente formulario '
             'son verdaderos y exactos, sometiéndome a las sanciones que establece la ley '
@@ -532,7 +553,7 @@ def genera_pdf_formulario(persona, experiencia=None, formacion=None, cursos=None
         pdf.ln(20)
         
         pdf.cell(0, 5, '________________________________', align='C', ln=True)
-        pdf.set_font('Helvetica', 'B', 9)
+        pdf.set_font(pdf.fuente, 'B', 9)
         pdf.cell(0, 5, 'Firma del Postulante', align='C', ln=True)
     
     # Generar output
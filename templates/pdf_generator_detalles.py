@@ -1,6 +1,8 @@
 from fpdf import FPDF
 from io import BytesIO
-import json
+from templates.pdf_compacto import imagen_logo
+from templates.pdf_fuentes import FAMILIA_CORE, TextoCoreSeguro, elegir_fuente, asegurar_fuente
+from templates.pdf_filas import filas, normalizar_ids_marcados
 
 # Colores
 BLUE = (0, 51, 102)
@@ -15,37 +17,42 @@ def safe_text(v):
         return ""
     return str(v)
 
-class DetallesPDF(FPDF):
+class DetallesPDF(TextoCoreSeguro, FPDF):
     """Clase para PDF simplificado de detalles"""
     
+    # Modo compacto: logo reducido a su resolución impresa
+    compacto = False
+    # Familia de todos los textos (ver pdf_fuentes.elegir_fuente)
+    fuente = FAMILIA_CORE
+
     def header(self):
         """Encabezado del documento"""
-        self.image("static/image.png", x=12, y=8, w=40)
-        self.set_font('Helvetica', 'B', 14)
+        self.image(imagen_logo(self.compacto), x=12, y=8, w=40)
+        self.set_font(self.fuente, 'B', 14)
         self.cell(0, 10, 'HOJA DE VIDA - RESUMEN', align='C', ln=True)
         self.ln(3)
     
     def footer(self):
         """Pie de página con número de página"""
         self.set_y(-15)
-        self.set_font('Helvetica', 'I', 8)
+        self.set_font(self.fuente, 'I', 8)
         self.cell(0, 10, f'Página {self.page_no()}', align='C')
     
     def section_title(self, title):
         """Título de sección con fondo azul"""
         self.set_fill_color(*BLUE)
         self.set_text_color(*WHITE)
-        self.set_font('Helvetica', 'B', 11)
+        self.set_font(self.fuente, 'B', 11)
         self.cell(0, 7, title, fill=True, ln=True)
         self.set_text_color(*BLACK)
         self.ln(1)
     
     def add_labeled_field(self, label, value, label_w, value_w, height=5):
         """Campo con etiqueta y línea para valor"""
-        self.set_font('Helvetica', 'B', 9)
+        self.set_font(self.fuente, 'B', 9)
         self.cell(label_w, height, label, border=0)
         
-        self.set_font('Helvetica', '', 9)
+        self.set_font(self.fuente, '', 9)
         x_start = self.get_x()
         y_start = self.get_y()
         self.cell(value_w, height, safe_text(value), border=0)
@@ -112,6 +119,9 @@ def row_multicell(pdf, data, widths, line_height=4.5, aligns=None, fill=False, f
     if aligns is None:
         aligns = ["L"] * len(data)
 
+    # Las filas llegan de a una: la fuente se decide al ver cada una
+    asegurar_fuente(pdf, data)
+
     # calcular altura máxima
     max_lines = 1
     for txt, w in zip(data, widths):
@@ -153,25 +163,22 @@ def row_multicell(pdf, data, widths, line_height=4.5, aligns=None, fill=False, f
     # devolver info útil por si quieres tachar o pintar
     return x_start, y_start, sum(widths), row_h
 
-def genera_pdf_detalles(persona, experiencia=None, resumen=None, ids_marcados=None):
-    """Genera PDF simplificado con datos personales y experiencia"""
-    
-    # Procesar ids_marcados
-    if ids_marcados:
-        if isinstance(ids_marcados, str):
-            try:
-                ids_marcados = json.loads(ids_marcados)
-            except:
-                ids_marcados = []
-        # Asegurar que todos sean enteros
-        ids_marcados = [int(id) for id in ids_marcados if id is not None]
-    else:
-        ids_marcados = []
-
+def nuevo_pdf_detalles(compacto=False):
+    """DetallesPDF configurado, todavía sin páginas"""
     pdf = DetallesPDF(format='A4')
+    pdf.compacto = compacto
     pdf.set_auto_page_break(auto=True, margin=15)
-    pdf.add_page()
+    return pdf
+
+def _dibujar_detalles(pdf, persona, experiencia=None, resumen=None, ids_marcados=None):
+    """Dibuja las secciones de una persona a partir de la página actual"""
     
+    # Procesar ids_marcados
+    ids_marcados = normalizar_ids_marcados(ids_marcados)
+
+    # En el PDF de comisión las personas llegan de a una: la fuente se decide al ver cada una
+    asegurar_fuente(pdf, persona, resumen)
+
     # ==================== I. DATOS PERSONALES ====================
     pdf.section_title('I. DATOS PERSONALES')
     
@@ -212,19 +219,20 @@ def genera_pdf_detalles(persona, experiencia=None, resumen=None, ids_marcados=No
     # ==================== III. EXPERIENCIA LABORAL ====================
     pdf.section_title('II. EXPERIENCIA LABORAL')
 
-    if experiencia and len(experiencia) > 0:
+    experiencia = filas(experiencia)
+    if experiencia:
         widths = [55, 42, 35, 53]
         headers = ['Institución/Empresa', 'Cargo', 'Periodo', 'Motivo Retiro']
 
         # Encabezados
-        pdf.set_font('Helvetica', 'B', 8)
+        pdf.set_font(pdf.fuente, 'B', 8)
         pdf.set_fill_color(200, 220, 255)
         for h, w in zip(headers, widths):
             pdf.cell(w, 7, h, border=1, fill=True, align='C')
         pdf.ln()
 
         # Filas
-        pdf.set_font('Helvetica', '', 7)
+        pdf.set_font(pdf.fuente, '', 7)
 
         for exp in experiencia:
             exp_id = exp.get('id')
@@ -249,7 +257,7 @@ def genera_pdf_detalles(persona, experiencia=None, resumen=None, ids_marcados=No
             )
 
     else:
-        pdf.set_font('Helvetica', 'I', 9)
+        pdf.set_font(pdf.fuente, 'I', 9)
         pdf.cell(0, 8, 'Sin registros de experiencia laboral', ln=True)
 
     pdf.ln(8)
@@ -257,21 +265,53 @@ def genera_pdf_detalles(persona, experiencia=None, resumen=None, ids_marcados=No
     # ==================== RESUMEN DE EXPERIENCIA ====================
     if resumen:
         pdf.set_fill_color(227, 242, 253)
-        pdf.set_font('Helvetica', 'B', 11)
+        pdf.set_font(pdf.fuente, 'B', 11)
         pdf.section_title('III. RESUMEN DE EXPERIENCIA LABORAL')
         pdf.ln(3)
         
-        pdf.set_font('Helvetica', '', 10)
+        pdf.set_font(pdf.fuente, '', 10)
         pdf.cell(95, 8, f'Total de Años: {resumen.get("total_anios", 0)}', border=1, align='C')
         pdf.cell(90, 8, f'Total de Meses: {resumen.get("total_meses", 0)}', border=1, align='C', ln=True)
         
-        pdf.set_font('Helvetica', 'I', 8)
+        pdf.set_font(pdf.fuente, 'I', 8)
         pdf.ln(2)
         pdf.cell(0, 5, f'Fecha de cálculo: {resumen.get("fecha_calculo", "")}', align='C', ln=True)
+
+def genera_pdf_detalles(persona, experiencia=None, resumen=None, ids_marcados=None, compacto=False):
+    """Genera PDF simplificado con datos personales y experiencia (compacto=True reduce el tamaño)"""
+    pdf = nuevo_pdf_detalles(compacto)
+    elegir_fuente(pdf, persona, experiencia, resumen)
+    pdf.add_page()
+    _dibujar_detalles(pdf, persona, experiencia, resumen, ids_marcados)
     
     # Generar output
     pdf_output = BytesIO()
     pdf_bytes = pdf.output()
     pdf_output.write(pdf_bytes)
     pdf_output.seek(0)
-    return pdf_output
\ No newline at end of file
+    return pdf_output
+
+def titulo_marcador(persona):
+    """Texto del marcador de una persona en el índice del PDF de comisión"""
+    nombre = " ".join(safe_text(persona.get(c)).strip() for c in ('ap_pat', 'ap_mat', 'nombres'))
+    return f"{' '.join(nombre.split())} (#{persona.get('id')})"
+
+def genera_pdf_comision(candidatos, compacto=False):
+    """
+    Un solo PDF con los detalles de varias personas, cada una desde página nueva
+    y con un marcador en el índice (outline) del documento.
+    candidatos: iterable de (persona, experiencia, resumen, ids_marcados); se
+    consume de a uno, así quien lo produce puede ir leyendo la base por lotes.
+    """
+    pdf = nuevo_pdf_detalles(compacto)
+    pdf.page_mode = "USE_OUTLINES"
+
+    for persona, experiencia, resumen, ids_marcados in candidatos:
+        pdf.add_page()
+        pdf.start_section(titulo_marcador(persona))
+        _dibujar_detalles(pdf, persona, experiencia, resumen, ids_marcados)
+
+    pdf_output = BytesIO()
+    pdf_output.write(pdf.output())
+    pdf_output.seek(0)
+    return pdf_output
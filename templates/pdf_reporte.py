@@ -0,0 +1,96 @@
+from fpdf import FPDF
+from io import BytesIO
+from datetime import datetime
+from templates.pdf_compacto import imagen_logo
+from templates.pdf_fuentes import FAMILIA_CORE, TextoCoreSeguro
+from templates.pdf_generator_detalles import row_multicell, safe_text, BLUE, WHITE, BLACK
+
+# Columnas del reporte (A4 horizontal, 267 mm útiles)
+COLUMNAS = [
+    ('N°', 10, 'C'),
+    ('Postulante', 52, 'L'),
+    ('CI', 24, 'L'),
+    ('Ciudad', 26, 'L'),
+    ('Grado más alto', 36, 'L'),
+    ('Experiencia', 24, 'C'),
+    ('Idiomas', 70, 'L'),
+    ('Pretensión (Bs)', 25, 'R'),
+]
+
+class ReportePDF(TextoCoreSeguro, FPDF):
+    """Reporte tabular: el encabezado de la tabla se repite en cada página"""
+
+    compacto = False
+    fuente = FAMILIA_CORE
+    titulo = 'RANKING DE POSTULANTES'
+
+    def header(self):
+        self.image(imagen_logo(self.compacto), x=10, y=6, w=30)
+        self.set_font(self.fuente, 'B', 13)
+        self.cell(0, 8, self.titulo, align='C', ln=True)
+        self.set_font(self.fuente, '', 8)
+        self.cell(0, 4, f'Generado: {datetime.now().strftime("%d/%m/%Y %H:%M")}', align='C', ln=True)
+        self.ln(4)
+
+        self.set_fill_color(*BLUE)
+        self.set_text_color(*WHITE)
+        self.set_font(self.fuente, 'B', 8)
+        for titulo, ancho, _ in COLUMNAS:
+            self.cell(ancho, 7, titulo, border=1, fill=True, align='C')
+        self.ln()
+        self.set_text_color(*BLACK)
+        self.set_font(self.fuente, '', 7)
+
+    def footer(self):
+        self.set_y(-12)
+        self.set_font(self.fuente, 'I', 8)
+        self.cell(0, 8, f'Página {self.page_no()}', align='C')
+        self.set_font(self.fuente, '', 7)
+
+def texto_experiencia(meses):
+    """Meses totales como 'Xa Ym'"""
+    meses = int(meses or 0)
+    return f"{meses // 12}a {meses % 12}m"
+
+def celdas_fila(numero, fila):
+    """Textos de las columnas de una fila del ranking"""
+    nombre = " ".join(safe_text(fila.get(c)).strip() for c in ('ap_pat', 'ap_mat', 'nombres'))
+    ci = f"{safe_text(fila.get('ci'))} {safe_text(fila.get('exp'))}".strip()
+    return [
+        str(numero),
+        " ".join(nombre.split()),
+        ci,
+        safe_text(fila.get('ciudad')),
+        safe_text(fila.get('grado')),
+        texto_experiencia(fila.get('meses_experiencia')),
+        safe_text(fila.get('idiomas')),
+        safe_text(fila.get('monto_bs')),
+    ]
+
+def genera_pdf_reporte(filas, titulo=None, compacto=False):
+    """
+    PDF con una fila por postulante. filas es un iterable (por ejemplo
+    reportes.filas_ranking) que se consume de a una: no se arma la lista completa.
+    """
+    pdf = ReportePDF(orientation='L', format='A4')
+    if titulo:
+        pdf.titulo = titulo
+    pdf.compacto = compacto
+    pdf.set_auto_page_break(auto=True, margin=14)
+    pdf.add_page()
+
+    anchos = [ancho for _, ancho, _ in COLUMNAS]
+    alineaciones = [alineacion for _, _, alineacion in COLUMNAS]
+
+    total = 0
+    for total, fila in enumerate(filas, start=1):
+        row_multicell(pdf, celdas_fila(total, fila), anchos, line_height=4, aligns=alineaciones)
+
+    if total == 0:
+        pdf.set_font(pdf.fuente, 'I', 9)
+        pdf.cell(0, 8, 'Sin postulantes registrados', ln=True)
+
+    pdf_output = BytesIO()
+    pdf_output.write(pdf.output())
+    pdf_output.seek(0)
+    return pdf_output
@@ -0,0 +1,101 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Sin hilos de mantenimiento ni respaldos programados durante las pruebas
+os.environ["MANTENIMIENTO_INTERVALO"] = "0"
+os.environ["RESPALDO_INTERVALO"] = "0"
+
+import app as aplicacion
+import almacen_pdf
+from cache_lru import CacheLRU
+from candidatos import validar_candidato, insertar_candidato
+from tablero import reconstruir_tablero
+from filtros import reconstruir_filtros
+
+# Base del repositorio con el esquema original (sin user_version)
+BASE_ORIGINAL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "form_hv.db")
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """La aplicación con todas sus bases, respaldos y PDF en una carpeta temporal"""
+    config = aplicacion.app.config
+    monkeypatch.setitem(config, "TESTING", True)
+    monkeypatch.setitem(config, "DATABASE", str(tmp_path / "form_hv.db"))
+    monkeypatch.setitem(config, "ARCHIVO_DATABASE", str(tmp_path / "form_hv_archivo.db"))
+    monkeypatch.setitem(config, "RESPALDO_DIR", str(tmp_path / "respaldos"))
+    monkeypatch.setitem(config, "CONVOCATORIA", None)
+    monkeypatch.setitem(config, "SHARDS", False)
+    monkeypatch.setattr(almacen_pdf, "ALMACEN_DIR", str(tmp_path / "pdf_almacen"))
+    monkeypatch.setattr(aplicacion, "_esquema_listo", False)
+    monkeypatch.setattr(aplicacion, "_shards_listos", set())
+    monkeypatch.setattr(aplicacion, "cache_detalles", CacheLRU())
+    aplicacion._destinos.clear()
+    yield aplicacion.app
+    aplicacion._destinos.clear()
+
+@pytest.fixture
+def base(app):
+    """Conexión a la base principal con el esquema al día"""
+    aplicacion.asegurar_esquema()
+    conn = aplicacion.get_db_connection()
+    yield conn
+    conn.close()
+
+@pytest.fixture
+def cliente(app, base):
+    """Cliente con la sesión del usuario por defecto (lo crea init_database)"""
+    usuario = base.execute("SELECT id FROM users WHERE username = 'admin'").fetchone()['id']
+    cliente = app.test_client()
+    with cliente.session_transaction() as sesion:
+        sesion['_user_id'] = str(usuario)
+    return cliente
+
+def candidato(**cambios):
+    """Registro de importación válido; cambios reemplaza columnas o secciones"""
+    registro = {
+        'nombres': 'Ana', 'ap_pat': 'Pérez', 'ap_mat': 'Quispe', 'ci': '1234567', 'exp': 'LP',
+        'est_civil': 'soltera', 'fecha_nac': '1990-01-01', 'lugar': 'La Paz', 'nacio': 'boliviana',
+        'direccion': 'Calle 1', 'ciudad': 'La Paz', 'gr_san': 'O+', 'tcel': 70000000,
+        'correo': 'ana@example.com',
+        'formacion': [{'detalle': 'Lic. Sistemas', 'institucion': 'UMSA', 'grado': 'Licenciatura'}],
+        'experiencia': [
+            {'nombre': 'Empresa', 'puesto': 'Analista', 'breve': 'x', 'desde': '2018-01-01',
+             'hasta': '2020-01-01', 'motivo': 'fin de contrato'},
+        ],
+        'idiomas': [{'idioma': 'Inglés', 'lectura': 'si', 'conversacion': 'si'}],
+        'paquetes': [{'paquete': 'Excel', 'nivel': 'bueno'}],
+        'pretension': {'monto_bs': '5.000'},
+    }
+    registro.update(cambios)
+    return registro
+
+def insertar(conn, convocatoria_id=None, **cambios):
+    """Inserta un candidato en la base y devuelve su id"""
+    registro = validar_candidato(candidato(**cambios))
+    registro['convocatoria_id'] = convocatoria_id
+    persona_id = insertar_candidato(conn.cursor(), registro)
+    conn.commit()
+    return persona_id
+
+def derivados(conn):
+    """Contenido de las tablas que mantienen los triggers (tablero y experiencia por persona)"""
+    return tuple(
+        sorted(tuple(row) for row in conn.execute(sql))
+        for sql in ("SELECT dimension, valor, detalle, postulantes FROM tablero",
+                    "SELECT persona_id, dimension, valor, detalle FROM tablero_persona",
+                    "SELECT persona_id, meses FROM experiencia_persona")
+    )
+
+def recalculados(conn):
+    """derivados() recalculados desde cero, sin dejar cambios en la base"""
+    conn.execute("BEGIN")
+    try:
+        reconstruir_tablero(conn.cursor())
+        reconstruir_filtros(conn.cursor())
+        return derivados(conn)
+    finally:
+        conn.rollback()
@@ -0,0 +1,62 @@
+import threading
+
+import pytest
+
+import app as aplicacion
+from admision import LimitadorRender, Saturado
+from conftest import insertar
+
+def test_rechaza_con_la_cola_llena():
+    limitador = LimitadorRender(concurrencia=1, max_cola=0, reintentar=7)
+    with limitador.turno():
+        with pytest.raises(Saturado) as error:
+            with limitador.turno():
+                pass
+    assert error.value.reintentar == 7
+    with limitador.turno():
+        pass
+    estadisticas = limitador.estadisticas()
+    assert (estadisticas['admitidos'], estadisticas['rechazados_cola']) == (2, 1)
+
+def test_rechaza_si_la_espera_vence():
+    limitador = LimitadorRender(concurrencia=1, max_cola=1, espera_max=0.05)
+    with limitador.turno():
+        with pytest.raises(Saturado):
+            with limitador.turno():
+                pass
+    assert limitador.estadisticas()['rechazados_espera'] == 1
+    assert limitador.estadisticas()['en_cola'] == 0
+
+def test_espera_un_lugar_en_la_cola():
+    limitador = LimitadorRender(concurrencia=1, max_cola=1, espera_max=5)
+    adentro, salir = threading.Event(), threading.Event()
+
+    def ocupar():
+        with limitador.turno():
+            adentro.set()
+            salir.wait(5)
+
+    hilo = threading.Thread(target=ocupar)
+    hilo.start()
+    adentro.wait(5)
+    threading.Timer(0.05, salir.set).start()
+    with limitador.turno():
+        pass
+    hilo.join()
+    assert limitador.estadisticas()['admitidos'] == 2
+
+def test_pdf_con_la_generacion_saturada(base, cliente, monkeypatch):
+    persona_id = insertar(base)
+    limitador = LimitadorRender(concurrencia=1, max_cola=0, reintentar=7)
+    monkeypatch.setattr(aplicacion, "limitador_render", limitador)
+
+    with limitador.turno():
+        resp = cliente.get(f'/imprimir_detalles/{persona_id}')
+    assert resp.status_code == 503
+    assert resp.headers['Retry-After'] == '7'
+    assert resp.headers['Cache-Control'] == 'no-store'
+
+    assert cliente.get(f'/imprimir_detalles/{persona_id}').status_code == 200
+    # Ya generado, se sirve del almacén aunque no haya lugar para renders
+    with limitador.turno():
+        assert cliente.get(f'/imprimir_detalles/{persona_id}').status_code == 200
@@ -0,0 +1,96 @@
+import io
+import os
+import threading
+import time
+
+import pytest
+
+import almacen_pdf
+
+@pytest.fixture
+def almacen(tmp_path, monkeypatch):
+    monkeypatch.setattr(almacen_pdf, "ALMACEN_DIR", str(tmp_path))
+    return tmp_path
+
+def pdf(contenido=b"%PDF-1.4 prueba"):
+    return io.BytesIO(contenido)
+
+def archivo(almacen, nombre, tamanio, usado_hace):
+    """PDF de `tamanio` bytes usado por última vez hace `usado_hace` segundos"""
+    ruta = almacen / nombre
+    ruta.write_bytes(b"x" * tamanio)
+    momento = time.time() - usado_hace
+    os.utime(ruta, (momento, momento))
+    return ruta
+
+def test_genera_una_sola_vez_con_pedidos_simultaneos(almacen):
+    llamadas = []
+
+    def generar():
+        llamadas.append(1)
+        time.sleep(0.2)
+        return pdf()
+
+    rutas = []
+    hilos = [threading.Thread(target=lambda: rutas.append(almacen_pdf.obtener_pdf("A.pdf", generar)))
+             for _ in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert len(llamadas) == 1
+    assert rutas == [str(almacen / "A.pdf")] * 8
+    assert (almacen / "A.pdf").read_bytes() == b"%PDF-1.4 prueba"
+    # Sin locks ni temporales que queden colgados
+    assert almacen_pdf._generando == {}
+    assert os.listdir(almacen) == ["A.pdf"]
+
+def test_error_al_generar_no_deja_nada(almacen):
+    def falla():
+        raise RuntimeError("sin datos")
+
+    with pytest.raises(RuntimeError):
+        almacen_pdf.obtener_pdf("B.pdf", falla)
+    assert os.listdir(almacen) == []
+    assert almacen_pdf._generando == {}
+    # El siguiente pedido lo genera normalmente
+    assert almacen_pdf.obtener_pdf("B.pdf", pdf) == str(almacen / "B.pdf")
+
+def test_poda_los_menos_usados(almacen):
+    archivo(almacen, "viejo.pdf", 100, usado_hace=3000)
+    archivo(almacen, "medio.pdf", 100, usado_hace=2000)
+    archivo(almacen, "nuevo.pdf", 100, usado_hace=1000)
+    archivo(almacen, "abandonado.tmp", 10, usado_hace=3000)
+
+    assert almacen_pdf.podar_almacen(max_bytes=150, gracia=300) == 3
+    assert os.listdir(almacen) == ["nuevo.pdf"]
+
+def test_poda_respeta_la_gracia(almacen):
+    archivo(almacen, "viejo.pdf", 100, usado_hace=3000)
+    archivo(almacen, "enviandose.pdf", 100, usado_hace=10)
+    archivo(almacen, "escribiendose.tmp", 10, usado_hace=10)
+
+    # Aunque se pase del tamaño, lo usado hace menos de `gracia` segundos se conserva
+    assert almacen_pdf.podar_almacen(max_bytes=0, gracia=300) == 1
+    assert sorted(os.listdir(almacen)) == ["enviandose.pdf", "escribiendose.tmp"]
+
+def test_usar_un_pdf_lo_protege_de_la_poda(almacen):
+    ruta = archivo(almacen, "A.pdf", 100, usado_hace=3000)
+    archivo(almacen, "B.pdf", 100, usado_hace=2000)
+    mtime = os.stat(ruta).st_mtime
+
+    almacen_pdf.obtener_pdf("A.pdf", pytest.fail)
+
+    # El acierto renueva el uso pero no el mtime (del que salen ETag y Last-Modified)
+    assert os.stat(ruta).st_mtime == mtime
+    assert almacen_pdf.podar_almacen(max_bytes=100, gracia=0) == 1
+    assert os.listdir(almacen) == ["A.pdf"]
+
+def test_invalidar_pdfs(almacen):
+    for nombre in ("DETALLES_HV_1_v1.pdf", "DETALLES_HV_1_v2.pdf", "DETALLES_HV_12_v1.pdf", "FORMULARIO_HV_1_v1.pdf"):
+        (almacen / nombre).write_bytes(b"x")
+
+    almacen_pdf.invalidar_pdfs("DETALLES_HV_1_", excepto="DETALLES_HV_1_v2")
+
+    assert sorted(os.listdir(almacen)) == ["DETALLES_HV_12_v1.pdf", "DETALLES_HV_1_v2.pdf", "FORMULARIO_HV_1_v1.pdf"]
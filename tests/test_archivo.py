@@ -0,0 +1,94 @@
+import sqlite3
+
+import app as aplicacion
+from archivo import preparar_archivo
+from conftest import insertar
+
+def archivar(app, base, nombre='Convocatoria 2024'):
+    """Crea una convocatoria cerrada con un postulante y la archiva; devuelve su id"""
+    convocatoria_id = base.execute(
+        "INSERT INTO convocatorias (nombre, estado) VALUES (?, 'cerrada')", (nombre,)
+    ).lastrowid
+    base.commit()
+    persona_id = insertar(base, convocatoria_id=convocatoria_id)
+    resultado = app.test_cli_runner().invoke(args=["archivar", nombre])
+    assert resultado.exit_code == 0, resultado.output
+    assert resultado.output.startswith("1 postulantes movidos")
+    return persona_id
+
+def test_archivar_mueve_todas_las_filas(app, base):
+    persona_id = archivar(app, base)
+
+    assert base.execute("SELECT COUNT(*) FROM datos WHERE id = ?", (persona_id,)).fetchone()[0] == 0
+    archivo = sqlite3.connect(app.config["ARCHIVO_DATABASE"])
+    try:
+        assert archivo.execute("SELECT nombres FROM datos WHERE id = ?", (persona_id,)).fetchone() == ('Ana',)
+        for tabla in ('experiencia', 'formacion_academica', 'idiomas', 'pretension_salarial'):
+            assert archivo.execute(f"SELECT COUNT(*) FROM {tabla} WHERE persona_id = ?", (persona_id,)).fetchone()[0] == 1
+    finally:
+        archivo.close()
+    # Para los consumidores del registro de cambios es una baja
+    assert base.execute(
+        "SELECT COUNT(*) FROM cambios WHERE tabla = 'datos' AND operacion = 'D' AND fila_id = ?", (persona_id,)
+    ).fetchone()[0] == 1
+
+def test_archivar_otra_vez_despues_de_un_corte(app, base):
+    convocatoria_id = base.execute(
+        "INSERT INTO convocatorias (nombre, estado) VALUES ('Convocatoria 2024', 'cerrada')"
+    ).lastrowid
+    base.commit()
+    persona_id = insertar(base, convocatoria_id=convocatoria_id)
+    # Corte entre las dos transacciones de un lote: ya copiada al archivo, todavía en la principal
+    preparar_archivo(base, app.config["ARCHIVO_DATABASE"])
+    for tabla in ['datos'] + aplicacion.TABLAS_ARCHIVO:
+        base.execute(f"INSERT INTO archivo.{tabla} SELECT * FROM main.{tabla}")
+    base.commit()
+    base.execute("DETACH DATABASE archivo")
+
+    resultado = app.test_cli_runner().invoke(args=["archivar", "Convocatoria 2024"])
+    assert resultado.output.startswith("1 postulantes movidos")
+    archivo = sqlite3.connect(app.config["ARCHIVO_DATABASE"])
+    try:
+        assert archivo.execute("SELECT COUNT(*) FROM datos WHERE id = ?", (persona_id,)).fetchone()[0] == 1
+        assert archivo.execute("SELECT COUNT(*) FROM experiencia WHERE persona_id = ?", (persona_id,)).fetchone()[0] == 1
+    finally:
+        archivo.close()
+    assert base.execute("SELECT COUNT(*) FROM datos WHERE id = ?", (persona_id,)).fetchone()[0] == 0
+
+def test_lecturas_buscan_en_el_archivo(app, base, cliente):
+    persona_id = archivar(app, base)
+
+    conn, persona = aplicacion.buscar_persona("id", persona_id)
+    try:
+        assert persona['nombres'] == 'Ana'
+    finally:
+        conn.close()
+    conn, persona = aplicacion.buscar_persona("correo", "ana@example.com", "id")
+    try:
+        assert persona['id'] == persona_id
+    finally:
+        conn.close()
+
+    resp = cliente.get(f'/detalles/{persona_id}')
+    assert resp.status_code == 200
+    assert 'Analista' in resp.get_data(as_text=True)
+    assert cliente.get(f'/detalles/{persona_id}', headers={'If-None-Match': resp.headers['ETag']}).status_code == 304
+
+def test_eliminar_un_archivado(app, base, cliente):
+    persona_id = archivar(app, base)
+
+    resp = cliente.post(f'/eliminar/{persona_id}')
+    assert resp.status_code == 302
+    assert aplicacion.buscar_persona("id", persona_id) == (None, None)
+    archivo = sqlite3.connect(app.config["ARCHIVO_DATABASE"])
+    try:
+        for tabla in aplicacion.TABLAS_ARCHIVO:
+            assert archivo.execute(f"SELECT COUNT(*) FROM {tabla} WHERE persona_id = ?", (persona_id,)).fetchone()[0] == 0
+    finally:
+        archivo.close()
+
+def test_no_encontrada_sin_archivo(cliente):
+    resp = cliente.get('/detalles/99')
+    assert resp.status_code == 302
+    with cliente.session_transaction() as sesion:
+        assert ('error', 'Persona no encontrada') in sesion['_flashes']
@@ -0,0 +1,101 @@
+import json
+
+from conftest import insertar
+
+def cambios(conn, tabla=None):
+    """(tabla, operacion, fila_id, datos) del registro de cambios, en orden"""
+    sql = "SELECT tabla, operacion, fila_id, datos FROM cambios"
+    params = ()
+    if tabla:
+        sql += " WHERE tabla = ?"
+        params = (tabla,)
+    return [(row[0], row[1], row[2], json.loads(row[3]) if row[3] else None)
+            for row in conn.execute(sql + " ORDER BY seq", params)]
+
+def version(conn, persona_id):
+    return conn.execute("SELECT version FROM datos WHERE id = ?", (persona_id,)).fetchone()[0]
+
+def test_alta(base):
+    ana = insertar(base)
+    insertar(base, ci='7654321', correo='luis@example.com', nombres='Luis')
+
+    altas = cambios(base, 'datos')
+    assert [(tabla, operacion) for tabla, operacion, _, _ in altas] == [('datos', 'I'), ('datos', 'I')]
+    assert altas[0][2] == ana and altas[0][3]['ci'] == '1234567'
+    assert ('experiencia', 'I') in [c[:2] for c in cambios(base)]
+
+def test_modificacion(base):
+    ana = insertar(base)
+    luis = insertar(base, ci='7654321', correo='luis@example.com', nombres='Luis')
+    v = version(base, ana)
+    base.execute("DELETE FROM cambios")
+
+    base.execute("UPDATE datos SET ciudad = 'Oruro' WHERE id = ?", (ana,))
+    base.execute("UPDATE formacion_academica SET persona_id = ? WHERE persona_id = ?", (luis, ana))
+    base.commit()
+
+    assert version(base, ana) > v
+    registrados = cambios(base)
+    dato = next(c[3] for c in registrados if c[:3] == ('datos', 'U', ana))
+    assert dato['ciudad'] == 'Oruro'
+    # El cambio de persona de una fila queda registrado con la fila nueva
+    formacion = [c for c in registrados if c[0] == 'formacion_academica']
+    assert [c[1] for c in formacion] == ['U'] and formacion[0][3]['persona_id'] == luis
+
+def test_actualizacion_sin_cambios_no_registra_nada(base):
+    ana = insertar(base)
+    v = version(base, ana)
+    base.execute("DELETE FROM cambios")
+
+    # Solo las columnas que mantienen los triggers de versión
+    base.execute("UPDATE datos SET actualizado_en = datetime('now', '-1 day') WHERE id = ?", (ana,))
+    base.commit()
+
+    assert version(base, ana) == v
+    assert cambios(base) == []
+
+def test_baja(base):
+    ana = insertar(base)
+    base.execute("DELETE FROM cambios")
+
+    base.execute("DELETE FROM experiencia WHERE persona_id = ?", (ana,))
+    base.execute("DELETE FROM datos WHERE id = ?", (ana,))
+    base.commit()
+
+    assert [c[:2] for c in cambios(base)][0] == ('experiencia', 'D')
+    assert ('datos', 'D', ana, None) in cambios(base)
+
+def test_leer_de_a_paginas(base, cliente):
+    insertar(base)
+    total = len(cambios(base))
+
+    leidos, cursor = [], ''
+    while True:
+        pagina = cliente.get(f'/cambios?desde={cursor}&limite=2').get_json()
+        assert len(pagina['cambios']) <= 2
+        leidos.extend(pagina['cambios'])
+        cursor = pagina['cursor']
+        if not pagina['hay_mas']:
+            break
+
+    assert [c['seq'] for c in leidos] == list(range(1, total + 1))
+    assert cursor == f'0:{total}'
+    assert cliente.get(f'/cambios?desde={cursor}').get_json()['cambios'] == []
+    assert cliente.get('/cambios?desde=x').status_code == 400
+
+def test_podar_vence_los_cursores_anteriores(app, base, cliente):
+    insertar(base)
+    total = len(cambios(base))
+    base.execute("UPDATE cambios SET registrado_en = datetime('now', '-2 days')")
+    base.commit()
+
+    # Solo lo que ya leyeron todos los consumidores
+    resultado = app.test_cli_runner().invoke(args=["podar-cambios", "--dias", "1", "--cursor", "0:3"])
+    assert resultado.exit_code == 0, resultado.output
+    assert "3 cambios borrados (hasta seq 3)" in resultado.output
+    assert [row[0] for row in base.execute("SELECT seq FROM cambios ORDER BY seq")] == list(range(4, total + 1))
+
+    resp = cliente.get('/cambios?desde=0:2')
+    assert resp.status_code == 410
+    assert resp.get_json()['cursor'] == f'0:{total}'
+    assert cliente.get('/cambios?desde=0:3').status_code == 200
@@ -0,0 +1,41 @@
+import re
+
+import app as aplicacion
+from conftest import insertar
+
+def personas(base, cantidad):
+    return [insertar(base, ci=str(n), correo=f'p{n}@example.com', ap_pat=f'Apellido{n}')
+            for n in range(1, cantidad + 1)]
+
+def test_lee_por_lotes_en_orden(base, monkeypatch):
+    ids = personas(base, 5)
+    lotes = []
+    leer = aplicacion.leer_lote_detalles
+    monkeypatch.setattr(aplicacion, "leer_lote_detalles", lambda lote: lotes.append(lote) or leer(lote))
+
+    seleccion = [(ids[4], {1}), (ids[0], set()), (99, set()), (ids[2], set()), (ids[1], set())]
+    candidatos = list(aplicacion.candidatos_comision(seleccion, tam_lote=2))
+
+    assert lotes == [[ids[4], ids[0]], [99, ids[2]], [ids[1]]]
+    # En el orden pedido; quien no existe se omite
+    assert [(c[0]['id'], c[3]) for c in candidatos] == [(ids[4], {1}), (ids[0], set()), (ids[2], set()), (ids[1], set())]
+    assert candidatos[0][1][0]['puesto'] == 'Analista'
+
+def test_pdf_de_comision(base, cliente):
+    ids = personas(base, 3)
+    resp = cliente.post('/imprimir_comision', json={'candidatos': [{'id': i} for i in reversed(ids)]})
+
+    assert resp.status_code == 200
+    assert resp.mimetype == 'application/pdf'
+    assert resp.headers['Content-Disposition'] == 'attachment; filename=COMISION_HV_3.pdf'
+    pdf = resp.get_data()
+    # Un marcador por persona, en el orden recibido
+    assert re.findall(rb"/Title \(Apellido(\d)", pdf) == [b"3", b"2", b"1"]
+
+def test_comision_con_errores(base, cliente):
+    ids = personas(base, 1)
+    assert cliente.post('/imprimir_comision', json={'candidatos': []}).status_code == 400
+    assert cliente.post('/imprimir_comision', json={'candidatos': [{'id': 'x'}]}).status_code == 400
+    resp = cliente.post('/imprimir_comision', json={'candidatos': [{'id': ids[0]}, {'id': 99}]})
+    assert resp.status_code == 404
+    assert resp.get_json()['ids'] == [99]
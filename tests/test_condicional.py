@@ -0,0 +1,84 @@
+from conftest import insertar
+
+def envejecer(base, persona_id, segundos=10):
+    """Atrasa la fecha de la última escritura de la persona (negativo: la adelanta)"""
+    base.execute(
+        "UPDATE datos SET actualizado_en = datetime('now', ?) WHERE id = ?", (f"{-segundos} seconds", persona_id)
+    )
+    base.commit()
+
+def test_detalles_etag(base, cliente):
+    persona_id = insertar(base)
+    resp = cliente.get(f'/detalles/{persona_id}')
+    assert resp.status_code == 200
+    etag = resp.headers['ETag']
+    assert resp.headers['Cache-Control'] == 'private, no-cache'
+
+    resp = cliente.get(f'/detalles/{persona_id}', headers={'If-None-Match': etag})
+    assert resp.status_code == 304
+    assert resp.headers['ETag'] == etag
+    assert resp.get_data() == b''
+
+    # Guardar el mismo resumen dos veces: solo la primera es una escritura
+    assert cliente.post(f'/guardar_resumen/{persona_id}', json={'anios': 2, 'meses': 1}).status_code == 200
+    resp = cliente.get(f'/detalles/{persona_id}', headers={'If-None-Match': etag})
+    assert resp.status_code == 200
+    etag = resp.headers['ETag']
+    assert cliente.post(f'/guardar_resumen/{persona_id}', json={'anios': 2, 'meses': 1}).status_code == 200
+    assert cliente.get(f'/detalles/{persona_id}', headers={'If-None-Match': etag}).status_code == 304
+
+def test_if_none_match_tiene_prioridad(base, cliente):
+    persona_id = insertar(base)
+    envejecer(base, persona_id)
+    resp = cliente.get(f'/detalles/{persona_id}')
+    ultima_modificacion = resp.headers['Last-Modified']
+
+    resp = cliente.get(f'/detalles/{persona_id}', headers={
+        'If-None-Match': '"otra-version"', 'If-Modified-Since': ultima_modificacion,
+    })
+    assert resp.status_code == 200
+
+def test_last_modified_solo_con_el_segundo_terminado(base, cliente):
+    persona_id = insertar(base)
+    # Escrita en un segundo que todavía no terminó (aquí, unos segundos adelante
+    # para no depender del reloj): otra escritura podría tener la misma fecha
+    envejecer(base, persona_id, -5)
+    assert 'Last-Modified' not in cliente.get(f'/detalles/{persona_id}').headers
+
+    envejecer(base, persona_id)
+    ultima_modificacion = cliente.get(f'/detalles/{persona_id}').headers['Last-Modified']
+    resp = cliente.get(f'/detalles/{persona_id}', headers={'If-Modified-Since': ultima_modificacion})
+    assert resp.status_code == 304
+
+    base.execute("UPDATE datos SET ciudad = 'Sucre' WHERE id = ?", (persona_id,))
+    base.commit()
+    resp = cliente.get(f'/detalles/{persona_id}', headers={'If-Modified-Since': ultima_modificacion})
+    assert resp.status_code == 200
+
+def test_pdf_detalles(base, cliente):
+    persona_id = insertar(base)
+    resp = cliente.get(f'/imprimir_detalles/{persona_id}?ids_marcados=[1]')
+    assert resp.status_code == 200
+    assert resp.mimetype == 'application/pdf'
+    assert resp.get_data().startswith(b'%PDF')
+    etag = resp.headers['ETag']
+
+    assert cliente.get(f'/imprimir_detalles/{persona_id}?ids_marcados=[1]',
+                       headers={'If-None-Match': etag}).status_code == 304
+    # Otra selección de experiencia es otro documento
+    resp = cliente.get(f'/imprimir_detalles/{persona_id}', headers={'If-None-Match': etag})
+    assert resp.status_code == 200
+    assert resp.headers['ETag'] != etag
+
+    resp = cliente.get(f'/imprimir_detalles/{persona_id}?ids_marcados=[1]', headers={'Range': 'bytes=0-3'})
+    assert resp.status_code == 206
+    assert resp.get_data() == b'%PDF'
+
+def test_reimprimir(base, cliente):
+    persona_id = insertar(base)
+    resp = cliente.post('/reimprimir', data={'correo': 'ana@example.com'})
+    assert resp.status_code == 200
+    assert resp.headers['Content-Disposition'] == f'attachment; filename=FORMULARIO_HV_{persona_id}.pdf'
+    resp = cliente.post('/reimprimir', data={'correo': 'ana@example.com'},
+                        headers={'If-None-Match': resp.headers['ETag']})
+    assert resp.status_code == 304
@@ -0,0 +1,75 @@
+from conftest import insertar
+
+def experiencia(base, persona_id):
+    return [dict(row) for row in base.execute(
+        "SELECT id, nombre, puesto, hasta FROM experiencia WHERE persona_id = ? ORDER BY id", (persona_id,)
+    )]
+
+def version(base, persona_id):
+    return base.execute("SELECT version FROM datos WHERE id = ?", (persona_id,)).fetchone()[0]
+
+def test_solo_escribe_lo_que_cambia(base, cliente):
+    persona_id = insertar(base)
+    fila = experiencia(base, persona_id)[0]
+    base.execute("DELETE FROM cambios")
+    base.commit()
+
+    resp = cliente.post(f'/editar/{persona_id}', json={
+        'version': version(base, persona_id),
+        'ciudad': 'Sucre',
+        'correo': 'ana@example.com',  # igual al guardado
+        'experiencia': [
+            {'id': fila['id'], 'nombre': 'Empresa', 'puesto': 'Jefa', 'breve': 'x', 'desde': '2018-01-01',
+             'hasta': '2020-01-01', 'motivo': 'fin de contrato'},
+            {'nombre': 'Otra', 'puesto': 'Analista', 'breve': 'y', 'desde': '2020-02-01',
+             'hasta': '2021-01-01', 'motivo': 'renuncia'},
+        ],
+        'idiomas': [{'idioma': 'Inglés', 'lectura': 'si', 'conversacion': 'si'}],  # sin cambios
+    })
+
+    assert resp.status_code == 200
+    cuerpo = resp.get_json()
+    assert cuerpo['cambios'] == {
+        'datos': ['ciudad'],
+        'experiencia': {'insertadas': 1, 'actualizadas': 1, 'eliminadas': 0},
+    }
+    assert cuerpo['version'] == version(base, persona_id)
+    assert [(f['id'], f['puesto']) for f in experiencia(base, persona_id)][0] == (fila['id'], 'Jefa')
+    # En el registro de cambios: datos, la fila corregida y la nueva; nada de idiomas
+    assert sorted((row[0], row[1]) for row in base.execute("SELECT tabla, operacion FROM cambios")) == [
+        ('datos', 'U'), ('experiencia', 'I'), ('experiencia', 'U'),
+    ]
+
+def test_sin_cambios_no_escribe(base, cliente):
+    persona_id = insertar(base)
+    antes = version(base, persona_id)
+    resp = cliente.post(f'/editar/{persona_id}', json={
+        'ciudad': 'La Paz', 'paquetes': [{'paquete': 'Excel', 'nivel': 'bueno'}],
+    })
+    assert resp.get_json()['cambios'] == {}
+    assert version(base, persona_id) == antes
+
+def test_version_vieja(base, cliente):
+    persona_id = insertar(base)
+    vieja = version(base, persona_id)
+    assert cliente.post(f'/editar/{persona_id}', json={'version': vieja, 'ciudad': 'Oruro'}).status_code == 200
+
+    resp = cliente.post(f'/editar/{persona_id}', json={'version': vieja, 'ciudad': 'Sucre'})
+    assert resp.status_code == 409
+    assert base.execute("SELECT ciudad FROM datos WHERE id = ?", (persona_id,)).fetchone()[0] == 'Oruro'
+
+def test_ediciones_rechazadas(base, cliente):
+    ana = insertar(base)
+    luis = insertar(base, ci='7654321', correo='luis@example.com', nombres='Luis')
+    fila_de_luis = experiencia(base, luis)[0]['id']
+
+    resp = cliente.post(f'/editar/{ana}', json={'experiencia': [
+        {'id': fila_de_luis, 'nombre': 'E', 'puesto': 'P', 'breve': 'b', 'motivo': 'm'},
+    ]})
+    assert resp.status_code == 400
+    assert 'no es de esta persona' in resp.get_json()['message']
+    assert cliente.post(f'/editar/{ana}', json={'edad': 30}).status_code == 400
+    assert cliente.post(f'/editar/{ana}', json={'ci': '7654321'}).status_code == 409
+    assert cliente.post(f'/editar/{ana}', json={'correo': 'luis@example.com'}).status_code == 409
+    assert cliente.post('/editar/99', json={'ciudad': 'Oruro'}).status_code == 404
+    assert experiencia(base, luis)[0]['id'] == fila_de_luis
@@ -0,0 +1,80 @@
+import sqlite3
+import threading
+
+import pytest
+
+from escritura import EscritorGrupal, EscrituraOcupada, MetricasEscritura, transaccion_escritura
+
+@pytest.fixture
+def ruta(tmp_path):
+    ruta = str(tmp_path / "b.db")
+    conn = sqlite3.connect(ruta)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("CREATE TABLE t(x TEXT)")
+    conn.close()
+    return ruta
+
+def insertar(valor, falla=False):
+    def escribir(conn):
+        conn.execute("INSERT INTO t VALUES (?)", (valor,))
+        if falla:
+            raise ValueError(valor)
+        return valor
+    return escribir
+
+def filas(ruta):
+    conn = sqlite3.connect(ruta)
+    try:
+        return [row[0] for row in conn.execute("SELECT x FROM t ORDER BY rowid")]
+    finally:
+        conn.close()
+
+def test_un_trabajo_que_falla_no_deshace_a_los_demas(ruta):
+    escritor = EscritorGrupal(lambda: sqlite3.connect(ruta), espera_grupo=0.5)
+    futuros = [escritor.enviar(insertar('a')), escritor.enviar(insertar('b', falla=True)),
+               escritor.enviar(insertar('c'))]
+
+    assert futuros[0].result(5) == 'a'
+    with pytest.raises(ValueError):
+        futuros[1].result(5)
+    assert futuros[2].result(5) == 'c'
+    assert filas(ruta) == ['a', 'c']
+    # Los tres en una sola transacción
+    assert escritor.estadisticas()['grupos'] == 1
+    assert escritor.estadisticas()['grupo_max'] == 3
+
+def test_cola_llena(ruta):
+    escritor = EscritorGrupal(lambda: sqlite3.connect(ruta), max_cola=1, espera_grupo=0)
+    empezo, seguir = threading.Event(), threading.Event()
+
+    def lento(conn):
+        empezo.set()
+        seguir.wait(5)
+
+    primero = escritor.enviar(lento)
+    assert empezo.wait(5)
+    segundo = escritor.enviar(insertar('a'))  # espera en la cola
+    with pytest.raises(EscrituraOcupada):
+        escritor.enviar(insertar('b'))
+
+    seguir.set()
+    primero.result(5)
+    assert segundo.result(5) == 'a'
+    assert filas(ruta) == ['a']
+
+def test_transaccion_con_la_base_ocupada(ruta):
+    metricas = MetricasEscritura()
+    otra = sqlite3.connect(ruta)
+    otra.execute("BEGIN IMMEDIATE")
+    try:
+        with pytest.raises(EscrituraOcupada):
+            transaccion_escritura(lambda: sqlite3.connect(ruta), insertar('a'), busy_timeout_ms=10,
+                                  reintentos=2, pausa_base=0.001, metricas=metricas)
+    finally:
+        otra.rollback()
+        otra.close()
+
+    assert metricas.resumen()['fallidas'] == 1
+    assert metricas.resumen()['reintentos'] == 2
+    assert transaccion_escritura(lambda: sqlite3.connect(ruta), insertar('a'), metricas=metricas)[0] == 'a'
+    assert filas(ruta) == ['a']
@@ -0,0 +1,52 @@
+import shutil
+import sqlite3
+
+import app as aplicacion
+from conftest import BASE_ORIGINAL, derivados, recalculados
+
+def tablas(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+def test_base_nueva_queda_en_la_version_actual(base):
+    assert base.execute("PRAGMA user_version").fetchone()[0] == aplicacion.ESQUEMA_VERSION
+    assert {'datos', 'convocatorias', 'cambios', 'cambios_poda', 'tablero', 'tablero_persona',
+            'experiencia_persona', 'resumen_experiencia_historial'} <= tablas(base)
+
+def test_migra_la_base_original(app):
+    shutil.copy(BASE_ORIGINAL, app.config["DATABASE"])
+    conn = sqlite3.connect(app.config["DATABASE"])
+    assert conn.execute("PRAGMA user_version").fetchone()[0] < aplicacion.ESQUEMA_VERSION
+    personas = conn.execute("SELECT id, nombres, ci FROM datos ORDER BY id").fetchall()
+    conn.close()
+
+    aplicacion.init_database()
+
+    conn = aplicacion.get_db_connection()
+    try:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == aplicacion.ESQUEMA_VERSION
+        assert [tuple(row) for row in conn.execute("SELECT id, nombres, ci FROM datos ORDER BY id")] == personas
+        columnas = {row['name'] for row in conn.execute("PRAGMA table_info(datos)")}
+        assert {'version', 'actualizado_en', 'clave_ci', 'clave_nombre', 'convocatoria_id'} <= columnas
+        assert conn.execute("SELECT COUNT(*) FROM datos WHERE actualizado_en IS NULL").fetchone()[0] == 0
+
+        # El tablero y la experiencia por persona se calcularon para las filas existentes
+        ciudades = conn.execute("SELECT SUM(postulantes) FROM tablero WHERE dimension = 'ciudad'").fetchone()[0]
+        assert ciudades == len(personas)
+        assert derivados(conn) == recalculados(conn)
+    finally:
+        conn.close()
+
+def test_migrar_dos_veces_no_cambia_nada(app):
+    shutil.copy(BASE_ORIGINAL, app.config["DATABASE"])
+    aplicacion.init_database()
+    conn = aplicacion.get_db_connection()
+    antes = derivados(conn), [tuple(row) for row in conn.execute("SELECT id, version FROM datos ORDER BY id")]
+    conn.close()
+
+    aplicacion.init_database()
+
+    conn = aplicacion.get_db_connection()
+    try:
+        assert (derivados(conn), [tuple(row) for row in conn.execute("SELECT id, version FROM datos ORDER BY id")]) == antes
+    finally:
+        conn.close()
@@ -0,0 +1,104 @@
+from functools import partial
+
+from werkzeug.datastructures import MultiDict
+
+import app as aplicacion
+from conftest import insertar
+from filtros import consulta_filtro, filtrar, leer_criterios
+
+def personas(conn, cantidad, **cambios):
+    base_ci = conn.execute("SELECT COUNT(*) FROM datos").fetchone()[0] * 100
+    return [insertar(conn, ci=str(base_ci + n), correo=f'p{base_ci + n}@example.com', **cambios)
+            for n in range(1, cantidad + 1)]
+
+def criterios(**args):
+    return leer_criterios(MultiDict(args))
+
+def ids(conn, filtro, desde=0, limite=100):
+    sql, params = consulta_filtro(conn, filtro, desde, limite)
+    return [row[0] for row in conn.execute(sql, params)]
+
+def test_leer_criterios():
+    leidos = leer_criterios(MultiDict([
+        ('ciudad', 'La Paz'), ('ciudad', 'Oruro'), ('idioma', 'Inglés:lectura,conversacion'),
+        ('paquete', 'Excel:bueno'), ('experiencia_min', '1.5'), ('grado_min', '5'), ('sin_incompatibilidades', '1'),
+    ]))
+    assert leidos == {
+        'ciudades': ['La Paz', 'Oruro'], 'idiomas': [('Inglés', ['lectura', 'conversacion'])],
+        'paquetes': [('Excel', 'bueno')], 'experiencia_meses': 18, 'grado_min': 5, 'sin_incompatibilidades': True,
+    }
+    for malo in ({'idioma': 'Inglés:cantar'}, {'paquete': 'Excel:experto'}, {'experiencia_min': '-1'},
+                 {'grado_min': '99'}):
+        try:
+            leer_criterios(MultiDict(malo))
+        except ValueError:
+            continue
+        raise AssertionError(malo)
+
+def test_guia_es_el_criterio_mas_selectivo(base):
+    personas(base, 3)
+    aymara = personas(base, 1, idiomas=[{'idioma': 'Aymara', 'lectura': 'si'}])
+
+    sql, _ = consulta_filtro(base, criterios(ciudad='La Paz', idioma='Aymara'))
+    # Se recorre el idioma (1 persona) y la ciudad (4) se busca por cada una
+    assert sql.startswith("SELECT DISTINCT persona_id AS guia FROM tablero_persona WHERE dimension = 'idioma'")
+    assert "EXISTS (SELECT 1 FROM tablero_persona WHERE dimension = 'ciudad'" in sql
+    assert ids(base, criterios(ciudad='La Paz', idioma='Aymara')) == aymara
+
+def test_interseccion(base):
+    lapaz_excel = personas(base, 2, paquetes=[{'paquete': 'Excel', 'nivel': 'muy_bueno'}])
+    lapaz_regular = personas(base, 2, paquetes=[{'paquete': 'Excel', 'nivel': 'regular'}])
+    oruro_excel = personas(base, 2, ciudad='Oruro', paquetes=[{'paquete': 'Excel', 'nivel': 'bueno'}])
+    personas(base, 1, ciudad='Sucre', paquetes=[], experiencia=[])
+
+    assert ids(base, criterios(ciudad='La Paz', paquete='Excel:bueno')) == lapaz_excel
+    assert ids(base, criterios(paquete='Excel:bueno')) == lapaz_excel + oruro_excel
+    assert ids(base, criterios(paquete='Excel')) == lapaz_excel + lapaz_regular + oruro_excel
+    ciudades = leer_criterios(MultiDict([('ciudad', 'Oruro'), ('ciudad', 'La Paz')]))
+    assert ids(base, ciudades) == lapaz_excel + lapaz_regular + oruro_excel
+    assert ids(base, criterios(experiencia_min='2', ciudad='Oruro')) == oruro_excel
+    assert ids(base, criterios(experiencia_min='3')) == []
+    assert ids(base, {}) == lapaz_excel + lapaz_regular + oruro_excel + [oruro_excel[-1] + 1]
+
+def test_experiencia_selectiva_usa_el_indice_de_meses(base):
+    personas(base, 3)
+    senior = personas(base, 1, experiencia=[
+        {'nombre': 'E', 'puesto': 'P', 'breve': 'x', 'desde': '2010-01-01', 'hasta': '2020-01-01', 'motivo': 'm'},
+    ])
+
+    filtro = criterios(experiencia_min='5', ciudad='La Paz')
+    sql, params = consulta_filtro(base, filtro)
+    plan = " ".join(row[3] for row in base.execute("EXPLAIN QUERY PLAN " + sql, params))
+    # Por el índice de meses, no recorriendo la tabla en orden de persona_id
+    assert "SEARCH experiencia_persona USING COVERING INDEX idx_experiencia_persona_meses (meses>?)" in plan
+    assert ids(base, filtro) == senior
+
+def test_paginas_entre_shards(app, base):
+    principal = personas(base, 3)
+    shard = aplicacion.conexion_shard(1, crear=True)
+    try:
+        en_shard = personas(shard, 2)
+    finally:
+        shard.close()
+    assert en_shard[0] > principal[-1]
+
+    fuentes = [partial(aplicacion.conexion_shard, 0), partial(aplicacion.conexion_shard, 1),
+               partial(aplicacion.conexion_shard, 2)]
+    paginas, desde = [], 0
+    while desde is not None:
+        pagina, desde = filtrar(fuentes, criterios(ciudad='La Paz'), desde, limite=2)
+        paginas.append(pagina)
+    assert paginas == [principal[:2], [principal[2], en_shard[0]], [en_shard[1]]]
+
+def test_ruta_filtrar(base, cliente):
+    todos = personas(base, 3, idiomas=[{'idioma': 'Inglés', 'lectura': 'si', 'escritura': 'si'}])
+    personas(base, 1)
+
+    resp = cliente.get('/filtrar?idioma=Inglés:escritura&limite=2').get_json()
+    assert resp == {'ids': todos[:2], 'siguiente': todos[1]}
+    resp = cliente.get(f"/filtrar?idioma=Inglés:escritura&limite=2&desde={resp['siguiente']}").get_json()
+    assert resp == {'ids': todos[2:], 'siguiente': None}
+
+    resp = cliente.get('/filtrar?paquete=Excel:experto')
+    assert resp.status_code == 400
+    assert resp.get_json()['error'] == "Paquete no válido: Excel:experto"
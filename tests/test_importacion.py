@@ -0,0 +1,111 @@
+import csv
+import io
+import json
+import re
+import sqlite3
+
+import pytest
+
+from candidatos import validar_candidato
+from conftest import candidato, derivados, recalculados
+
+def subir(cliente, contenido, nombre='candidatos.jsonl', **campos):
+    datos = {'archivo': (io.BytesIO(contenido.encode('utf-8')), nombre), **campos}
+    return cliente.post('/importar', data=datos, content_type='multipart/form-data')
+
+def jsonl(*registros):
+    return "\n".join(r if isinstance(r, str) else json.dumps(r) for r in registros) + "\n"
+
+@pytest.mark.parametrize("cambios, mensaje", [
+    ({'nombres': '  '}, "datos: faltan nombres"),
+    ({'tcel': 'setenta'}, "datos.tcel: debe ser un número entero"),
+    ({'experiencia': {'nombre': 'x'}}, "experiencia: se esperaba una lista"),
+    ({'experiencia': [{'nombre': 'Empresa'}]}, "experiencia[0]: faltan puesto, breve, motivo"),
+    ({'paquetes': [{'paquete': 'Excel', 'nivel': 'experto'}]}, "paquetes: nivel debe ser uno de"),
+    ({'incompatibilidades': {'percibe_renta': 'tal vez'}}, "incompatibilidades.percibe_renta: debe ser 'si' o 'no'"),
+])
+def test_validacion_rechaza(cambios, mensaje):
+    with pytest.raises(ValueError, match=re.escape(mensaje)):
+        validar_candidato(candidato(**cambios))
+
+def test_validacion_normaliza():
+    valido = validar_candidato(candidato(tcel='70000001', ap_mat='', idiomas=[{'idioma': 'Aymara', 'lectura': 'sí'}]))
+    assert valido['tcel'] == 70000001
+    assert valido['ap_mat'] is None
+    assert valido['idiomas'] == [{'idioma': 'Aymara', 'lectura': 1, 'escritura': 0, 'conversacion': 0, 'folio': None}]
+    # Las secciones vacías no se importan
+    assert 'cursos' not in valido
+
+def test_importar_jsonl(base, cliente):
+    resp = subir(cliente, jsonl(
+        candidato(),
+        '{"nombres": ',
+        candidato(ci='2', nombres=None),
+        candidato(ci='3', correo='b@example.com'),
+        candidato(correo='otra@example.com'),  # mismo CI+expedido que la fila 1
+        candidato(ci='4', paquetes=[{'paquete': 'Word', 'nivel': 'experto'}]),
+        candidato(ci='5', correo='c@example.com'),
+    ), lote='2')
+
+    assert resp.status_code == 200
+    informe = resp.get_json()
+    assert informe['success'] is True
+    assert (informe['leidos'], informe['importados'], informe['lotes_fallidos']) == (7, 3, 0)
+    assert [e['fila'] for e in informe['errores']] == [2, 3, 5, 6]
+    assert informe['errores'][0]['error'].startswith("JSON inválido")
+    assert informe['errores'][2]['error'].startswith("duplicado")
+
+    assert [row[0] for row in base.execute("SELECT ci FROM datos ORDER BY id")] == ['1234567', '3', '5']
+    assert base.execute("SELECT COUNT(*) FROM experiencia").fetchone()[0] == 3
+    assert derivados(base) == recalculados(base)
+
+def test_importar_csv(base, cliente):
+    registro = candidato()
+    texto = io.StringIO()
+    escritor = csv.DictWriter(texto, fieldnames=list(registro))
+    escritor.writeheader()
+    # En CSV las secciones van como JSON dentro de su columna
+    escritor.writerow({k: json.dumps(v) if isinstance(v, (list, dict)) else v for k, v in registro.items()})
+    escritor.writerow({**registro, 'ci': '9', 'tcel': 'x', 'formacion': '', 'experiencia': '', 'idiomas': '',
+                       'paquetes': '', 'pretension': ''})
+
+    informe = subir(cliente, texto.getvalue(), 'candidatos.csv').get_json()
+    assert informe['importados'] == 1
+    assert informe['errores'] == [{'fila': 3, 'error': "datos.tcel: debe ser un número entero"}]
+    assert base.execute("SELECT idioma, lectura FROM idiomas").fetchone()[:] == ('Inglés', 1)
+
+def test_importar_sin_archivo(cliente):
+    resp = cliente.post('/importar', data={}, content_type='multipart/form-data')
+    assert resp.status_code == 400
+    assert resp.get_json()['success'] is False
+
+def test_importar_en_convocatoria_cerrada(base, cliente):
+    base.execute("INSERT INTO convocatorias (nombre, estado) VALUES ('Cerrada', 'cerrada')")
+    base.commit()
+    resp = subir(cliente, jsonl(candidato()), convocatoria='Cerrada')
+    assert resp.status_code == 409
+    assert base.execute("SELECT COUNT(*) FROM datos").fetchone()[0] == 0
+
+def test_importar_en_convocatoria(base, cliente):
+    informe = subir(cliente, jsonl(candidato()), convocatoria='Abierta').get_json()
+    assert informe['importados'] == 1
+    assert base.execute(
+        "SELECT c.nombre FROM datos d JOIN convocatorias c ON c.id = d.convocatoria_id"
+    ).fetchone()[0] == 'Abierta'
+
+def test_lote_con_la_base_ocupada(app, base, cliente, monkeypatch):
+    monkeypatch.setitem(app.config, "ESPERA_LOCK_MS", 50)
+    monkeypatch.setitem(app.config, "REINTENTOS_ESCRITURA", 0)
+    otra = sqlite3.connect(app.config["DATABASE"])
+    otra.execute("BEGIN IMMEDIATE")
+    try:
+        resp = subir(cliente, jsonl(candidato(), candidato(ci='2', correo='b@example.com')), lote='1')
+    finally:
+        otra.rollback()
+        otra.close()
+
+    informe = resp.get_json()
+    assert resp.status_code == 200
+    assert informe['success'] is False
+    assert (informe['importados'], informe['lotes_fallidos']) == (0, 2)
+    assert all(e['error'].startswith("lote no importado") for e in informe['errores'])
@@ -0,0 +1,65 @@
+import sqlite3
+
+import app as aplicacion
+from mantenimiento import Mantenimiento
+
+def base_wal(ruta):
+    conn = sqlite3.connect(ruta)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA wal_autocheckpoint = 0")
+    conn.execute("CREATE TABLE t(x BLOB)")
+    conn.commit()
+    return conn
+
+def escribir(conn, paginas):
+    conn.executemany("INSERT INTO t VALUES (zeroblob(4000))", [()] * paginas)
+    conn.commit()
+
+def mantenedor(ruta, **opciones):
+    return Mantenimiento(lambda: [ruta], ruta + ".lock", registrar=lambda mensaje: None, **opciones)
+
+def test_truncate_con_el_wal_al_dia(tmp_path):
+    ruta = str(tmp_path / "b.db")
+    conn = base_wal(ruta)
+    escribir(conn, 50)
+    m = mantenedor(ruta, wal_max_bytes=1)
+
+    m.mantener(ruta)
+    pasos = m.estadisticas()['bases'][ruta]
+    assert pasos['passive']['copiados'] == pasos['passive']['frames']
+    assert not pasos['truncate']['ocupado']
+    assert (tmp_path / "b.db-wal").stat().st_size == 0
+    conn.close()
+
+def test_truncate_forzado_con_espera_acotada(tmp_path):
+    ruta = str(tmp_path / "b.db")
+    conn = base_wal(ruta)
+    escribir(conn, 10)
+    # Un lector con una foto vieja: el PASSIVE no puede copiar lo que escriben después
+    lector = sqlite3.connect(ruta, isolation_level=None)
+    lector.execute("BEGIN")
+    lector.execute("SELECT COUNT(*) FROM t").fetchone()
+    escribir(conn, 1500)
+    tamanio = (tmp_path / "b.db-wal").stat().st_size
+    m = mantenedor(ruta, wal_max_bytes=tamanio // 2 - 1, busy_timeout_ms=100)
+
+    m.mantener(ruta)
+    pasos = m.estadisticas()['bases'][ruta]
+    assert pasos['passive']['frames'] - pasos['passive']['copiados'] >= 1000
+    # Se intenta aunque el PASSIVE no haya terminado, sin esperar más que busy_timeout_ms
+    assert pasos['truncate']['ocupado']
+    assert pasos['truncate']['ms'] < 1000
+
+    lector.rollback()
+    m.mantener(ruta)
+    assert (tmp_path / "b.db-wal").stat().st_size == 0
+    lector.close()
+    conn.close()
+
+def test_conexiones_de_requests_con_red_de_seguridad(app, monkeypatch):
+    monkeypatch.setattr(aplicacion, "mantenimiento", object())
+    conn = aplicacion.get_db_connection()
+    try:
+        assert conn.execute("PRAGMA wal_autocheckpoint").fetchone()[0] == 10000
+    finally:
+        conn.close()
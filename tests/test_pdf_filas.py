@@ -0,0 +1,41 @@
+import re
+
+import app as aplicacion
+from conftest import insertar
+from templates.pdf_filas import filas
+from templates.pdf_generator import genera_pdf_formulario
+
+def test_filas_sin_filas():
+    assert filas(None) is None
+    assert filas([]) is None
+    assert filas(x for x in []) is None
+
+def test_filas_solo_lee_la_primera():
+    leidas = []
+
+    def generador():
+        for n in range(3):
+            leidas.append(n)
+            yield n
+
+    iterador = filas(generador())
+    assert leidas == [0]
+    assert list(iterador) == [0, 1, 2]
+    assert leidas == [0, 1, 2]
+
+def sin_fechas(pdf):
+    """El PDF sin las marcas de tiempo ni el identificador del documento"""
+    return re.sub(rb"/CreationDate \(D:[^)]*\)|/ID \[[^]]*\]", b"", pdf.getvalue())
+
+def test_pdf_desde_cursores_igual_que_desde_listas(base):
+    persona_id = insertar(base, cursos=[{'area_capacitacion': 'Datos', 'institucion': 'X', 'nombre_capacitacion': 'SQL'}])
+    persona_row = base.execute("SELECT * FROM datos WHERE id = ?", (persona_id,)).fetchone()
+
+    secciones = aplicacion.leer_datos_completos(base, persona_row, persona_id)
+    desde_cursores = genera_pdf_formulario(*secciones)
+    secciones = aplicacion.leer_datos_completos(base, persona_row, persona_id)
+    desde_listas = genera_pdf_formulario(*(list(s) if s is not None and not isinstance(s, dict) else s
+                                           for s in secciones))
+
+    assert desde_cursores.getvalue().startswith(b'%PDF')
+    assert sin_fechas(desde_cursores) == sin_fechas(desde_listas)
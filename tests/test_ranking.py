@@ -0,0 +1,35 @@
+from conftest import insertar
+
+def test_reporte_en_linea(base, cliente):
+    insertar(base)
+    resp = cliente.get('/reporte_ranking?orden=grado')
+    assert resp.status_code == 200
+    assert resp.get_data().startswith(b'%PDF')
+
+def test_orden_no_valido(base, cliente):
+    resp = cliente.get('/reporte_ranking?orden=edad')
+    assert resp.status_code == 302
+    with cliente.session_transaction() as sesion:
+        assert ('error', 'Orden de reporte no válido') in sesion['_flashes']
+
+def test_reporte_grande_se_genera_fuera_del_request(app, base, cliente, monkeypatch):
+    insertar(base)
+    insertar(base, ci='7654321', correo='luis@example.com', nombres='Luis')
+    monkeypatch.setitem(app.config, "REPORTE_MAX_FILAS", 1)
+
+    resp = cliente.get('/reporte_ranking')
+    assert resp.status_code == 302
+    with cliente.session_transaction() as sesion:
+        mensaje = sesion.pop('_flashes')[0][1]
+    assert mensaje.startswith("El reporte tiene 2 postulantes y en línea se generan hasta 1")
+
+    resultado = app.test_cli_runner().invoke(args=["reporte-ranking"])
+    assert resultado.exit_code == 0, resultado.output
+    assert "REPORTE_RANKING_experiencia_2_" in resultado.output
+    resp = cliente.get('/reporte_ranking')
+    assert resp.status_code == 200
+    assert resp.get_data().startswith(b'%PDF')
+
+    # Con los datos cambiados el reporte guardado ya no corresponde
+    insertar(base, ci='1111111', correo='eva@example.com', nombres='Eva')
+    assert cliente.get('/reporte_ranking').status_code == 302
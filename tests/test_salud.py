@@ -0,0 +1,39 @@
+import sqlite3
+import time
+
+def test_sin_autorizacion_solo_el_resultado(app, base):
+    cliente = app.test_client()
+    assert cliente.get('/healthz').get_json() == {'ok': True}
+    assert cliente.get('/readyz').get_json() == {'ok': True}
+
+def test_listo_aunque_un_escritor_tenga_el_lock(app, base, cliente):
+    otra = sqlite3.connect(app.config["DATABASE"])
+    otra.execute("BEGIN IMMEDIATE")
+    try:
+        inicio = time.perf_counter()
+        resp = cliente.get('/readyz')
+        segundos = time.perf_counter() - inicio
+    finally:
+        otra.rollback()
+        otra.close()
+
+    assert resp.status_code == 200
+    assert segundos < 0.5
+    detalle = resp.get_json()
+    assert detalle['motivos'] == []
+    # El lock se informa, pero no se espera ni decide
+    assert detalle['lock_escritura']['0']['obtenido'] is False
+
+def test_no_listo_con_la_base_lenta(app, base, cliente, monkeypatch):
+    monkeypatch.setitem(app.config, "LISTO_LATENCIA_MS", -1)
+    resp = cliente.get('/readyz')
+    assert resp.status_code == 503
+    assert resp.get_json()['motivos'][0].startswith("latencia de la base")
+
+def test_no_listo_con_el_wal_grande(app, base, cliente, monkeypatch):
+    base.execute("UPDATE users SET username = username")
+    base.commit()
+    monkeypatch.setitem(app.config, "LISTO_WAL_MB", 0)
+    resp = cliente.get('/readyz')
+    assert resp.status_code == 503
+    assert resp.get_json()['motivos'][0].startswith("WAL del shard 0")
@@ -0,0 +1,65 @@
+from conftest import insertar, derivados, recalculados
+
+def tablero(conn, dimension):
+    """{(valor, detalle): postulantes} de una dimensión"""
+    return {(row[0], row[1]): row[2] for row in conn.execute(
+        "SELECT valor, detalle, postulantes FROM tablero WHERE dimension = ?", (dimension,)
+    )}
+
+def test_alta(base):
+    ana = insertar(base)
+    insertar(base, ci='7654321', correo='luis@example.com', nombres='Luis', ciudad='la paz',
+             pretension={'monto_bs': '12000'}, experiencia=[])
+
+    assert derivados(base) == recalculados(base)
+    # Las ciudades se agrupan sin distinguir mayúsculas
+    assert tablero(base, 'ciudad') == {('La Paz', ''): 2}
+    assert tablero(base, 'pretension') == {('5000', ''): 1, ('10000', ''): 1}
+    assert tablero(base, 'idioma') == {('Inglés', ''): 2, ('Inglés', 'lectura'): 2, ('Inglés', 'conversacion'): 2}
+    # De enero de 2018 a enero de 2020 cuenta los dos meses extremos; sin filas no hay experiencia_persona
+    assert [tuple(row) for row in base.execute("SELECT persona_id, meses FROM experiencia_persona")] == [(ana, 25)]
+
+def test_modificacion(base):
+    ana = insertar(base)
+    luis = insertar(base, ci='7654321', correo='luis@example.com', nombres='Luis', ciudad='Oruro')
+
+    base.execute("UPDATE datos SET ciudad = 'Oruro' WHERE id = ?", (ana,))
+    base.execute("UPDATE experiencia SET hasta = '2023-01-01' WHERE persona_id = ?", (ana,))
+    base.execute("UPDATE pretension_salarial SET monto_bs = '3.500,50' WHERE persona_id = ?", (ana,))
+    base.execute("UPDATE idiomas SET lectura = 0 WHERE persona_id = ?", (luis,))
+    base.execute("UPDATE formacion_academica SET persona_id = ? WHERE persona_id = ?", (luis, ana))
+    base.commit()
+
+    assert derivados(base) == recalculados(base)
+    assert tablero(base, 'ciudad') == {('Oruro', ''): 2}
+    assert tablero(base, 'pretension') == {('3000', ''): 1, ('5000', ''): 1}
+    assert tablero(base, 'idioma')[('Inglés', 'lectura')] == 1
+    assert base.execute("SELECT meses FROM experiencia_persona WHERE persona_id = ?", (ana,)).fetchone()[0] == 61
+
+def test_baja(base):
+    ana = insertar(base)
+    luis = insertar(base, ci='7654321', correo='luis@example.com', nombres='Luis')
+
+    base.execute("DELETE FROM experiencia WHERE persona_id = ?", (luis,))
+    base.commit()
+    assert [row[0] for row in base.execute("SELECT persona_id FROM experiencia_persona")] == [ana]
+
+    for tabla in ('formacion_academica', 'experiencia', 'idiomas', 'paquetes_informaticos', 'pretension_salarial'):
+        base.execute(f"DELETE FROM {tabla} WHERE persona_id = ?", (ana,))
+    base.execute("DELETE FROM datos WHERE id = ?", (ana,))
+    base.commit()
+
+    assert derivados(base) == recalculados(base)
+    assert tablero(base, 'ciudad') == {('La Paz', ''): 1}
+    assert base.execute("SELECT COUNT(*) FROM tablero_persona WHERE persona_id = ?", (ana,)).fetchone()[0] == 0
+    assert base.execute("SELECT COUNT(*) FROM experiencia_persona").fetchone()[0] == 0
+
+def test_ruta_tablero(base, cliente):
+    insertar(base)
+    insertar(base, ci='7654321', correo='luis@example.com', nombres='Luis', ciudad='Oruro')
+
+    resumen = cliente.get('/tablero').get_json()
+    assert resumen['postulantes'] == 2
+    assert resumen['ciudad'] == [{'ciudad': 'La Paz', 'postulantes': 1}, {'ciudad': 'Oruro', 'postulantes': 1}]
+    assert resumen['idiomas'][0] == {'idioma': 'Inglés', 'postulantes': 2, 'lectura': 2, 'escritura': 0,
+                                     'conversacion': 2}